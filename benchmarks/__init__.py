@@ -0,0 +1 @@
+# Offline benchmarks for the slack-click library; see benchmarks/README.md
@@ -0,0 +1,98 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Cold import time of slack-click, measured in a new interpreter for each
+import.  The `import.python` benchmark is the interpreter start-up time alone;
+subtract it from the others.
+
+Importing slack_click.async_click must not import Slack-Bolt, nor patch Click;
+the benchmark exits with status 1 if it does.
+
+    python -m benchmarks.bench_import --json before.json
+    python -m benchmarks.bench_import --baseline before.json --threshold 0.15
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+import subprocess
+import sys
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from .runner import BenchmarkSuite, cli_main
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+suite = BenchmarkSuite("import", batches=5, min_batch_time=0.2)
+
+# modules that must not be imported as a side effect of importing slack-click;
+# the standard library modules are only needed by optional features.
+HEAVY_MODULES = (
+    "slack_bolt",
+    "slack_sdk",
+    "aiohttp",
+    "cProfile",
+    "pstats",
+    "sqlite3",
+)
+
+SIDE_EFFECT_CHECK = f"""
+import sys, click
+orig = click.decorators.get_current_context
+import slack_click.async_click
+loaded = [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+if loaded:
+    sys.exit("imported: " + ", ".join(loaded))
+if click.decorators.get_current_context is not orig:
+    sys.exit("click.decorators patched on import")
+"""
+
+
+def _import_benchmark(statement: str):
+    argv = [sys.executable, "-c", statement]
+
+    def run_import():
+        subprocess.run(argv, check=True)
+
+    return run_import
+
+
+suite.add("import.python", _import_benchmark("pass"))
+suite.add("import.click", _import_benchmark("import click"))
+suite.add("import.slack_click", _import_benchmark("import slack_click"))
+suite.add("import.async_click", _import_benchmark("import slack_click.async_click"))
+
+
+def check_side_effects() -> bool:
+    proc = subprocess.run(
+        [sys.executable, "-c", SIDE_EFFECT_CHECK], capture_output=True, text=True
+    )
+    if proc.returncode:
+        print(f"IMPORT SIDE EFFECTS: {proc.stderr.strip()}")
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    status = cli_main(suite)
+    sys.exit(status or (0 if check_side_effects() else 1))
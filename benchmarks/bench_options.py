@@ -0,0 +1,113 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Benchmarks for the options-load index: building the index from the command
+tree, and answering prefix, fuzzy, and provider queries.
+
+    python -m benchmarks.bench_options --json before.json
+    python -m benchmarks.bench_options --baseline before.json --threshold 0.15
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+import sys
+
+# -----------------------------------------------------------------------------
+# Public Imports
+# -----------------------------------------------------------------------------
+
+import click
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from slack_click.options import OptionsIndex
+from .fakes import build_deep_tree
+from .runner import BenchmarkSuite, cli_main
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+suite = BenchmarkSuite("options")
+
+N_HOSTS = 5000
+HOSTS = [
+    f"{site}-{role}-{idx:03d}"
+    for site in ("nyc", "sfo", "lon", "sin", "fra")
+    for role in ("web", "db", "cache", "lb")
+    for idx in range(N_HOSTS // 20)
+]
+
+tree = build_deep_tree()
+
+
+@tree.command("connect")
+@click.argument("host", type=click.Choice(HOSTS))
+async def connect(host):  # pragma: no cover
+    pass
+
+
+@tree.options_provider("/deep.tickets")
+async def tickets(query):
+    return [f"TICKET-{idx}" for idx in range(500)]
+
+
+index = tree.compile_options()
+HOST_SOURCE = "/deep.connect.host"
+
+
+@suite.benchmark("build.tree")
+def build_tree():
+    OptionsIndex().build(tree)
+
+
+@suite.benchmark("query.commands")
+async def query_commands():
+    await index.search("/deep", "g")
+
+
+@suite.benchmark("query.prefix")
+async def query_prefix():
+    await index.search(HOST_SOURCE, "lon-db-1")
+
+
+@suite.benchmark("query.contains")
+async def query_contains():
+    await index.search(HOST_SOURCE, "cache-24")
+
+
+@suite.benchmark("query.fuzzy")
+async def query_fuzzy():
+    await index.search(HOST_SOURCE, "sfolb9")
+
+
+@suite.benchmark("query.provider_cached")
+async def query_provider_cached():
+    await index.search("/deep.tickets", "TICKET-4")
+
+
+@suite.benchmark("options_load")
+async def options_load():
+    await index.options_load(dict(action_id=HOST_SOURCE, value="nyc-web"))
+
+
+if __name__ == "__main__":
+    sys.exit(cli_main(suite))
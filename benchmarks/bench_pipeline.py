@@ -0,0 +1,222 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Microbenchmarks for each phase of the slash-command pipeline in
+SlackClickHelper.main, plus the complete pipeline, for a flat command group, a
+deep tree of groups, and a command with a large option set.
+
+    python -m benchmarks.bench_pipeline --json before.json
+    python -m benchmarks.bench_pipeline --baseline before.json --threshold 0.15
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+import sys
+
+# -----------------------------------------------------------------------------
+# Public Imports
+# -----------------------------------------------------------------------------
+
+import click
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from slack_click.parsing import shell_tokenize, whitespace_tokenize
+from slack_click.profiling import Profiler
+from .fakes import (
+    StubSay,
+    make_request,
+    build_flat_tree,
+    build_deep_tree,
+    build_wide_options_tree,
+)
+from .runner import BenchmarkSuite, cli_main
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+suite = BenchmarkSuite("pipeline")
+say = StubSay()
+
+flat = build_flat_tree()
+deep = build_deep_tree()
+deep_indexed = build_deep_tree()
+deep_indexed.compile_dispatch()
+wide = build_wide_options_tree()
+
+FLAT_ARGS = ["cmd7", "--opt0", "a quoted value", "--opt1", "b"]
+FLAT_TEXT = 'cmd7 --opt0 "a quoted value" --opt1 b'
+DEEP_TEXT = "g4 g4 cmd4 --opt0 a"
+WIDE_TEXT = "cmd " + " ".join(f"--opt{idx} v{idx}" for idx in range(60))
+
+flat_request = make_request("/flat", FLAT_TEXT, say=say)
+deep_request = make_request("/deep", DEEP_TEXT, say=say)
+wide_request = make_request("/wide", WIDE_TEXT, say=say)
+
+
+def _leaf_context(root, tokens, request):
+    """Returns the parsed context for the leaf command named by the tokens."""
+    ctx = root.make_context(root.name, list(tokens), obj=request)
+    while isinstance(ctx.command, click.MultiCommand):
+        args = ctx.protected_args + ctx.args
+        name, cmd, args = ctx.command.resolve_command(ctx, args)
+        ctx = cmd.make_context(name, args, parent=ctx)
+    return ctx
+
+
+def _resolve_path(root, tokens, request):
+    """Resolve the command path one group at a time, as Click does."""
+    ctx = click.Context(root, info_name=root.name, obj=request)
+    while tokens and isinstance(ctx.command, click.MultiCommand):
+        name, cmd, tokens = ctx.command.resolve_command(ctx, tokens)
+        ctx = click.Context(cmd, info_name=name, parent=ctx)
+    return ctx
+
+
+flat_leaf_ctx = _leaf_context(flat, FLAT_ARGS, flat_request)
+wide_leaf_ctx = _leaf_context(wide, WIDE_TEXT.split(), wide_request)
+flat_root_ctx = click.Context(flat, info_name=flat.name, obj=flat_request)
+flat_leaf = flat_leaf_ctx.command
+
+
+@flat.on(flat_leaf)
+async def on_flat_leaf(request):
+    return None
+
+
+@flat.on("/flat.picker.*")
+async def on_flat_pattern(request):
+    return None
+
+
+# -----------------------------------------------------------------------------
+# Tokenizing
+# -----------------------------------------------------------------------------
+
+suite.add("tokenize.shell", lambda: shell_tokenize(FLAT_TEXT))
+suite.add("tokenize.shell_unquoted", lambda: shell_tokenize(DEEP_TEXT))
+suite.add("tokenize.whitespace", lambda: whitespace_tokenize(FLAT_TEXT))
+
+# -----------------------------------------------------------------------------
+# Context creation and argument parsing
+# -----------------------------------------------------------------------------
+
+suite.add(
+    "make_context.flat_root",
+    lambda: flat.make_context(flat.name, list(FLAT_ARGS), obj=flat_request),
+)
+suite.add(
+    "make_context.wide_leaf",
+    lambda: wide_leaf_ctx.command.make_context(
+        "cmd", WIDE_TEXT.split()[1:], parent=wide_leaf_ctx.parent
+    ),
+)
+
+# -----------------------------------------------------------------------------
+# Nested group resolution
+# -----------------------------------------------------------------------------
+
+suite.add(
+    "resolve.deep", lambda: _resolve_path(deep, ["g4", "g4", "cmd4"], deep_request)
+)
+suite.add(
+    "resolve.deep_indexed",
+    lambda: _resolve_path(deep_indexed, ["g4", "g4", "cmd4"], deep_request),
+)
+
+# -----------------------------------------------------------------------------
+# Callback invocation
+# -----------------------------------------------------------------------------
+
+
+@suite.benchmark("invoke.flat_leaf")
+async def invoke_flat_leaf():
+    await flat_leaf_ctx.invoke(flat_leaf.callback, **flat_leaf_ctx.params)
+
+
+# -----------------------------------------------------------------------------
+# Help and usage error rendering
+# -----------------------------------------------------------------------------
+
+suite.add("help.click_render", lambda: flat_root_ctx.get_help())
+suite.add("help.payload", lambda: flat.slack_help_payload(flat_root_ctx))
+suite.add(
+    "usage_error.format",
+    lambda: flat.slack_format_usage_help(
+        flat_request.body, flat_root_ctx, errmsg="no such option: --bogus"
+    ),
+)
+suite.add(
+    "usage_error.suggest_command",
+    lambda: flat.slack_suggest(flat_root_ctx, "commands", "cdm17"),
+)
+suite.add(
+    "usage_error.suggest_option",
+    lambda: flat_leaf.slack_suggest(flat_leaf_ctx, "options", "--otp1"),
+)
+
+# -----------------------------------------------------------------------------
+# Interactive event routing
+# -----------------------------------------------------------------------------
+
+
+@suite.benchmark("emit.exact")
+async def emit_exact():
+    await flat.emit(flat_request, flat_leaf.event_id)
+
+
+@suite.benchmark("emit.pattern")
+async def emit_pattern():
+    await flat.emit(flat_request, "/flat.picker.color")
+
+
+# -----------------------------------------------------------------------------
+# The complete SlackClickHelper.main pipeline
+# -----------------------------------------------------------------------------
+
+
+def _main_benchmark(root, text):
+    request = make_request(root.name, text, say=say)
+
+    async def run_main():
+        await root(prog_name=root.name, obj=request, join_tasks=True)
+
+    return run_main
+
+
+suite.add("main.flat", _main_benchmark(flat, FLAT_TEXT))
+suite.add("main.deep", _main_benchmark(deep, DEEP_TEXT))
+suite.add("main.deep_indexed", _main_benchmark(deep_indexed, DEEP_TEXT))
+suite.add("main.wide", _main_benchmark(wide, WIDE_TEXT))
+suite.add("main.unknown_command", _main_benchmark(flat, "cdm7 --opt0 a"))
+suite.add("main.help", _main_benchmark(flat, "cmd7 --help"))
+suite.add("main.usage_error", _main_benchmark(flat, "cmd7 --bogus"))
+
+# a profiler that samples 1% of the invocations, and profiles those that run
+# longer than a second; the cost of the others is what is measured.
+profiled = build_flat_tree()
+profiled.profiler = Profiler(sample_rate=0.01, threshold=1.0)
+suite.add("main.flat_profiled", _main_benchmark(profiled, FLAT_TEXT))
+
+
+if __name__ == "__main__":
+    sys.exit(cli_main(suite))
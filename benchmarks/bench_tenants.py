@@ -0,0 +1,166 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+The startup time and memory of serving N tenants with a command tree built
+for each tenant, and with one shared tree and a TenantOverlay per tenant; and
+the latency of an invocation with and without an overlay:
+
+    python -m benchmarks.bench_tenants --tenants 1 10 100 500
+
+Each tenant overlay is distinct (worst case): it hides one group and sets the
+defaults of one command.  Each startup is measured in a new process, so that
+the garbage collector state left by one does not affect the next.
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import List
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import asyncio
+import gc
+import json
+import multiprocessing
+import statistics
+import sys
+import time
+import tracemalloc
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from slack_click.tenants import TenantOverlay, TenantOverlays
+from .fakes import StubSay, build_deep_tree, make_request
+from .runner import run_metadata
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+TEXT = "g1 g2 cmd3 --opt0 a"
+
+
+def tenant_overlay(idx: int) -> TenantOverlay:
+    return TenantOverlay(
+        hidden=[f"g{idx % 5}"],
+        default_map={"g1": {"g2": {"cmd3": {"opt1": f"tenant{idx}"}}}},
+        help={"g1": f"Group 1 of tenant {idx}."},
+    )
+
+
+def build_per_tenant(n_tenants: int):
+    return {f"T{idx:04d}": build_deep_tree() for idx in range(n_tenants)}
+
+
+def build_overlays(n_tenants: int):
+    tree = build_deep_tree()
+    tree.tenants = TenantOverlays(
+        {f"T{idx:04d}": tenant_overlay(idx) for idx in range(n_tenants)}
+    )
+    return tree
+
+
+BUILDERS = dict(per_tree=build_per_tenant, overlay=build_overlays)
+
+
+def measure(builder: str, n_tenants: int) -> dict:
+    """Returns the milliseconds and the KiB allocated to build the tenants."""
+    build = BUILDERS[builder]
+    gc.collect()
+    start = time.perf_counter()
+    built = build(n_tenants)
+    seconds = time.perf_counter() - start
+    del built
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    built = build(n_tenants)  # noqa: F841
+    gc.collect()
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    return dict(startup_ms=seconds * 1e3, memory_kib=allocated / 1024)
+
+
+def measure_in_process(builder: str, n_tenants: int) -> dict:
+    mp_context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=mp_context) as executor:
+        return executor.submit(measure, builder, n_tenants).result()
+
+
+async def invocation_us(tree, team_id: str, n_runs: int) -> float:
+    """Returns the median microseconds of an invocation by the team."""
+    request = make_request(tree.name, TEXT, say=StubSay(), team_id=team_id)
+    timings = list()
+    for _ in range(n_runs):
+        start = time.perf_counter()
+        await tree(prog_name=tree.name, obj=request, join_tasks=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e6
+
+
+def cli_main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="slack-click tenant overlay benchmark")
+    parser.add_argument("--tenants", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--json", dest="output", help="write the results to this file")
+    opts = parser.parse_args(argv)
+
+    results = dict()
+    print(
+        f"{'tenants':>8} {'per-tree ms':>12} {'per-tree KiB':>13}"
+        f" {'overlay ms':>11} {'overlay KiB':>12}"
+    )
+    for n_tenants in opts.tenants:
+        per_tree = measure_in_process("per_tree", n_tenants)
+        overlay = measure_in_process("overlay", n_tenants)
+        results[n_tenants] = dict(per_tree=per_tree, overlay=overlay)
+        print(
+            f"{n_tenants:8d} {per_tree['startup_ms']:12.1f}"
+            f" {per_tree['memory_kib']:13.0f} {overlay['startup_ms']:11.1f}"
+            f" {overlay['memory_kib']:12.0f}"
+        )
+
+    tree = build_overlays(max(opts.tenants))
+    base_us = asyncio.run(invocation_us(tree, "TNONE", opts.runs))
+    overlay_us = asyncio.run(invocation_us(tree, "T0000", opts.runs))
+    print(
+        f"\ninvocation: {base_us:.1f} us without an overlay,"
+        f" {overlay_us:.1f} us with an overlay"
+    )
+
+    if opts.output:
+        with open(opts.output, "w") as ofile:
+            json.dump(
+                dict(
+                    meta=run_metadata("tenants"),
+                    results=results,
+                    invocation_us=dict(base=base_us, overlay=overlay_us),
+                ),
+                ofile,
+                indent=2,
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli_main())
@@ -0,0 +1,149 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+The throughput of a CPU-bound command tree run in-process, and in a WorkerPool
+of 1, 2, 4, ... worker processes:
+
+    python -m benchmarks.bench_workers --workers 1 2 4 8 --requests 2000
+
+The throughput can only scale up to the number of CPU cores available; the
+core count is reported with the results.
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import List
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+# -----------------------------------------------------------------------------
+# Public Imports
+# -----------------------------------------------------------------------------
+
+import click
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from slack_click.workers import WorkerPool
+from .fakes import _root, make_request, StubSay
+from .runner import run_metadata
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+# the tree run by the workers; each invocation parses the options and burns
+# about a millisecond of CPU.
+
+cpu_tree = _root("/cpu")
+
+
+@cpu_tree.command("crunch")
+@click.option("--work", type=int, default=20000)
+@click.option("--label", default="x")
+@click.pass_obj
+async def crunch(request, work: int, label: str):
+    total = sum(idx * idx for idx in range(work))
+    await request.context["say"](f"{label} {total}")
+
+
+TARGET = "benchmarks.bench_workers:cpu_tree"
+
+
+async def _drive(submit, n_requests: int, concurrency: int, say: StubSay) -> float:
+    """Returns the seconds taken to run n_requests, at most concurrency at once."""
+    pending = iter(range(n_requests))
+
+    async def client():
+        for seq in pending:
+            await submit(
+                make_request(
+                    "/cpu", f"crunch --label r{seq}", say=say, team_id=f"T{seq % 64}"
+                )
+            )
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - start
+
+
+async def run_in_process(n_requests: int, concurrency: int) -> float:
+    say = StubSay()
+
+    async def submit(request):
+        await cpu_tree(prog_name=cpu_tree.name, obj=request)
+
+    return await _drive(submit, n_requests, concurrency, say)
+
+
+async def run_pool(n_workers: int, n_requests: int, concurrency: int) -> float:
+    say = StubSay()
+    pool = WorkerPool(TARGET, workers=n_workers, sticky="team")
+    await pool.start()
+    try:
+        # warm up: each worker imports the tree on its first request.
+        await _drive(pool.submit, n_workers * 8, concurrency, say)
+        return await _drive(pool.submit, n_requests, concurrency, say)
+    finally:
+        await pool.close()
+
+
+def cli_main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="slack-click WorkerPool benchmark")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--json", dest="output", help="write the results to this file")
+    opts = parser.parse_args(argv)
+
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else None
+    results = dict()
+
+    seconds = asyncio.run(run_in_process(opts.requests, opts.concurrency))
+    results["in_process"] = opts.requests / seconds
+
+    for n_workers in opts.workers:
+        seconds = asyncio.run(run_pool(n_workers, opts.requests, opts.concurrency))
+        results[f"workers_{n_workers}"] = opts.requests / seconds
+
+    base = results["in_process"]
+    print(f"CPU cores available: {cores or os.cpu_count()}")
+    print(f"{'runner':16} {'req/s':>10} {'speedup':>8}")
+    for name, rate in results.items():
+        print(f"{name:16} {rate:10.1f} {rate / base:8.2f}")
+
+    if opts.output:
+        with open(opts.output, "w") as ofile:
+            json.dump(
+                dict(meta=run_metadata("workers"), cores=cores, results=results),
+                ofile,
+                indent=2,
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli_main())
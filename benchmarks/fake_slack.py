@@ -0,0 +1,151 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+A local stand-in for the Slack Web API and the response URLs, used by the
+replay load generator so that nothing is sent to Slack.  Every Web API method
+succeeds; the responses carry just enough for Slack-Bolt and slack-click, for
+example the `ts` of a posted message.
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from collections import Counter
+from itertools import count
+import asyncio
+
+# -----------------------------------------------------------------------------
+# Public Imports
+# -----------------------------------------------------------------------------
+
+from aiohttp import web
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["FakeSlack"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+_AUTH_TEST = dict(
+    url="https://replay.slack.invalid/",
+    team="replay",
+    team_id="T0001",
+    user="clicker",
+    user_id="U0BOT",
+    bot_id="B0BOT",
+    is_enterprise_install=False,
+)
+
+
+class FakeSlack(object):
+    """
+    A fake Slack server on the loopback interface.
+
+    Parameters
+    ----------
+    latency: float
+        The number of seconds each call waits before responding, to stand in
+        for the round trip to Slack.
+
+    host, port:
+        The address served; port 0 picks a free port.
+    """
+
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.host = host
+        self.port = port
+        self.calls = Counter()
+        self._ts = count(1)
+        self._runner = None
+
+        self.app = web.Application()
+        self.app.router.add_post("/api/{method}", self._api)
+        self.app.router.add_post("/response/{tail:.*}", self._response)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def api_url(self) -> str:
+        """The base_url for a slack_sdk AsyncWebClient."""
+        return f"{self.base_url}/api/"
+
+    def response_url(self, path: str = "") -> str:
+        return f"{self.base_url}/response/{path}"
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    # -------------------------------------------------------------------------
+    #                                 PRIVATE
+    # -------------------------------------------------------------------------
+
+    async def _delay(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def _api(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        await self._delay()
+
+        if method == "auth.test":
+            return web.json_response(dict(ok=True, **_AUTH_TEST))
+
+        params = await _params(request)
+        return web.json_response(
+            dict(
+                ok=True,
+                channel=params.get("channel", "C0001"),
+                ts=params.get("ts") or f"1600000000.{next(self._ts):06d}",
+            )
+        )
+
+    async def _response(self, request: web.Request) -> web.Response:
+        self.calls["response_url"] += 1
+        await self._delay()
+        return web.Response(text="ok")
+
+
+async def _params(request: web.Request) -> dict:
+    if request.content_type == "application/json":
+        return await request.json()
+    return dict(await request.post())
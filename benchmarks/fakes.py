@@ -0,0 +1,158 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Fake Slack requests and sample command trees used by the benchmarks.  Nothing
+here talks to Slack.
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+import logging
+from itertools import count
+
+# -----------------------------------------------------------------------------
+# Public Imports
+# -----------------------------------------------------------------------------
+
+import click
+from slack_bolt.request.async_request import AsyncBoltRequest as Request
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from slack_click.async_click import AsyncSlackClickGroup, click_async, version_option
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = [
+    "StubSay",
+    "make_request",
+    "build_flat_tree",
+    "build_deep_tree",
+    "build_wide_options_tree",
+]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+_log = logging.getLogger("slack_click.benchmarks")
+_trigger_ids = count()
+
+
+class StubSay(object):
+    """An async `say` that records the number of messages sent."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, *vargs, **kwargs):
+        self.calls += 1
+
+
+def make_request(
+    command: str,
+    text: str,
+    say=None,
+    user_id="U0001",
+    channel_id="C0001",
+    team_id="T0001",
+) -> Request:
+    """Returns a Slack-Bolt request for a slash-command, as Socket Mode would."""
+    body = dict(
+        command=command,
+        text=text,
+        user_id=user_id,
+        channel_id=channel_id,
+        team_id=team_id,
+        trigger_id=f"trigger.{next(_trigger_ids)}",
+        response_url="https://hooks.slack.invalid/commands/T0001/1/abc",
+    )
+    request = Request(body=body, mode="socket_mode")
+    request.context["say"] = say or StubSay()
+    request.context["logger"] = _log
+    return request
+
+
+def _root(name: str) -> AsyncSlackClickGroup:
+    @click.group(name=name, cls=AsyncSlackClickGroup)
+    @version_option(version="0.1.0")
+    @click.pass_obj
+    @click_async
+    async def root(request: Request):
+        await request.context["say"]("root")
+
+    return root
+
+
+def _add_leaf(group: AsyncSlackClickGroup, name: str, n_options: int = 2):
+    @click.pass_obj
+    async def callback(request: Request, **params):
+        await request.context["say"](f"done {len(params)}")
+
+    for opt in range(n_options):
+        callback = click.option(f"--opt{opt}", default="x", help=f"option {opt}")(
+            callback
+        )
+
+    return group.command(name, help=f"The {name} command.")(callback)
+
+
+def build_flat_tree(n_commands: int = 50) -> AsyncSlackClickGroup:
+    """A group with `n_commands` leaf commands, each with two options."""
+    root = _root("/flat")
+    for idx in range(n_commands):
+        _add_leaf(root, f"cmd{idx}")
+    return root
+
+
+def build_deep_tree(depth: int = 3, fanout: int = 5) -> AsyncSlackClickGroup:
+    """
+    A tree of groups `depth` levels deep, each group having `fanout` children;
+    the defaults produce 125 leaf commands.  The leaf for the path
+    g0 g0 cmd0 is the first leaf.
+    """
+    root = _root("/deep")
+
+    def populate(group, level):
+        for idx in range(fanout):
+            if level == depth - 1:
+                _add_leaf(group, f"cmd{idx}")
+                continue
+
+            @group.group(f"g{idx}", help=f"Group {idx} at level {level}.")
+            @click.pass_obj
+            async def sub(request):
+                await request.context["say"]("group")
+
+            populate(sub, level + 1)
+
+    populate(root, 0)
+    return root
+
+
+def build_wide_options_tree(n_options: int = 60) -> AsyncSlackClickGroup:
+    """A group with one command that has `n_options` options."""
+    root = _root("/wide")
+    _add_leaf(root, "cmd", n_options=n_options)
+    return root
@@ -0,0 +1,360 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+An offline end-to-end load generator.  Recorded Slack payloads are replayed
+through a Slack-Bolt app wired to slack-click, with every Web API call and
+response URL sent to a local fake Slack server:
+
+    python -m benchmarks.replay benchmarks/payloads/clicker.jsonl \\
+        --requests 5000 --concurrency 50 --rate 400 --api-latency 0.02
+
+The payload file has one JSON payload per line: a slash-command or an
+interactive payload as delivered by Socket Mode, or the Socket Mode envelope
+of one.  The report gives the throughput, and the latency percentiles and the
+error rate of each command event_id.
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Dict, Iterable, List, Optional
+from collections import defaultdict
+import argparse
+import asyncio
+import copy
+import importlib
+import json
+import logging
+import shlex
+import sys
+
+# -----------------------------------------------------------------------------
+# Public Imports
+# -----------------------------------------------------------------------------
+
+import click
+from slack_bolt.request.async_request import AsyncBoltRequest
+from slack_sdk.web.async_client import AsyncWebClient
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from slack_click.router import payload_event_ids
+from slack_click.transport import SlackTransport
+from .fake_slack import FakeSlack
+from .runner import run_metadata
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["ReplayStats", "load_payloads", "payload_event_id", "replay", "cli_main"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+
+class ReplayStats(object):
+    """The latencies and errors of the replayed requests, by event_id."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.elapsed = 0.0
+
+    def add(self, event_id: str, seconds: float, ok: bool):
+        self.latencies[event_id].append(seconds)
+        if not ok:
+            self.errors[event_id] += 1
+
+    def report(self) -> dict:
+        events = dict()
+        for event_id, latencies in sorted(self.latencies.items()):
+            latencies = sorted(latencies)
+            events[event_id] = dict(
+                requests=len(latencies),
+                errors=self.errors[event_id],
+                error_rate=self.errors[event_id] / len(latencies),
+                p50_ms=_percentile(latencies, 50) * 1e3,
+                p95_ms=_percentile(latencies, 95) * 1e3,
+                p99_ms=_percentile(latencies, 99) * 1e3,
+            )
+
+        n_requests = sum(map(len, self.latencies.values()))
+        n_errors = sum(self.errors.values())
+        return dict(
+            requests=n_requests,
+            errors=n_errors,
+            error_rate=n_errors / n_requests if n_requests else 0.0,
+            seconds=self.elapsed,
+            throughput=n_requests / self.elapsed if self.elapsed else 0.0,
+            events=events,
+        )
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    """The nearest-rank percentile of the sorted values."""
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def load_payloads(path: str) -> List[dict]:
+    """Returns the payloads of a JSONL file; Socket Mode envelopes are opened."""
+    payloads = list()
+    with open(path) as ifile:
+        for line in ifile:
+            if not (line := line.strip()) or line.startswith("#"):
+                continue
+            payload = json.loads(line)
+            payloads.append(payload.get("payload", payload))
+    return payloads
+
+
+def payload_event_id(roots: Dict[str, click.Command], body: dict) -> str:
+    """
+    Returns the event_id the payload is reported under: for a slash-command,
+    the event_id of the command the text resolves to; for an interactive
+    payload, its type and first event ID, for example
+    "block_actions:/click.hello".
+    """
+    if "command" not in body:
+        events = payload_event_ids(body)
+        kind = body.get("type", "unknown")
+        return f"{kind}:{events[0]}" if events else kind
+
+    if (cmd := roots.get(body["command"])) is None:
+        return body["command"]
+
+    ctx = click.Context(cmd, info_name=cmd.name)
+    tokens = shlex.split(body.get("text") or "")
+    while isinstance(cmd, click.MultiCommand) and tokens:
+        if tokens[0].startswith("-"):
+            break
+        try:
+            _, cmd, tokens = cmd.resolve_command(ctx, tokens)
+        except click.UsageError:
+            break
+        ctx = click.Context(cmd, info_name=cmd.name, parent=ctx)
+
+    return getattr(cmd, "event_id", None) or cmd.name
+
+
+def _prepare(payload: dict, seq: int, fake: FakeSlack) -> dict:
+    """
+    Returns a copy of the payload to send: the trigger_id is made unique, so
+    that a payload replayed more than once is not discarded as a duplicate;
+    the response_url is sent to the fake Slack server.
+    """
+    body = copy.deepcopy(payload)
+    if trigger_id := body.get("trigger_id"):
+        body["trigger_id"] = f"{trigger_id}.{seq}"
+    if "response_url" in body:
+        body["response_url"] = fake.response_url(f"{seq}")
+    return body
+
+
+async def replay(
+    app,
+    roots: Iterable[click.Command],
+    payloads: List[dict],
+    fake: FakeSlack,
+    requests: int,
+    concurrency: int = 10,
+    rate: Optional[float] = None,
+) -> ReplayStats:
+    """
+    Replay the payloads, in turn, until `requests` have been sent.
+
+    Parameters
+    ----------
+    app:
+        The Slack-Bolt AsyncApp.
+
+    roots:
+        The root commands of the app; used to name the command event_ids.
+
+    payloads:
+        The payloads to replay.
+
+    fake:
+        The (started) fake Slack server.
+
+    requests:
+        The number of requests to send.
+
+    concurrency:
+        The maximum number of requests in progress.
+
+    rate:
+        The arrival rate, in requests per second.  The latency of a request
+        is measured from its scheduled arrival, so that the time waiting for
+        a free slot is included.  When not given, each of `concurrency`
+        workers sends its next request as soon as the last one completes.
+    """
+    loop = asyncio.get_running_loop()
+    roots = {cmd.name: cmd for cmd in roots}
+    event_ids = [payload_event_id(roots, payload) for payload in payloads]
+    stats = ReplayStats()
+    slots = asyncio.Semaphore(concurrency)
+
+    async def send(seq: int, arrival: float):
+        idx = seq % len(payloads)
+        body = _prepare(payloads[idx], seq, fake)
+        async with slots:
+            if rate is None:
+                arrival = loop.time()
+            try:
+                response = await app.async_dispatch(
+                    AsyncBoltRequest(body=body, mode="socket_mode")
+                )
+                ok = response.status < 400
+            except Exception:  # noqa
+                ok = False
+        stats.add(event_ids[idx], loop.time() - arrival, ok)
+
+    start = loop.time()
+
+    if rate is None:
+        pending = iter(range(requests))
+
+        async def worker():
+            for seq in pending:
+                await send(seq, start)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    else:
+        tasks = list()
+        for seq in range(requests):
+            arrival = start + seq / rate
+            if (wait := arrival - loop.time()) > 0:
+                await asyncio.sleep(wait)
+            tasks.append(asyncio.create_task(send(seq, arrival)))
+        await asyncio.gather(*tasks)
+
+    stats.elapsed = loop.time() - start
+    return stats
+
+
+def print_report(report: dict, calls: dict):
+    print(
+        f"{'event_id':40} {'requests':>9} {'errors':>7} {'err %':>6}"
+        f" {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    )
+    for event_id, event in report["events"].items():
+        print(
+            f"{event_id:40} {event['requests']:9d} {event['errors']:7d}"
+            f" {event['error_rate'] * 100:6.2f} {event['p50_ms']:9.2f}"
+            f" {event['p95_ms']:9.2f} {event['p99_ms']:9.2f}"
+        )
+
+    print(
+        f"\n{report['requests']} requests in {report['seconds']:.2f}s:"
+        f" {report['throughput']:.1f} req/s,"
+        f" {report['error_rate'] * 100:.2f}% errors"
+    )
+    print(
+        "fake Slack calls: " + ", ".join(f"{k}={v}" for k, v in sorted(calls.items()))
+    )
+
+
+async def _main(opts) -> dict:
+    app_module = importlib.import_module(opts.app)
+    payloads = load_payloads(opts.payloads)
+
+    async with FakeSlack(latency=opts.api_latency) as fake:
+        client = AsyncWebClient(token="xoxb-replay", base_url=fake.api_url)
+        app = app_module.build_app(client)
+
+        # send the slack-click messages with a pooled transport, rather than
+        # the Slack-Bolt clients.
+        transport = None
+        if opts.transport:
+            transport = SlackTransport(token="xoxb-replay", base_url=fake.api_url)
+            for root in app_module.app_roots:
+                root.transport = transport
+
+        try:
+            stats = await replay(
+                app,
+                app_module.app_roots,
+                payloads,
+                fake,
+                requests=opts.requests,
+                concurrency=opts.concurrency,
+                rate=opts.rate,
+            )
+        finally:
+            if transport is not None:
+                await transport.close()
+
+        results = dict(
+            meta=run_metadata("replay"), results=stats.report(), calls=fake.calls
+        )
+        if transport is not None:
+            results["transport"] = transport.stats()
+        return results
+
+
+def cli_main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="slack-click replay load generator")
+    parser.add_argument("payloads", help="JSONL file of recorded payloads")
+    parser.add_argument(
+        "--app",
+        default="benchmarks.replay_app",
+        help="module providing build_app(client) and app_roots",
+    )
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument(
+        "--rate", type=float, help="requests per second; default as fast as possible"
+    )
+    parser.add_argument(
+        "--api-latency",
+        type=float,
+        default=0.0,
+        help="seconds each fake Slack call takes",
+    )
+    parser.add_argument(
+        "--transport",
+        action="store_true",
+        help="send the slack-click messages with a pooled SlackTransport",
+    )
+    parser.add_argument("--json", dest="output", help="write the results to this file")
+    opts = parser.parse_args(argv)
+
+    # the apps log each unhandled request, and each error, at length.
+    logging.basicConfig(level=logging.CRITICAL)
+
+    results = asyncio.run(_main(opts))
+    print_report(results["results"], results["calls"])
+    if transport := results.get("transport"):
+        print("transport: " + ", ".join(f"{k}={v}" for k, v in transport.items()))
+
+    if opts.output:
+        with open(opts.output, "w") as ofile:
+            json.dump(results, ofile, indent=2)
+
+    return 1 if results["results"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli_main())
@@ -0,0 +1,88 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+The Slack-Bolt app replayed by default: the commands of the example/clicker
+app, imported from example.clicker.commands and registered with Slack-Bolt in
+the same way, without the FastAPI and Socket Mode startup.  To replay your own app, write a module like this one:
+a `build_app` function that registers your commands on the App it creates,
+and the list of the root commands, `app_roots`.
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+import re
+
+# -----------------------------------------------------------------------------
+# Public Imports
+# -----------------------------------------------------------------------------
+
+from slack_bolt.async_app import AsyncApp
+from slack_bolt.request.async_request import AsyncBoltRequest as Request
+from slack_sdk.web.async_client import AsyncWebClient
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from example.clicker.commands import cli_click_group, cli_ping_command
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["build_app", "app_roots"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+
+app_roots = [cli_click_group, cli_ping_command]
+
+
+def build_app(client: AsyncWebClient) -> AsyncApp:
+    """
+    Returns the App to replay.  The `client` sends the Web API calls to the
+    fake Slack server; the App must run listeners before it acknowledges a
+    request, so that the latency of a request includes the command.
+    """
+    app = AsyncApp(
+        client=client,
+        process_before_response=True,
+        request_verification_enabled=False,
+    )
+
+    @app.command(cli_click_group.name)
+    async def on_clicker(request: Request, ack, say):
+        await ack()
+        await say("Got it.")
+        return await cli_click_group(prog_name=cli_click_group.name, obj=request)
+
+    @app.command(cli_ping_command.name)
+    async def on_ping(request: Request, ack):
+        await ack()
+        return await cli_ping_command(prog_name=cli_ping_command.name, obj=request)
+
+    @app.action(re.compile("/click.*"))
+    async def on_action(request: Request, ack):
+        await ack()
+        await cli_click_group.dispatch_many(request)
+
+    return app
@@ -0,0 +1,235 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+A minimal timing harness shared by the benchmark modules.  Each benchmark is
+timed in batches; the per-operation median of the batches is the figure that
+is compared across runs.
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Callable, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["BenchmarkSuite", "compare", "cli_main"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+
+class BenchmarkSuite(object):
+    """
+    A named collection of benchmarks.  A benchmark is a function taking no
+    arguments; a coroutine function is awaited on a single event loop.
+
+    Parameters
+    ----------
+    name: str
+        The suite name, recorded in the results.
+
+    batches: int
+        The number of timed batches for each benchmark.
+
+    min_batch_time: float
+        The minimum duration of a batch, in seconds; the number of operations
+        per batch is calibrated to meet it.
+    """
+
+    def __init__(self, name: str, batches: int = 7, min_batch_time: float = 0.05):
+        self.name = name
+        self.batches = batches
+        self.min_batch_time = min_batch_time
+        self._benchmarks: Dict[str, Callable] = dict()
+        self.results: Dict[str, dict] = dict()
+
+    def add(self, name: str, func: Callable):
+        self._benchmarks[name] = func
+
+    def benchmark(self, name: str):
+        """Decorator form of `add`."""
+
+        def decorator(func):
+            self.add(name, func)
+            return func
+
+        return decorator
+
+    def run(self, only: Optional[List[str]] = None) -> dict:
+        """Run the benchmarks whose name contains any of `only`, or all of them."""
+        return asyncio.run(self._run(only))
+
+    async def _run(self, only):
+        for name, func in self._benchmarks.items():
+            if only and not any(pattern in name for pattern in only):
+                continue
+            self.results[name] = await self._time(func)
+
+        return self.report()
+
+    async def _time(self, func) -> dict:
+        is_async = asyncio.iscoroutinefunction(func)
+        clock = time.perf_counter
+
+        async def batch(n_ops: int) -> float:
+            start = clock()
+            if is_async:
+                for _ in range(n_ops):
+                    await func()
+            else:
+                for _ in range(n_ops):
+                    func()
+            return clock() - start
+
+        # calibrate the batch size, which also serves as the warm-up.
+
+        n_ops = 1
+        while (elapsed := await batch(n_ops)) < self.min_batch_time:
+            n_ops *= 2 if elapsed * 10 < self.min_batch_time else 1.5
+            n_ops = int(n_ops) + 1
+
+        per_op = [await batch(n_ops) / n_ops for _ in range(self.batches)]
+
+        return dict(
+            median_us=statistics.median(per_op) * 1e6,
+            min_us=min(per_op) * 1e6,
+            stdev_us=statistics.pstdev(per_op) * 1e6,
+            ops_per_batch=n_ops,
+        )
+
+    def report(self) -> dict:
+        return dict(meta=run_metadata(self.name), results=self.results)
+
+
+def run_metadata(suite: str) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=False,
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+
+    return dict(
+        suite=suite,
+        commit=commit,
+        python=platform.python_version(),
+        platform=platform.platform(),
+        timestamp=time.time(),
+    )
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """
+    Compare the results of two runs.
+
+    Returns
+    -------
+    list
+        The names of the benchmarks whose median is slower than the baseline
+        by more than `threshold`, a fraction, for example 0.10 for 10%.
+    """
+    regressions = list()
+    base_results = baseline.get("results", {})
+
+    for name, result in current["results"].items():
+        if (base := base_results.get(name)) is None:
+            continue
+        if result["median_us"] > base["median_us"] * (1 + threshold):
+            regressions.append(name)
+
+    return regressions
+
+
+def print_table(current: dict, baseline: dict = None):
+    base_results = (baseline or {}).get("results", {})
+    print(f"{'benchmark':48} {'median us':>12} {'min us':>12} {'change':>9}")
+
+    for name, result in current["results"].items():
+        change = ""
+        if base := base_results.get(name):
+            change = f"{(result['median_us'] / base['median_us'] - 1) * 100:+.1f}%"
+        print(
+            f"{name:48} {result['median_us']:12.2f} {result['min_us']:12.2f} {change:>9}"
+        )
+
+
+def cli_main(suite: BenchmarkSuite, argv: List[str] = None) -> int:
+    """
+    The command line entry point used by each benchmark module.
+
+    Returns
+    -------
+    int
+        The process exit code; 1 when a regression is detected.
+    """
+    parser = argparse.ArgumentParser(description=f"slack-click {suite.name} benchmarks")
+    parser.add_argument(
+        "-k", dest="only", action="append", help="run benchmarks matching"
+    )
+    parser.add_argument("--json", dest="output", help="write the results to this file")
+    parser.add_argument(
+        "--baseline", help="results file from a previous run to compare"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="fail when a median is slower than the baseline by this fraction",
+    )
+    opts = parser.parse_args(argv)
+
+    results = suite.run(opts.only)
+    baseline = None
+
+    if opts.baseline:
+        with open(opts.baseline) as ifile:
+            baseline = json.load(ifile)
+
+    print_table(results, baseline)
+
+    if opts.output:
+        with open(opts.output, "w") as ofile:
+            json.dump(results, ofile, indent=2)
+
+    if baseline and (regressions := compare(results, baseline, opts.threshold)):
+        print(f"\nREGRESSION (> {opts.threshold:.0%}): {', '.join(regressions)}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(
+        "run one of the benchmark modules, for example: python -m benchmarks.bench_pipeline"
+    )
@@ -0,0 +1,164 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+A memory soak of the slash-command pipeline.  Thousands of invocations, of
+commands, nested groups, help, and usage errors, are run while handlers leave
+behind long-lived background tasks; the memory retained once they are done is
+measured with tracemalloc.  The soak exits with status 1 when the retained
+memory grows by more than the limit, or when any Click context outlives its
+invocation.
+
+    python -m benchmarks.soak_memory --invocations 5000 --limit-kib 64
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+import argparse
+import asyncio
+import gc
+import sys
+import tracemalloc
+import weakref
+
+# -----------------------------------------------------------------------------
+# Public Imports
+# -----------------------------------------------------------------------------
+
+import click
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from .fakes import StubSay, make_request, build_deep_tree
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+TEXTS = (
+    "g1 g2 cmd3 --opt0 a",
+    "g0 g0 cmd0",
+    "g4 --help",
+    "g1 g2 cmd3 --bogus",
+    "--version",
+)
+
+say = StubSay()
+root = build_deep_tree()
+
+# the background tasks left behind by the handlers, and weak references to the
+# contexts of the invocations that created them.
+
+background = list()
+contexts = weakref.WeakSet()
+
+
+@root.command("spawn")
+@click.pass_context
+async def spawn(ctx):
+    # a handler that starts a task that outlives the invocation; the task
+    # copies the contextvars context of the invocation.
+    contexts.add(ctx)
+    if len(background) < 10:
+        background.append(asyncio.create_task(asyncio.sleep(3600)))
+    await ctx.obj.context["say"]("spawned")
+
+
+async def run_batch(n_invocations: int):
+    for idx in range(n_invocations):
+        text = "spawn" if idx % 3 == 0 else TEXTS[idx % len(TEXTS)]
+        request = make_request(root.name, text, say=say)
+        await root(prog_name=root.name, obj=request, join_tasks=True)
+
+
+def live_contexts() -> int:
+    return sum(1 for obj in gc.get_objects() if isinstance(obj, click.Context))
+
+
+async def measure(n_invocations: int, n_warmup: int = 500) -> dict:
+    """
+    Run the soak, and return the memory retained by the invocations, and the
+    number of contexts still alive while the background tasks they started
+    are running.
+    """
+    # warm up, so that caches and lazily created objects are not counted.
+    await run_batch(max(n_warmup, n_invocations // 10))
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+
+    await run_batch(n_invocations)
+
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, "lineno")
+    result = dict(
+        growth=sum(stat.size_diff for stat in stats),
+        handler_contexts=len(contexts),
+        click_contexts=live_contexts(),
+        background=len(background),
+        top=stats[:5],
+    )
+
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    background.clear()
+
+    return result
+
+
+async def soak(n_invocations: int, limit_kib: float) -> int:
+    result = await measure(n_invocations)
+    growth = result["growth"]
+
+    print(f"invocations:         {n_invocations}")
+    print(f"retained growth:     {growth / 1024:.1f} KiB (limit {limit_kib} KiB)")
+    print(f"handler contexts:    {result['handler_contexts']} alive")
+    print(f"click contexts:      {result['click_contexts']} alive")
+    print(f"background tasks:    {result['background']}")
+    print("top allocations:")
+    for stat in result["top"]:
+        print(f"  {stat}")
+
+    if (
+        growth > limit_kib * 1024
+        or result["handler_contexts"]
+        or result["click_contexts"]
+    ):
+        print("\nLEAK DETECTED")
+        return 1
+
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="slack-click memory soak")
+    parser.add_argument("--invocations", type=int, default=5000)
+    parser.add_argument("--limit-kib", type=float, default=64.0)
+    opts = parser.parse_args(argv)
+    return asyncio.run(soak(opts.invocations, opts.limit_kib))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
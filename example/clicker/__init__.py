@@ -1 +1,11 @@
-from .main import api
+# The FastAPI app is loaded on first access, so that the Click commands in
+# clicker.commands can be imported without starting the Slack-Bolt app.
+
+
+def __getattr__(name):
+    if name == "api":
+        from .main import api
+
+        return api
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,115 @@
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from random import randrange
+
+# -----------------------------------------------------------------------------
+# Public Imports
+# -----------------------------------------------------------------------------
+
+import click
+from slack_bolt.request.async_request import AsyncBoltRequest as Request
+from slack_click.async_click import (
+    click_async,
+    version_option,
+    AsyncSlackClickCommand,
+    AsyncSlackClickGroup,
+)
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["cli_click_group", "cli_ping_command", "cli_fuzzy_command"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+# The Click commands of the Clicker app.  They are kept apart from the
+# Slack-Bolt app so that other apps, such as the benchmark replay app, can
+# register the same commands.
+
+# -----------------------------------------------------------------------------
+# Define a Click group handler for the Slack Slash-Command
+#
+# Notes:
+#   @click_async decorator must be used for asyncio mode
+#   @click.pass_obj inserts the click.Context obj into the callback parameters
+#       By default the obj is the Slack-Bolt request instance; see the
+#       @app.command code in command_click.py.
+# -----------------------------------------------------------------------------
+
+
+@click.group(name="/click", cls=AsyncSlackClickGroup)
+@version_option(version="0.1.0")
+@click.pass_obj
+@click_async
+async def cli_click_group(request: Request):
+    """
+    This is the Clicker /click command group
+    """
+    say = request.context["say"]
+    await say("`/click` command invoked without any commands or options.")
+
+
+# -----------------------------------------------------------------------------
+# Define Click group commands; at this point everything is the same as writing
+# any Click command decorator stack.
+# -----------------------------------------------------------------------------
+
+
+@cli_click_group.command("hello")
+@click.pass_obj
+async def click_hello_command(request: Request):
+    await request.context.say(f"Hi there <@{request.context.user_id}> :eyes:")
+
+
+@cli_click_group.command("goodbye")
+@click.option("--name", help="who dis?", required=True)
+@click.pass_obj
+async def click_goodby_command(request: Request, name: str):
+    await request.context.say(f"Good-bye {name} :wave:")
+
+
+@cli_click_group.on(click_hello_command)
+async def on_hello_button(request: Request):
+    await request.context.respond("Hello again :wave:")
+
+
+# -----------------------------------------------------------------------------
+# /ping command
+# -----------------------------------------------------------------------------
+
+
+@click.command(name="/ping", cls=AsyncSlackClickCommand)
+@click_async
+@click.pass_obj
+async def cli_ping_command(request: Request):
+    say = request.context["say"]
+    await say(f"Hiya <@{request.context.user_id}>.  Ping back at you :eyes:")
+
+
+# -----------------------------------------------------------------------------
+# /fuzzy command to manifest an anminal
+# -----------------------------------------------------------------------------
+
+
+animals = [":smile_cat:", ":hear_no_evil:", ":unicorn_face:"]
+
+
+@click.command(
+    name="/fuzzy", cls=AsyncSlackClickCommand, slack_request=lambda obj: obj["here"]
+)
+@click_async
+@click.pass_obj
+async def cli_fuzzy_command(obj: dict):
+    request = obj["here"]
+    say = request.context["say"]
+    this_animal = animals[randrange(len(animals))]
+
+    await say(f"Poof :magic_wand: {this_animal}")
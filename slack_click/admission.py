@@ -0,0 +1,293 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Dict, Tuple, Sequence, Optional, List, NamedTuple
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from .ratelimit import TokenBucket
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = [
+    "Limit",
+    "Rejection",
+    "Admission",
+    "AdmissionController",
+    "AdmissionRejected",
+    "g_admission",
+]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+# the Slack command payload field that identifies each scope; the "command"
+# scope is keyed by the invoked command event_id and "global" by nothing.
+SCOPE_FIELDS = {
+    "user": "user_id",
+    "channel": "channel_id",
+    "team": "team_id",
+    "command": None,
+    "global": None,
+}
+
+LimitKey = Tuple[str, str, str]
+
+
+class Limit(object):
+    """
+    A limit on running a command, declared using the `limits` parameter of a
+    command or group.  A limit declared on a group applies to all of the
+    commands below it.
+
+    Parameters
+    ----------
+    scope: str
+        What the limit is counted by: "user", "channel", "team", "command" (the
+        invoked command), or "global".
+
+    concurrency: int
+        The maximum number of invocations running at the same time.
+
+    rate: float
+        The maximum number of invocations permitted per `per` seconds.
+
+    per: float
+        The rate period, in seconds.
+
+    burst: float
+        The number of invocations permitted in a burst; defaults to `rate`,
+        and at least 1.
+
+    Raises
+    ------
+    ValueError
+        When the scope is not known, or the burst is less than 1; a burst of
+        less than one invocation would reject every invocation.
+    """
+
+    __slots__ = ("scope", "concurrency", "rate", "per", "burst")
+
+    def __init__(
+        self,
+        scope: str = "user",
+        concurrency: int = None,
+        rate: float = None,
+        per: float = 60.0,
+        burst: float = None,
+    ):
+        if scope not in SCOPE_FIELDS:
+            raise ValueError(f"Unknown limit scope '{scope}'")
+
+        if burst is None and rate is not None:
+            burst = max(1.0, rate)
+
+        if burst is not None and burst < 1:
+            raise ValueError(f"Limit burst must be at least 1, not {burst}")
+
+        self.scope = scope
+        self.concurrency = concurrency
+        self.rate = rate
+        self.per = per
+        self.burst = burst
+
+    def __repr__(self):
+        return (
+            f"Limit(scope={self.scope!r}, concurrency={self.concurrency}, "
+            f"rate={self.rate}, per={self.per}, burst={self.burst})"
+        )
+
+
+class Rejection(NamedTuple):
+    """
+    The limit that rejected an invocation; the limit is None when the
+    invocation was shed by the Scheduler.
+    """
+
+    limit: Optional[Limit]
+    key: LimitKey
+    retry_after: float
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a synchronous command or group callback is not run because a
+    limit was reached; such a callback runs while Click parses the command.
+    """
+
+    def __init__(self, rejection: Rejection):
+        super().__init__(rejection)
+        self.rejection = rejection
+
+
+class Admission(object):
+    """
+    A granted admission; release() must be called when the invocation is
+    done.
+    """
+
+    __slots__ = ("controller", "keys")
+
+    def __init__(self, controller: "AdmissionController", keys: List[LimitKey]):
+        self.controller = controller
+        self.keys = keys
+
+    def release(self):
+        self.controller._release(self.keys)
+        self.keys = []
+
+
+class AdmissionController(object):
+    """
+    Tracks the number of in-flight invocations and the rate of invocations
+    for each limit key.  The controller is only used from the asyncio event
+    loop and so requires no locking.
+
+    Parameters
+    ----------
+    prune_every: int
+        The number of admissions between discarding idle rate-limit buckets.
+    """
+
+    def __init__(self, prune_every: int = 1000):
+        self.prune_every = prune_every
+        self._inflight: Dict[LimitKey, int] = dict()
+        self._buckets: Dict[LimitKey, TokenBucket] = dict()
+        self._admitted = 0
+        self.rejected = 0
+
+    def admit(
+        self, limits: Sequence[Tuple[str, Limit]], body: dict, event_id: str
+    ) -> Tuple[Optional[Admission], Optional[Rejection]]:
+        """
+        Check the limits for an invocation.
+
+        Parameters
+        ----------
+        limits:
+            The list of (owner event_id, Limit) that apply; the owner is the
+            command or group that declared the limit.
+
+        body:
+            The Slack command payload.
+
+        event_id:
+            The event_id of the invoked command.
+
+        Returns
+        -------
+        tuple
+            (Admission, None) when the invocation may run, otherwise
+            (None, Rejection).
+        """
+        checks = list()
+
+        for owner, limit in limits:
+            if field := SCOPE_FIELDS[limit.scope]:
+                value = body.get(field) or ""
+            else:
+                value = event_id if limit.scope == "command" else ""
+
+            key = (owner, limit.scope, value)
+
+            if limit.concurrency is not None:
+                if self._inflight.get(key, 0) >= limit.concurrency:
+                    return self._reject(limit, key, 0.0)
+
+            bucket = None
+            if limit.rate is not None:
+                if (bucket := self._buckets.get(key)) is None:
+                    bucket = self._buckets[key] = TokenBucket(
+                        rate=limit.rate / limit.per, capacity=limit.burst
+                    )
+                if (wait := bucket.delay()) > 0:
+                    return self._reject(limit, key, wait)
+
+            checks.append((key, limit, bucket))
+
+        keys = list()
+        for key, limit, bucket in checks:
+            if bucket is not None:
+                bucket.try_acquire()
+            if limit.concurrency is not None:
+                self._inflight[key] = self._inflight.get(key, 0) + 1
+                keys.append(key)
+
+        self._admitted += 1
+        if self._admitted % self.prune_every == 0:
+            self._prune()
+
+        return Admission(self, keys), None
+
+    def inflight(self) -> Dict[str, Dict[str, int]]:
+        """
+        Returns the current in-flight counts:
+
+            {"<owner event_id>.<scope>": {"<scope value>": count}}
+        """
+        result = dict()
+        for (owner, scope, value), count in self._inflight.items():
+            result.setdefault(f"{owner}.{scope}", dict())[value] = count
+        return result
+
+    def stats(self) -> dict:
+        return dict(
+            inflight=sum(self._inflight.values()),
+            admitted=self._admitted,
+            rejected=self.rejected,
+            rate_buckets=len(self._buckets),
+        )
+
+    # -------------------------------------------------------------------------
+    #                                 PRIVATE
+    # -------------------------------------------------------------------------
+
+    def _reject(self, limit: Limit, key: LimitKey, retry_after: float):
+        self.rejected += 1
+        return None, Rejection(limit, key, retry_after)
+
+    def _release(self, keys: List[LimitKey]):
+        for key in keys:
+            if (count := self._inflight.get(key, 0) - 1) > 0:
+                self._inflight[key] = count
+            else:
+                self._inflight.pop(key, None)
+
+    def _prune(self):
+        # a bucket that has refilled to capacity is equivalent to a new one.
+        idle = [
+            key
+            for key, bucket in self._buckets.items()
+            if bucket.delay(bucket.capacity) == 0
+        ]
+        for key in idle:
+            del self._buckets[key]
+
+
+# the admission controller used by the slack-click library when one is not
+# provided to the top-level command.
+
+g_admission = AdmissionController()
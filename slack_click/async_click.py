@@ -16,10 +16,13 @@
 # System Imports
 # -----------------------------------------------------------------------------
 
-from typing import Coroutine, Callable, Any
+from typing import Coroutine, Callable, Any, Dict, Tuple, List, Optional, Union
+from typing import TYPE_CHECKING
 import asyncio
-from functools import wraps
-from contextvars import ContextVar
+import sys
+from functools import wraps, partial
+from time import perf_counter
+import inspect
 
 # -----------------------------------------------------------------------------
 # Public Imports
@@ -27,10 +30,43 @@ from contextvars import ContextVar
 
 import click
 from click import decorators
+from click.utils import make_default_short_help
 from click import Command, Option, Group
-import pyee
-from slack_bolt.request.async_request import AsyncBoltRequest as Request
-from first import first
+
+# Slack-Bolt, and the aiohttp client it uses, is only imported by the Slack
+# application itself; see _is_slack_request().
+
+if TYPE_CHECKING:  # pragma: no cover
+    from slack_bolt.request.async_request import AsyncBoltRequest as Request
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from .supervisor import TaskSupervisor, g_supervisor
+from .parsing import shell_tokenize, ParseCache, ParseResult
+from .dispatch import DispatchIndex
+from .router import InteractiveRouter, Route, payload_event_ids
+from .metrics import MetricsRegistry, g_metrics
+from .outbox import SlackOutbox
+from .admission import Limit, Admission, Rejection, AdmissionController, g_admission
+from .admission import AdmissionRejected
+from .offload import OffloadPool, is_sync_callback, call_command_callback
+from .offload import is_process_offload, check_process_callback
+from .offload import g_thread_pool, g_process_pool
+from .deadline import Deadline, DeadlineExceeded, DeferrableSay, run_with_deadline
+from .deadline import g_inflight
+from .invocation import Invocation, g_invocation
+from .invocation import current_click_context, set_click_context
+from .idempotency import IdempotencyStore, idempotency_key
+from .streaming import Stream, stream_output, is_stream, pack_text, MAX_TEXT
+from .options import OptionsIndex, OptionProvider, MAX_OPTIONS
+from .suggest import BKTree, did_you_mean
+from .state import StateCodec, CommandState, StateError
+from .scheduler import Scheduler, SchedulerBusy
+from .profiling import Profiler
+from .transport import SlackTransport
+from .tenants import TenantOverlay, TenantOverlays
 
 # -----------------------------------------------------------------------------
 # Exports
@@ -39,6 +75,9 @@ from first import first
 __all__ = [
     "version_option",
     "click_async",
+    "install_click_context",
+    "uninstall_click_context",
+    "slack_pack_state",
     "AsyncSlackClickGroup",
     "AsyncSlackClickCommand",
 ]
@@ -55,7 +94,7 @@ def click_async(callback=None):
     def wrapped(func):
         @wraps(func)
         def new_callback(*vargs, **kwargs):
-            ctx = g_click_context.get()
+            ctx = current_click_context()
             if ctx.invoked_subcommand:
                 return
 
@@ -110,8 +149,11 @@ def version_option(version: str, *param_decls, **attrs):
             if prog is None:
                 prog = ctx.find_root().info_name
 
-            asyncio.create_task(
-                send_version(ctx, (message % {"prog": prog, "version": version}))
+            set_click_context(ctx)
+
+            slack_supervisor(ctx).spawn(
+                send_version(ctx, (message % {"prog": prog, "version": version})),
+                name="slack_click.version",
             )
 
             ctx.exit()
@@ -126,14 +168,209 @@ def version_option(version: str, *param_decls, **attrs):
     return decorator
 
 
+def slack_supervisor(ctx: click.Context) -> TaskSupervisor:
+    """
+    Returns the TaskSupervisor used to run the background tasks of the given
+    context; this is the supervisor of the top-level command, if one was
+    provided, or the library default.
+    """
+    return getattr(ctx.find_root().command, "supervisor", None) or g_supervisor
+
+
+def _invoked_event_id() -> Optional[str]:
+    """Returns the event_id of the most recent command context, if any."""
+    if (ctx := current_click_context()) is None:
+        return None
+    return getattr(ctx.command, "event_id", None)
+
+
+def _current_overlay() -> Optional[TenantOverlay]:
+    """Returns the TenantOverlay of the current invocation, if any."""
+    if (invocation := g_invocation.get(None)) is None:
+        return None
+    return invocation.overlay
+
+
+def _is_slack_request(obj) -> bool:
+    """
+    Returns True if obj is a Slack-Bolt async request.  The request module is
+    not imported here: if it has not been imported by the application, obj
+    cannot be an instance of its request class.
+    """
+    if (module := sys.modules.get("slack_bolt.request.async_request")) is None:
+        return False
+    return isinstance(obj, module.AsyncBoltRequest)
+
+
+async def _say_all(request: "Request", messages: List[dict]):
+    say = request.context["say"]
+    for payload in messages:
+        await say(**payload)
+
+
+def _ctx_setting(ctx: Optional[click.Context], name: str):
+    """
+    Returns the named setting of the command of the context, or else of the
+    nearest group above it that has the setting; None if there is none.
+    """
+    while ctx is not None:
+        if (value := getattr(ctx.command, name, None)) is not None:
+            return value
+        ctx = ctx.parent
+    return None
+
+
+def _check_process_commands(cmd: Command):
+    """
+    Check the commands that inherit the process offload of the group they are
+    added to: the command, or the commands below a group, that do not declare
+    their own offload setting.
+    """
+    if getattr(cmd, "offload", None) is not None:
+        return
+
+    if isinstance(cmd, Group):
+        for sub_cmd in cmd.commands.values():
+            _check_process_commands(sub_cmd)
+    elif isinstance(cmd, SlackClickHelper):
+        check_process_callback(cmd.event_id, cmd.callback)
+
+
+async def slack_pack_state(
+    ctx: Optional[click.Context] = None, limit: int = None, **extra
+) -> str:
+    """
+    Returns the state of the command invocation, the command event_id and
+    parsed parameters and any `extra` values, encoded by the StateCodec of the
+    command or of the nearest group above it.  Use it for the `value` of a
+    button, or the `private_metadata` of a view; see
+    AsyncSlackClickGroup.load_state().
+
+    Parameters
+    ----------
+    ctx:
+        The context of the invocation; the current context by default.
+
+    limit:
+        The maximum length; for example state.MAX_PRIVATE_METADATA.
+    """
+    ctx = ctx or current_click_context()
+    if (codec := _ctx_setting(ctx, "state")) is None:
+        raise RuntimeError(
+            f"{ctx.command.name}: no StateCodec; use the `state` parameter"
+        )
+    state = CommandState.from_context(ctx, **extra)
+    return await codec.pack(state.dump(), limit=limit)
+
+
+def slack_help_text(ctx: click.Context) -> str:
+    """
+    Returns the Click help text for the given context, using the cached
+    rendering when the command is a SlackClickHelper.
+    """
+    cmd = ctx.command
+    if isinstance(cmd, SlackClickHelper):
+        return cmd.slack_help_cached(ctx, "text", click.Context.get_help)
+    return ctx.get_help()
+
+
+def slack_help_attachment(ctx: click.Context) -> dict:
+    """
+    Returns a copy of the "Command help" attachment used in the usage error
+    message, using the cached rendering when available.
+    """
+    cmd = ctx.command
+    if isinstance(cmd, SlackClickHelper):
+        return dict(
+            cmd.slack_help_cached(ctx, "attachment", cmd.slack_format_help_attachment)
+        )
+    return SlackClickHelper.slack_format_help_attachment(ctx)
+
+
 class SlackClickHelper(Command):
     def __init__(self, *vargs, **kwargs):
         self.event_id = kwargs.get("name")
-        self.obj_slack_request: Callable[[Any], Request] = kwargs.pop(
+        self.obj_slack_request: Callable[[Any], "Request"] = kwargs.pop(
             "slack_request", self._slack_request_is_obj
         )
+
+        # the supervisor used to run the background tasks, such as sending the
+        # help message; the library default is used when not provided.
+        self.supervisor: TaskSupervisor = kwargs.pop("supervisor", None)
+
+        # alternate names for this command when added to an AsyncSlackClickGroup
+        # that uses a DispatchIndex.
+        self.aliases: Tuple[str, ...] = tuple(kwargs.pop("aliases", ()))
+
+        # the function used to split the Slack command text into arguments.
+        self.tokenizer: Callable[[str], List[str]] = kwargs.pop(
+            "tokenizer", shell_tokenize
+        )
+
+        # the metrics registry; the library default is used when not provided.
+        self.metrics: Optional[MetricsRegistry] = kwargs.pop("metrics", None)
+
+        # when provided, the messages sent with the request `say` function are
+        # routed through the outbox.
+        self.outbox: Optional[SlackOutbox] = kwargs.pop("outbox", None)
+
+        # when provided to the top-level command or group, the request say and
+        # respond functions send using the transport connection pool.
+        self.transport: Optional[SlackTransport] = kwargs.pop("transport", None)
+
+        # the limits on running this command, or the commands of this group;
+        # checked by the admission controller of the top-level command.
+        self.limits: Tuple[Limit, ...] = tuple(kwargs.pop("limits", ()))
+        self.admission: Optional[AdmissionController] = kwargs.pop("admission", None)
+
+        # when provided to the top-level command, a payload that was already
+        # seen, for example one re-delivered by Slack, is discarded.
+        self.idempotency: Optional[IdempotencyStore] = kwargs.pop("idempotency", None)
+
+        # run synchronous command callbacks in an executor: True or "thread"
+        # for the library thread pool, "process" for the library process pool,
+        # or an OffloadPool.  A group setting applies to the commands below it
+        # unless they declare their own; False disables offload.
+        self.offload: Union[None, bool, str, OffloadPool] = kwargs.pop("offload", None)
+
+        # the latency budget and timeout of this command, or the commands of
+        # this group; see slack_run_deadline().
+        self.deadline: Optional[Deadline] = kwargs.pop("deadline", None)
+
+        # encodes the state of an invocation into interactive payloads; a
+        # group setting applies to the commands below it.
+        self.state: Optional[StateCodec] = kwargs.pop("state", None)
+
+        # when provided to the top-level command or group, the requests wait
+        # for the scheduler before they are run; see slack_click.scheduler.
+        self.scheduler: Optional[Scheduler] = kwargs.pop("scheduler", None)
+
+        # when provided to the top-level command or group, the commands are
+        # hidden, defaulted, or documented differently for each Slack team;
+        # see slack_click.tenants.
+        self.tenants: Optional[TenantOverlays] = kwargs.pop("tenants", None)
+
+        # when provided to the top-level command or group, the invocations
+        # that are sampled, or slow, are profiled; see slack_click.profiling.
+        self.profiler: Optional[Profiler] = kwargs.pop("profiler", None)
+
+        # how the output of a generator callback is sent, for this command or
+        # the commands of this group; see slack_stream().
+        self.stream: Optional[Stream] = kwargs.pop("stream", None)
+
+        # optional cache of parse results; shared with the commands added to a
+        # group.  See make_context().
+        self.parse_cache: Optional[ParseCache] = kwargs.pop("parse_cache", None)
+
+        # rendered help text and the static parts of the Slack help payloads,
+        # keyed by (kind, command-path, overlay).  See slack_help_cached().
+        self._help_cache: Dict[Tuple[str, str, Optional[str]], Any] = dict()
+
         super(SlackClickHelper, self).__init__(*vargs, **kwargs)
 
+        if is_process_offload(self.offload) and not isinstance(self, Group):
+            check_process_callback(self.event_id, self.callback)
+
     @staticmethod
     def _slack_request_is_obj(obj):
         return obj
@@ -163,7 +400,6 @@ class SlackClickHelper(Command):
         dict
             The Slack message body dictionary that will be returned to the Slack User.
         """
-        help_text = ctx.get_help()
         msg_body = dict()
         atts = msg_body["attachments"] = list()
 
@@ -181,16 +417,249 @@ class SlackClickHelper(Command):
 
         atts.append(dict(text=f"```{errmsg}```", fallback=errmsg))
 
-        atts.append(
-            dict(pretext="Command help", text=f"```{help_text}```", fallback=help_text)
-        )
+        atts.append(slack_help_attachment(ctx))
         return msg_body
 
+    @staticmethod
+    def slack_format_busy(command: dict, ctx: click.Context, rejection: Rejection):
+        """
+        This function returns the Slack message body sent to the User when the
+        command is not run because a Limit was reached.
+
+        Parameters
+        ----------
+        command: dict
+            The command data from the Slack request
+
+        ctx: click.Context
+            The Click context of the command that was not run.
+
+        rejection: Rejection
+            The limit that was reached, and the number of seconds until the
+            rate limit, if any, permits another invocation.
+
+        Returns
+        -------
+        dict
+            The Slack message body dictionary that will be returned to the Slack User.
+        """
+        user_id = command["user_id"]
+        text = f"Hi <@{user_id}>, `{ctx.command_path}` is busy right now"
+        if rejection.retry_after >= 1:
+            text += f"; please try again in {int(rejection.retry_after + 0.5)}s."
+        else:
+            text += "; please try again in a moment."
+        return dict(text=text)
+
+    @staticmethod
+    def slack_format_interim(command: dict, ctx: click.Context):
+        """
+        This function returns the Slack message body sent to the User when the
+        command runs past its Deadline budget, and is deferred.
+
+        Parameters
+        ----------
+        command: dict
+            The command data from the Slack request
+
+        ctx: click.Context
+            The Click context of the running command.
+
+        Returns
+        -------
+        dict
+            The Slack message body dictionary that will be returned to the Slack User.
+        """
+        user_id = command["user_id"]
+        return dict(text=f"Hi <@{user_id}>, still working on `{ctx.command_path}` ...")
+
+    @staticmethod
+    def slack_format_timeout(command: dict, ctx: click.Context, exc: DeadlineExceeded):
+        """
+        This function returns the Slack message body sent to the User when the
+        command is cancelled because its Deadline ran out.
+
+        Parameters
+        ----------
+        command: dict
+            The command data from the Slack request
+
+        ctx: click.Context
+            The Click context of the cancelled command.
+
+        exc: DeadlineExceeded
+            The deadline that ran out, "budget" or "timeout", and its seconds.
+
+        Returns
+        -------
+        dict
+            The Slack message body dictionary that will be returned to the Slack User.
+        """
+        user_id = command["user_id"]
+        return dict(
+            text=(
+                f"Hi <@{user_id}>, `{ctx.command_path}` did not complete within "
+                f"{exc.seconds:g}s and was cancelled."
+            )
+        )
+
     @staticmethod
     def slack_format_help(ctx: click.Context):
-        help_text = ctx.get_help()
+        help_text = slack_help_text(ctx)
         return dict(text=f"*Command help:*\n```{help_text}```", fallback=help_text)
 
+    @staticmethod
+    def slack_format_help_attachment(ctx: click.Context):
+        """
+        This function returns the "Command help" attachment that is included
+        in the usage error message.  The attachment does not depend on the
+        User request, and is cached per command path.  Help text that is too
+        large for the attachment is truncated.
+        """
+        help_text = slack_help_text(ctx)
+        if len(help_text) <= MAX_TEXT - 6:
+            text = f"```{help_text}```"
+        else:
+            text = pack_text(help_text, limit=MAX_TEXT - 64, code=True)[0]
+            text += "\n_Use --help for the complete help._"
+
+        return dict(pretext="Command help", text=text, fallback=help_text)
+
+    # -------------------------------------------------------------------------
+    # Help rendering cache.  Click re-formats the entire help page each time
+    # ctx.get_help() is called; the results are stored here once per command
+    # path and cleared when commands are added.
+    # -------------------------------------------------------------------------
+
+    def slack_help_cached(self, ctx: click.Context, kind: str, render: Callable):
+        """
+        Returns the value produced by `render(ctx)`, rendering it only once per
+        (kind, command-path) and tenant overlay.  Callers must not mutate the
+        returned value.
+        """
+        overlay = _current_overlay()
+        key = (kind, ctx.command_path, overlay.key if overlay else None)
+        try:
+            return self._help_cache[key]
+        except KeyError:
+            value = self._help_cache[key] = render(ctx)
+            return value
+
+    def slack_help_payload(self, ctx: click.Context) -> dict:
+        """Returns a copy of the cached `slack_format_help` payload."""
+        return dict(self.slack_help_cached(ctx, "payload", self.slack_format_help))
+
+    def slack_help_messages(self, ctx: click.Context) -> List[dict]:
+        """
+        Returns the messages sent for `--help`: the slack_format_help payload,
+        or when the help text is too large for one message, the help text split
+        into several.
+        """
+        payload = self.slack_help_payload(ctx)
+        if len(payload.get("text") or "") <= MAX_TEXT:
+            return [payload]
+
+        chunks = self.slack_help_cached(
+            ctx, "chunks", lambda _ctx: pack_text(slack_help_text(_ctx), code=True)
+        )
+        return [dict(text=chunk) for chunk in chunks]
+
+    def slack_help_invalidate(self):
+        """Discards any cached help renderings for this command."""
+        self._help_cache.clear()
+
+    def format_help_text(self, ctx, formatter):
+        overlay = _current_overlay()
+        if overlay is None or (help_text := overlay.help_text(self.event_id)) is None:
+            return super(SlackClickHelper, self).format_help_text(ctx, formatter)
+
+        formatter.write_paragraph()
+        with formatter.indentation():
+            formatter.write_text(help_text)
+
+    def get_short_help_str(self, limit=45):
+        overlay = _current_overlay()
+        if overlay is None or (help_text := overlay.help_text(self.event_id)) is None:
+            return super(SlackClickHelper, self).get_short_help_str(limit)
+        return make_default_short_help(help_text, limit)
+
+    # -------------------------------------------------------------------------
+    # "Did you mean" suggestions for usage errors; see slack_click.suggest
+    # -------------------------------------------------------------------------
+
+    def parse_args(self, ctx, args):
+        try:
+            return super(SlackClickHelper, self).parse_args(ctx, args)
+        except click.exceptions.NoSuchOption as exc:
+            # Click suggests the options that start with the mistyped one.
+            if not exc.possibilities and (
+                suggestion := did_you_mean(
+                    self.slack_suggest(ctx, "options", exc.option_name)
+                )
+            ):
+                exc.message = f"{exc.message}.{suggestion}"
+            raise
+
+    def slack_suggest(self, ctx: click.Context, kind: str, token: str) -> List[str]:
+        """
+        Returns the names closest to the mistyped token; `kind` is "options"
+        or "commands".  The names are indexed once per command path, and the
+        index is cached with the help renderings.
+        """
+        tree = self.slack_help_cached(
+            ctx,
+            f"suggest.{kind}",
+            lambda _ctx: BKTree(self.slack_suggest_names(_ctx, kind)),
+        )
+        return tree.closest(token)
+
+    def slack_suggest_names(self, ctx: click.Context, kind: str) -> List[str]:
+        """Returns the names that are suggested for the kind of usage error."""
+        if kind == "commands":
+            names = list(self.list_commands(ctx))
+            for name in names[:]:
+                names.extend(getattr(self.get_command(ctx, name), "aliases", ()))
+            return names
+
+        names = list(self.get_help_option_names(ctx))
+        for param in self.params:
+            if isinstance(param, click.Option):
+                names.extend(param.opts)
+                names.extend(param.secondary_opts)
+        return names
+
+    def slack_help_warmup(self, info_name=None, parent=None):
+        """
+        Pre-renders the help text and Slack help payloads for this command so
+        that the first `--help` or usage error does not pay the formatting
+        cost.
+
+        Parameters
+        ----------
+        info_name: str
+            The name used to invoke the command; defaults to the command name.
+            For the top-level command this should be the same value used as
+            the `prog_name` when calling the command.
+
+        parent: click.Context
+            The parent context, if any.
+
+        Returns
+        -------
+        click.Context
+            The (unparsed) context used for rendering.
+        """
+        ctx = click.Context(
+            self,
+            info_name=info_name or self.name,
+            parent=parent,
+            **self.context_settings,
+        )
+        self.slack_help_cached(ctx, "text", click.Context.get_help)
+        self.slack_help_cached(ctx, "payload", self.slack_format_help)
+        self.slack_help_cached(ctx, "attachment", self.slack_format_help_attachment)
+        return ctx
+
     def get_help_option(self, ctx):
         help_options = self.get_help_option_names(ctx)
         if not help_options or not self.add_help_option:
@@ -198,10 +667,13 @@ class SlackClickHelper(Command):
 
         def slack_show_help(_ctx: click.Context, param, value):  # noqa
             if value and not _ctx.resilient_parsing:
-                payload = self.slack_format_help(_ctx)
+                set_click_context(_ctx)
+                messages = self.slack_help_messages(_ctx)
                 slack_cmd: SlackClickHelper = _ctx.command
                 request = slack_cmd.obj_slack_request(ctx.obj)
-                asyncio.create_task(request.context["say"](**payload))
+                slack_supervisor(_ctx).spawn(
+                    _say_all(request, messages), name="slack_click.help"
+                )
                 _ctx.exit()
 
         return Option(
@@ -214,10 +686,54 @@ class SlackClickHelper(Command):
         )
 
     def make_context(self, info_name, args, parent=None, **extra):
-        ctx = super(SlackClickHelper, self).make_context(
-            info_name=info_name, args=args, parent=parent, **extra
-        )
-        g_click_context.set(ctx)
+        if self.parse_cache is None or not self._parse_cacheable:
+            ctx = super(SlackClickHelper, self).make_context(
+                info_name=info_name, args=args, parent=parent, **extra
+            )
+        else:
+            ctx = self._make_context_cached(info_name, args, parent, extra)
+
+        set_click_context(ctx)
+        return ctx
+
+    def slack_set_parse_cache(self, parse_cache: Optional[ParseCache]):
+        """Use the given parse cache for this command."""
+        self.parse_cache = parse_cache
+
+    @property
+    def _parse_cacheable(self) -> bool:
+        # click.File parameters produce open file objects that cannot be reused
+        # across invocations.
+        return not any(isinstance(param.type, click.File) for param in self.params)
+
+    def _make_context_cached(self, info_name, args, parent, extra):
+        # the parameter defaults depend on the tenant overlay.
+        overlay = _current_overlay()
+        key = (self.event_id, tuple(args), overlay.key if overlay else None)
+
+        if (parsed := self.parse_cache.get(key)) is None:
+            ctx = super(SlackClickHelper, self).make_context(
+                info_name=info_name, args=args, parent=parent, **extra
+            )
+            self.parse_cache.put(
+                key,
+                ParseResult(
+                    params=dict(ctx.params),
+                    protected_args=tuple(ctx.protected_args),
+                    args=tuple(ctx.args),
+                ),
+            )
+            return ctx
+
+        # cache hit; populate the context as if Click had parsed the args.
+
+        for setting, value in self.context_settings.items():
+            extra.setdefault(setting, value)
+
+        ctx = click.Context(self, info_name=info_name, parent=parent, **extra)
+        ctx.params.update(parsed.params)
+        ctx.protected_args = list(parsed.protected_args)
+        ctx.args = list(parsed.args)
         return ctx
 
     async def __call__(self, *vargs, **kwargs):
@@ -229,24 +745,160 @@ class SlackClickHelper(Command):
         prog_name=None,
         complete_var=None,
         standalone_mode=False,
+        join_tasks=False,
         **extra,
     ):
+        """
+        Run the command for the Slack request found in the `obj` keyword
+        argument.
+
+        When `join_tasks` is True, the background tasks spawned by this
+        invocation, for example sending the `--help` message, are awaited
+        before returning.  Otherwise they complete under the control of the
+        TaskSupervisor.
+        """
+        if not g_click_context_installed:
+            install_click_context()
+
+        # the invocation state is scoped to this call; see Invocation.
+
+        outer = g_invocation.get(None)
+        invocation = Invocation()
+        invocation.profiled = outer is not None and outer.profiled
+        token = g_invocation.set(invocation)
+
+        profiled = None
+        if self.profiler is not None and not invocation.profiled:
+            profiled = self.profiler.begin()
+            invocation.profiled = profiled is not None
 
+        try:
+            if not join_tasks:
+                return await self._slack_main(
+                    args, prog_name, complete_var, standalone_mode, **extra
+                )
+
+            with (self.supervisor or g_supervisor).track() as spawned:
+                try:
+                    return await self._slack_main(
+                        args, prog_name, complete_var, standalone_mode, **extra
+                    )
+                finally:
+                    if spawned:
+                        await asyncio.wait(spawned)
+        finally:
+            if profiled is not None:
+                request = invocation.request
+                self.profiler.end(
+                    profiled,
+                    _invoked_event_id() or self.event_id,
+                    request.body if request is not None else {},
+                )
+            invocation.close()
+            g_invocation.reset(token)
+
+    async def _slack_main(
+        self, args, prog_name, complete_var, standalone_mode, **extra
+    ):
         if (obj := extra.get("obj")) is None:
             raise ValueError("Missing obj to contain Slack-Bolt request, required.")
 
         request = self.obj_slack_request(obj)
 
-        if not isinstance(request, Request):
+        if not _is_slack_request(request):
             raise ValueError(
                 "obj missing expected Slack-Bolt request instance, required."
             )
 
+        invocation = g_invocation.get()
+        invocation.request = request
+        metrics = self.metrics or g_metrics
+
+        if self.tenants is not None:
+            invocation.overlay = self.tenants.for_payload(request.body)
+
+        # discard a duplicate slash-command payload before doing any other
+        # work.  An interactive payload is not claimed: the actions of one
+        # payload may each run a command.
+
+        if self.idempotency is not None and "command" in request.body:
+            if not await self.idempotency.claim(idempotency_key(request.body)):
+                if metrics.enabled:
+                    metrics.count("commands_total", self.event_id, "duplicate")
+                return
+
+        if self.transport is not None:
+            self.transport.attach(request)
+
+        if self.outbox is not None:
+            self.outbox.attach(request)
+
         # if args are not explicitly provided, then examine the slack command
         # request 'text' field in the payload body.
 
         if not args:
-            args = request.body.get("text", "").split()
+            args = self.tokenizer(request.body.get("text", ""))
+
+        if self.scheduler is None or self.scheduler.holds():
+            return await self._slack_invoke(
+                request,
+                metrics,
+                args,
+                prog_name,
+                complete_var,
+                standalone_mode,
+                **extra,
+            )
+
+        try:
+            slot = await self.scheduler.acquire(
+                self.slack_schedule_class(args), request.body
+            )
+        except SchedulerBusy as exc:
+            if metrics.enabled:
+                metrics.count("commands_total", self.event_id, "shed")
+            ctx = click.Context(self, info_name=prog_name or self.name, obj=obj)
+            rejection = Rejection(None, ("scheduler", exc.kind, ""), 0.0)
+            payload = self.slack_format_busy(request.body, ctx, rejection)
+            await request.context["say"](**payload)
+            return
+
+        with slot:
+            return await self._slack_invoke(
+                request,
+                metrics,
+                args,
+                prog_name,
+                complete_var,
+                standalone_mode,
+                **extra,
+            )
+
+    def slack_schedule_class(self, args: List[str]) -> str:
+        """
+        Returns the scheduler class of an invocation: "help" when the
+        arguments ask for the help or the version, otherwise "command".
+        """
+        ctx = click.Context(self)
+        options = set(self.get_help_option_names(ctx)) | {"--version"}
+        return "help" if any(arg in options for arg in args) else "command"
+
+    async def _slack_invoke(
+        self,
+        request: "Request",
+        metrics: MetricsRegistry,
+        args,
+        prog_name,
+        complete_var,
+        standalone_mode,
+        **extra,
+    ):
+        obj = extra["obj"]
+        probe = metrics.start(request, self.event_id) if metrics.enabled else None
+
+        if (overlay := _current_overlay()) is not None and overlay.default_map:
+            extra.setdefault("default_map", overlay.default_map)
+        outcome = "error"
 
         try:
             # Call the Click main method for this Command/Group instance.  The
@@ -258,16 +910,57 @@ class SlackClickHelper(Command):
                 args, prog_name, complete_var, standalone_mode, **extra
             )
 
-            if isinstance(cli_coro, Coroutine):
-                return await cli_coro
+            if probe:
+                probe.parsed(_invoked_event_id())
+
+            if is_stream(cli_coro):
+                cli_coro = self.slack_stream(request, current_click_context(), cli_coro)
+
+            if not isinstance(cli_coro, Coroutine):
+                # when ctx.exit() is called, for example by --help, Click
+                # returns the exit code rather than raising Exit.
+                outcome = "exit" if isinstance(cli_coro, int) else "ok"
+                return
+
+            ctx = current_click_context()
+            admission, rejection = self.slack_admit(request, ctx)
+            if rejection:
+                cli_coro.close()
+                outcome = "rejected"
+                payload = self.slack_format_busy(request.body, ctx, rejection)
+                await request.context["say"](**payload)
+                return
+
+            try:
+                if (deadline := _ctx_setting(ctx, "deadline")) is not None:
+                    result = await self.slack_run_deadline(
+                        request, ctx, deadline, cli_coro
+                    )
+                else:
+                    result = await cli_coro
+            finally:
+                if admission:
+                    admission.release()
+
+            if probe:
+                probe.handled()
+
+            outcome = "ok"
+            return result
 
         except click.exceptions.UsageError as exc:
+            outcome = "usage_error"
+            # the context that failed is used to render the help; when the
+            # failure was before any context was made, an unparsed one is.
             ctx = (
                 exc.ctx
-                or g_click_context.get()
-                or self.make_context(self.name, args, obj=obj)
+                or current_click_context()
+                or click.Context(self, info_name=prog_name or self.name, obj=obj)
             )
 
+            if probe:
+                probe.event_id = getattr(ctx.command, "event_id", probe.event_id)
+
             payload = self.slack_format_usage_help(
                 request.body, ctx, errmsg=exc.format_message()
             )
@@ -276,24 +969,224 @@ class SlackClickHelper(Command):
             return
 
         except click.exceptions.Exit:
+            outcome = "exit"
+            return
+
+        except AdmissionRejected as exc:
+            outcome = "rejected"
+            ctx = current_click_context()
+            payload = self.slack_format_busy(request.body, ctx, exc.rejection)
+            await request.context["say"](**payload)
             return
 
+        except DeadlineExceeded as exc:
+            # a superseded invocation is replaced by the one the User just
+            # ran; there is nothing to report.
+            if exc.reason == "superseded":
+                outcome = "superseded"
+                return
+
+            outcome = "timeout"
+            ctx = current_click_context()
+            payload = self.slack_format_timeout(request.body, ctx, exc)
+            await request.context["say"](**payload)
+            return
+
+        finally:
+            if probe:
+                probe.finish(outcome)
+
+    async def slack_stream(self, request: "Request", ctx: click.Context, chunks):
+        """
+        Send the output of a generator command callback, using the Stream
+        declared by the command, or the nearest group above it.
+
+        Returns
+        -------
+        int
+            The number of messages posted.
+        """
+        stream = _ctx_setting(ctx, "stream") or Stream()
+        context = request.context
+        return await stream_output(
+            chunks,
+            context["say"],
+            stream,
+            client=context.client,
+            channel=context.channel_id,
+        )
+
+    async def slack_run_deadline(
+        self,
+        request: "Request",
+        ctx: click.Context,
+        deadline: Deadline,
+        cli_coro: Coroutine,
+    ):
+        """
+        Run the command coroutine, enforcing the Deadline of the command.  When
+        the budget runs out and the command is deferred, the User is sent the
+        slack_format_interim message, and the request `say` function then
+        sends using the request response_url, if any; see DeferrableSay.
+
+        Raises
+        ------
+        DeadlineExceeded
+            When the command was cancelled.
+        """
+
+        say = request.context["say"] = DeferrableSay(request.context["say"])
+
+        async def on_defer():
+            payload = self.slack_format_interim(request.body, ctx)
+            await say(**payload)
+            if request.body.get("response_url"):
+                say.defer(request.context.respond)
+
+        body = request.body
+        key = (ctx.command.event_id, body.get("user_id"), body.get("channel_id"))
+        return await run_with_deadline(cli_coro, deadline, on_defer, g_inflight, key)
+
+    def slack_admit(
+        self, request: "Request", ctx: Optional[click.Context]
+    ) -> Tuple[Optional[Admission], Optional[Rejection]]:
+        """
+        Check the limits declared by the invoked command, and the groups above
+        it, using the admission controller of the top-level command.
+
+        Returns
+        -------
+        tuple
+            (Admission, None) when the command may run; the Admission must be
+            released when the command is done.  (None, Rejection) when a limit
+            was reached.  (None, None) when there are no limits.
+        """
+        limits = list()
+        at = ctx
+        while at is not None:
+            for limit in getattr(at.command, "limits", ()):
+                limits.append((at.command.event_id, limit))
+            at = at.parent
+
+        if not limits:
+            return None, None
+
+        controller = getattr(ctx.find_root().command, "admission", None) or g_admission
+        return controller.admit(limits, request.body, ctx.command.event_id)
+
+    def _slack_invoke_admitted(self, ctx: click.Context, invoke: Callable):
+        # a synchronous callback runs within the Click main, and not from the
+        # calling main; so its limits are checked here, before it runs.  A
+        # generator callback only runs when it is streamed.
+
+        request = getattr(g_invocation.get(None), "request", None)
+        if (
+            request is None
+            or self.callback is None
+            or not is_sync_callback(self.callback)
+            or inspect.isgeneratorfunction(inspect.unwrap(self.callback))
+        ):
+            return invoke(ctx)
+
+        admission, rejection = self.slack_admit(request, ctx)
+        if rejection:
+            raise AdmissionRejected(rejection)
+
+        try:
+            return invoke(ctx)
+        finally:
+            if admission:
+                admission.release()
+
 
 class AsyncSlackClickCommand(SlackClickHelper, Command):
-    pass
+    def invoke(self, ctx):
+        if (pool := self.slack_offload_pool(ctx)) is not None:
+            # defer running the callback in the executor to the calling main.
+            return self._slack_offload(pool, ctx)
+
+        return self._slack_invoke_admitted(
+            ctx, super(AsyncSlackClickCommand, self).invoke
+        )
+
+    def slack_offload_pool(self, ctx: click.Context) -> Optional[OffloadPool]:
+        """
+        Returns the pool used to run the command callback, or None when the
+        callback runs on the event loop.  Only a synchronous callback is
+        offloaded; the offload setting is taken from the command, or else the
+        nearest group above it.
+        """
+        if self.callback is None or not is_sync_callback(self.callback):
+            return None
+
+        if (offload := _ctx_setting(ctx, "offload")) is None:
+            return None
+
+        if isinstance(offload, OffloadPool):
+            return offload
+        if offload is True or offload == "thread":
+            return g_thread_pool
+        if offload == "process":
+            return g_process_pool
+        if offload is False:
+            return None
+
+        raise ValueError(f"{self.event_id}: unknown offload value {offload!r}")
+
+    async def _slack_offload(self, pool: OffloadPool, ctx: click.Context):
+        if pool.kind == "thread":
+            # the callback runs in a copy of the current contextvars context,
+            # and so has the Click context and the request in ctx.obj.
+            func = partial(ctx.invoke, self.callback, **ctx.params)
+        else:
+            # the callback is located by name in the worker process, and is
+            # called with the command parameters only.
+            orig = inspect.unwrap(self.callback)
+            func = partial(
+                call_command_callback, orig.__module__, orig.__qualname__, ctx.params
+            )
+
+        result, waited, ran = await pool.run(func)
+        request = g_invocation.get().request
+
+        root = ctx.find_root()
+        metrics = getattr(root.command, "metrics", None) or g_metrics
+        if metrics.enabled:
+            metrics.observe("offload_wait_seconds", self.event_id, waited)
+            metrics.observe("offload_run_seconds", self.event_id, ran)
+
+        # a synchronous callback cannot await say; a returned message is sent
+        # on its behalf.
+
+        if is_stream(result):
+            return await self.slack_stream(request, ctx, pool.iterate(result))
+
+        if isinstance(result, (str, dict)):
+            payload = dict(text=result) if isinstance(result, str) else result
+            await request.context["say"](**payload)
+            return
+
+        return result
 
 
 class AsyncSlackClickGroup(SlackClickHelper, Group):
     def __init__(self, *vargs, **kwargs):
-        self.ic = pyee.EventEmitter()
+        self.ic = InteractiveRouter()
+        self.dispatch_index: Optional[DispatchIndex] = None
+        self.options_index: Optional[OptionsIndex] = None
+        self._option_providers: Dict[str, Tuple[OptionProvider, float]] = dict()
         kwargs.setdefault("invoke_without_command", True)
         super(AsyncSlackClickGroup, self).__init__(*vargs, **kwargs)
 
     @staticmethod
     def as_async_group(func):
-        orig_callback = func.callback
+        if (orig_callback := func.callback) is None:
+            return func
 
-        @wraps(func)
+        # the wrapper refers to the original callback, so that it is found to
+        # be synchronous or not; see is_sync_callback.
+
+        @wraps(orig_callback)
         def new_callback(*vargs, **kwargs):
             ctx = _contextvar_get_current_context()
             if ctx.invoked_subcommand:
@@ -306,6 +1199,16 @@ class AsyncSlackClickGroup(SlackClickHelper, Group):
         func.callback = new_callback
         return func
 
+    def invoke(self, ctx):
+        # the group callback runs on its own, as the invoked command, when no
+        # sub-command is given; its limits are then checked as a command's.
+        if ctx.protected_args:
+            return super(AsyncSlackClickGroup, self).invoke(ctx)
+
+        return self._slack_invoke_admitted(
+            ctx, super(AsyncSlackClickGroup, self).invoke
+        )
+
     def add_command(self, cmd, name=None):
         # need to wrap Groups in async handler since the underlying Click code
         # is assuming sync processing.
@@ -314,8 +1217,184 @@ class AsyncSlackClickGroup(SlackClickHelper, Group):
         if isinstance(cmd, AsyncSlackClickGroup):
             cmd = self.as_async_group(cmd)
 
+        if is_process_offload(self.offload):
+            _check_process_commands(cmd)
+
         super(AsyncSlackClickGroup, self).add_command(cmd, name)
 
+        # share the parse cache with the new command; any cached results are
+        # now suspect since the command tree has changed.
+
+        if self.parse_cache is not None:
+            if isinstance(cmd, SlackClickHelper) and cmd.parse_cache is None:
+                cmd.slack_set_parse_cache(self.parse_cache)
+            self.parse_cache.clear()
+
+        # update the routing index, if in use, for the new command.
+
+        if self.dispatch_index is not None:
+            self.dispatch_index.add(self, name or cmd.name, cmd)
+            if isinstance(cmd, AsyncSlackClickGroup):
+                cmd.slack_set_dispatch_index(self.dispatch_index)
+
+        if self.options_index is not None:
+            self.options_index.add_command(self, name or cmd.name, cmd)
+            if isinstance(cmd, AsyncSlackClickGroup):
+                cmd.slack_set_options_index(self.options_index)
+
+        # the group help lists the sub-commands, and the help of the commands
+        # below includes the command path; both are now stale.
+
+        self.slack_help_invalidate()
+
+    def slack_set_parse_cache(self, parse_cache: Optional[ParseCache]):
+        """Use the given parse cache for this group and the commands below it."""
+        super(AsyncSlackClickGroup, self).slack_set_parse_cache(parse_cache)
+        for cmd in self.commands.values():
+            if isinstance(cmd, SlackClickHelper):
+                cmd.slack_set_parse_cache(parse_cache)
+
+    # -------------------------------------------------------------------------
+    # Compiled command routing; see slack_click.dispatch
+    # -------------------------------------------------------------------------
+
+    def compile_dispatch(self, prefix_match: bool = False) -> DispatchIndex:
+        """
+        Build a routing index for this group and all the groups below it, so
+        that sub-commands are resolved by dictionary lookup.  The index also
+        resolves command aliases, and when `prefix_match` is True, any
+        unambiguous prefix of a command name or alias; for example "d" runs
+        "delete" when no other command starts with "d".  Commands added after
+        the index is compiled are added to the index.
+
+        Returns
+        -------
+        DispatchIndex
+        """
+        index = DispatchIndex(prefix_match=prefix_match)
+        index.build(self)
+        self.slack_set_dispatch_index(index)
+        return index
+
+    def slack_set_dispatch_index(self, index: Optional[DispatchIndex]):
+        """Use the given routing index for this group and the groups below it."""
+        self.dispatch_index = index
+        for cmd in self.commands.values():
+            if isinstance(cmd, AsyncSlackClickGroup):
+                cmd.slack_set_dispatch_index(index)
+
+    # -------------------------------------------------------------------------
+    # Options-load (external select) requests; see slack_click.options
+    # -------------------------------------------------------------------------
+
+    def compile_options(self, limit: int = MAX_OPTIONS) -> OptionsIndex:
+        """
+        Build the index of options served by options_load(): the command names
+        of each group, the values of each click.Choice parameter, and the
+        registered option providers.  Commands added after the index is
+        compiled are added to the index.
+
+        Returns
+        -------
+        OptionsIndex
+        """
+        index = OptionsIndex(limit=limit)
+        index.build(self)
+        for source, (provider, ttl) in self._option_providers.items():
+            index.register(source, provider, ttl=ttl)
+
+        self.slack_set_options_index(index)
+        return index
+
+    def slack_set_options_index(self, index: Optional[OptionsIndex]):
+        """Use the given options index for this group and the groups below it."""
+        self.options_index = index
+        for cmd in self.commands.values():
+            if isinstance(cmd, AsyncSlackClickGroup):
+                cmd.slack_set_options_index(index)
+
+    def options_provider(self, source: str, ttl: float = 60.0):
+        """
+        Decorator that registers an async function providing the options of
+        the named source; it is called with the text the User has typed, and
+        returns a list of str, or of (text, value).  Results are cached for
+        `ttl` seconds.
+        """
+
+        def decorator(func: OptionProvider):
+            self._option_providers[source] = (func, ttl)
+            if self.options_index is not None:
+                self.options_index.register(source, func, ttl=ttl)
+            return func
+
+        return decorator
+
+    async def options_load(self, request: "Request") -> dict:
+        """
+        Returns the response to a Slack options-load request, compiling the
+        options index on first use.  Pass the result to `ack`.  The commands
+        hidden by the tenant overlay of the request team are not offered.
+        """
+        index = self.options_index or self.compile_options()
+        overlay = self.slack_payload_overlay(request.body)
+        if overlay is None or not overlay.hidden:
+            return await index.options_load(request.body)
+        return await index.options_load(request.body, is_hidden=overlay.is_hidden)
+
+    def slack_payload_overlay(self, body: dict) -> Optional[TenantOverlay]:
+        """Returns the tenant overlay of a payload team, if any."""
+        return self.tenants.for_payload(body) if self.tenants is not None else None
+
+    def get_command(self, ctx, cmd_name):
+        cmd = super(AsyncSlackClickGroup, self).get_command(ctx, cmd_name)
+        if cmd is not None and (overlay := _current_overlay()) is not None:
+            if overlay.is_hidden(getattr(cmd, "event_id", "")):
+                return None
+        return cmd
+
+    def list_commands(self, ctx):
+        names = super(AsyncSlackClickGroup, self).list_commands(ctx)
+        if (overlay := _current_overlay()) is None or not overlay.hidden:
+            return names
+        return [name for name in names if self.get_command(ctx, name) is not None]
+
+    def resolve_command(self, ctx, args):
+        if self.dispatch_index is not None:
+            if (found := self.dispatch_index.resolve(self, args[0])) is not None:
+                cmd_name, cmd = found
+                # a command hidden by the tenant overlay is not found.
+                overlay = _current_overlay()
+                if overlay is None or not overlay.is_hidden(cmd.event_id):
+                    return cmd_name, cmd, args[1:]
+
+        try:
+            return super(AsyncSlackClickGroup, self).resolve_command(ctx, args)
+        except click.exceptions.NoSuchOption:
+            raise
+        except click.exceptions.UsageError as exc:
+            exc.message += did_you_mean(self.slack_suggest(ctx, "commands", args[0]))
+            raise
+
+    def slack_help_invalidate(self):
+        """Discards any cached help renderings for this group and its commands."""
+        super(AsyncSlackClickGroup, self).slack_help_invalidate()
+        for cmd in self.commands.values():
+            if isinstance(cmd, SlackClickHelper):
+                cmd.slack_help_invalidate()
+
+    def slack_help_warmup(self, info_name=None, parent=None):
+        """
+        Pre-renders the help for this group and every command in the tree
+        below it; typically called once at application startup, for example:
+
+            cli_click_group.slack_help_warmup(info_name=cli_click_group.name)
+        """
+        ctx = super(AsyncSlackClickGroup, self).slack_help_warmup(info_name, parent)
+        for name, cmd in self.commands.items():
+            if isinstance(cmd, SlackClickHelper):
+                cmd.slack_help_warmup(name, parent=ctx)
+        return ctx
+
     def command(self, *args, **kwargs):
         kwargs.setdefault("cls", AsyncSlackClickCommand)
         return super().command(*args, **kwargs)
@@ -329,21 +1408,154 @@ class AsyncSlackClickGroup(SlackClickHelper, Group):
     # associated click groups/command is invoked.
     # -------------------------------------------------------------------------
 
-    def on(self, cmd: AsyncSlackClickCommand):
+    def on(self, cmd: Union[SlackClickHelper, Route]):
+        """
+        Decorator to register the handler for an interactive event.  The event
+        is identified by a command, using its event_id; an exact event_id or
+        action_id string; or a pattern, given as a compiled regular expression
+        or a string with shell-style wildcards, for example "/click.pick.*".
+
+        Raises
+        ------
+        DuplicateRouteError
+            When the event already has a handler.
+        """
+        route = cmd.event_id if isinstance(cmd, Command) else cmd
+
         def wrapper(func):
-            self.ic.on(cmd.event_id, func)
+            self.ic.add(route, func)
+            return func
 
         return wrapper
 
-    async def emit(self, request: Request, event: str):
-        handler = first(self.ic.listeners(event))
-
-        if handler is None:
+    async def emit(self, request: "Request", event: str):
+        if (found := self.ic.route(event)) is None:
             log = request.context.logger
             log.critical(f"No handler for command option '{event}'")
             return
 
-        return await handler(request)
+        route, handler = found
+
+        # an event of a command hidden from the request team is refused, as
+        # the command would be.
+
+        if (overlay := self.slack_payload_overlay(request.body)) is not None:
+            if event.startswith(self.event_id + ".") and overlay.is_hidden(event):
+                request.context.logger.warning(f"Event '{event}' hidden; refused")
+                return
+
+        if self.transport is not None:
+            self.transport.attach(request)
+
+        if self.outbox is not None:
+            self.outbox.attach(request)
+
+        if self.scheduler is None or self.scheduler.holds():
+            return await self._slack_profiled(request, event, route, handler)
+
+        try:
+            slot = await self.scheduler.acquire("interactive", request.body)
+        except SchedulerBusy as exc:
+            request.context.logger.warning(f"Event '{event}' shed: {exc}")
+            return
+
+        with slot:
+            return await self._slack_profiled(request, event, route, handler)
+
+    async def _slack_profiled(
+        self, request: "Request", event: str, route: str, handler: Callable
+    ):
+        invocation = g_invocation.get(None)
+        if (
+            self.profiler is None
+            or (invocation is not None and invocation.profiled)
+            or (profiled := self.profiler.begin()) is None
+        ):
+            return await self._slack_emit(request, route, handler)
+
+        # mark the invocation profiled, so that a command the handler runs is
+        # not profiled again.
+
+        token = None
+        if invocation is None:
+            invocation = Invocation(request)
+            token = g_invocation.set(invocation)
+        invocation.profiled = True
+
+        try:
+            return await self._slack_emit(request, route, handler)
+        finally:
+            self.profiler.end(profiled, event, request.body)
+            if token is None:
+                invocation.profiled = False
+            else:
+                invocation.close()
+                g_invocation.reset(token)
+
+    async def _slack_emit(self, request: "Request", route: str, handler: Callable):
+        # the event is labeled by the route that matched it, so that a pattern
+        # route does not add a metric for each event_id it matches.
+        metrics = self.metrics or g_metrics
+        if not metrics.enabled:
+            return await handler(request)
+
+        outcome = "error"
+        start = perf_counter()
+        try:
+            result = await handler(request)
+            outcome = "ok"
+            return result
+        finally:
+            metrics.observe("handler_seconds", route, perf_counter() - start)
+            metrics.count("events_total", route, outcome)
+
+    async def load_state(self, request: "Request", event: str = None) -> CommandState:
+        """
+        Returns the command state carried by an interactive payload, encoded
+        by slack_pack_state(): the value of the action `event`, or of the first
+        action; or else the view private_metadata.
+
+        Raises
+        ------
+        StateError
+            When the payload carries no state, or the state is not valid.
+        """
+        if self.state is None:
+            raise RuntimeError(f"{self.name}: no StateCodec; use the `state` parameter")
+
+        body = request.body
+        actions = [
+            action
+            for action in body.get("actions") or ()
+            if event is None or action.get("action_id") == event
+        ]
+        if actions:
+            text = actions[0].get("value") or actions[0].get("selected_option", {})
+            text = text.get("value") if isinstance(text, dict) else text
+        else:
+            text = (body.get("view") or {}).get("private_metadata")
+
+        if not text:
+            raise StateError("The payload carries no state")
+
+        return CommandState.load(await self.state.unpack(text))
+
+    async def dispatch_many(self, request: "Request", events: List[str] = None):
+        """
+        Run the handlers for each of the events in an interactive payload, for
+        example when Slack delivers more than one action in a block_actions
+        payload.  By default the events are taken from the request body; see
+        `payload_event_ids`.  The handlers are run concurrently.
+
+        Returns
+        -------
+        list
+            The handler results, in the same order as the events.
+        """
+        if events is None:
+            events = payload_event_ids(request.body)
+
+        return await asyncio.gather(*(self.emit(request, event) for event in events))
 
 
 # -----------------------------------------------------------------------------
@@ -352,13 +1564,20 @@ class AsyncSlackClickGroup(SlackClickHelper, Group):
 #                   Monkey-Patching Click for Asyncio Support
 # -----------------------------------------------------------------------------
 
-# the click context "context var" is used to support asyncio environments; and
-# the following private function _contextvar_get_current_context is
-# monkeypatched into the Click package do avoid the use of the threading.local
-# stack (as implemented in Click).
+# the click context of the current invocation is held in a "context var" (see
+# slack_click.invocation) to support asyncio environments; and the following
+# private function _contextvar_get_current_context is monkeypatched into the
+# Click package so that the pass_obj and pass_context decorators find the
+# context after the Click threading.local stack has been popped; that is, when
+# the command coroutine is awaited.  The patch is not applied on import: it is
+# installed by the first Slack command invocation, or explicitly using
+# install_click_context().  The Click stack is always checked first, so the
+# patch does not change the behavior of other Click commands.
+
 
+g_click_context_installed = False
 
-g_click_context = ContextVar("click_context")
+_click_get_current_context = click.decorators.get_current_context
 
 
 def _contextvar_get_current_context(silent=False):
@@ -376,11 +1595,29 @@ def _contextvar_get_current_context(silent=False):
                    is available.  The default behavior is to raise a
                    :exc:`RuntimeError`.
     """
-    try:
-        return g_click_context.get()
-    except LookupError:
-        if not silent:
-            raise RuntimeError("There is no active click context.")
+    if (ctx := _click_get_current_context(silent=True)) is not None:
+        return ctx
+
+    if (ctx := current_click_context()) is None and not silent:
+        raise RuntimeError("There is no active click context.")
+
+    return ctx
+
+
+def install_click_context():
+    """
+    Patch the Click decorators to find the current context of a Slack command
+    invocation.  Called by the first Slack command invocation; call it
+    explicitly if Click decorated functions are called otherwise, for example
+    from an interactive event handler.
+    """
+    global g_click_context_installed
+    click.decorators.get_current_context = _contextvar_get_current_context
+    g_click_context_installed = True
 
 
-click.decorators.get_current_context = _contextvar_get_current_context
+def uninstall_click_context():
+    """Restore the original Click decorators context function."""
+    global g_click_context_installed
+    click.decorators.get_current_context = _click_get_current_context
+    g_click_context_installed = False
@@ -0,0 +1,275 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from collections import OrderedDict
+from functools import wraps
+from time import monotonic
+import asyncio
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from .invocation import current_click_context, g_invocation
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["ResultCache", "cache_result"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+# the Slack command payload field that identifies each cache scope.
+SCOPE_FIELDS = {
+    "global": None,
+    "team": "team_id",
+    "channel": "channel_id",
+    "user": "user_id",
+}
+
+_MISSING = object()
+
+
+class ResultCache(object):
+    """
+    A TTL cache of command results with bounded LRU eviction.  While a result
+    is being computed, other invocations with the same key wait for it rather
+    than computing it again.  A None result, from a callback that replies with
+    `say` rather than returning its message, is neither cached nor shared.
+    The cache is only used from the asyncio event loop and so requires no
+    locking.
+
+    Parameters
+    ----------
+    ttl: float
+        The number of seconds a result is cached.
+
+    maxsize: int
+        The maximum number of cached results.
+
+    clock: Callable
+        Returns the current time in seconds; time.monotonic by default.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 30.0,
+        maxsize: int = 256,
+        clock: Callable[[], float] = monotonic,
+    ):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.clock = clock
+        self._results: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = dict()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key: Hashable):
+        """Returns the cached result for the key, or _MISSING."""
+        if (entry := self._results.get(key)) is None:
+            return _MISSING
+
+        expires, result = entry
+        if expires <= self.clock():
+            del self._results[key]
+            return _MISSING
+
+        self._results.move_to_end(key)
+        return result
+
+    def put(self, key: Hashable, result: Any):
+        self._results[key] = (self.clock() + self.ttl, result)
+        self._results.move_to_end(key)
+        while len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Any]):
+        """
+        Returns the cached result for the key; otherwise the result of the
+        in-flight computation for the key, or of calling compute() and awaiting
+        the coroutine it returns.  A failed computation is not cached.
+        """
+        if (result := self.get(key)) is not _MISSING:
+            self.hits += 1
+            return result
+
+        task = self._inflight.get(key)
+        if shared := task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.get_running_loop().create_task(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+
+        # the computation is shared; a waiter that is cancelled does not
+        # cancel it for the others.
+        result = await asyncio.shield(task)
+
+        # a None result was not a message; the waiter computes its own.
+        if result is None and shared:
+            return await compute()
+
+        return result
+
+    def clear(self):
+        self._results.clear()
+
+    def stats(self) -> dict:
+        return dict(
+            size=len(self._results),
+            inflight=len(self._inflight),
+            hits=self.hits,
+            misses=self.misses,
+            coalesced=self.coalesced,
+        )
+
+    def __len__(self):
+        return len(self._results)
+
+    # -------------------------------------------------------------------------
+    #                                 PRIVATE
+    # -------------------------------------------------------------------------
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+        if not task.cancelled() and task.exception() is None:
+            if (result := task.result()) is not None:
+                self.put(key, result)
+
+
+def cache_result(
+    ttl: float = 30.0,
+    scope: str = "global",
+    maxsize: int = 256,
+    cache: Optional[ResultCache] = None,
+):
+    """
+    Decorator for the async callback of a read-only command that caches the
+    message the callback returns, and sends it to the User with `say`.  The
+    cache key is the command event_id, the parameters of the command and of
+    the groups above it, and the scope.  The callback must return its message:
+    a None result is not cached.  Outside of a Slack command invocation, for
+    example when the callback is called directly, the callback is not cached.
+
+        @cli.command("status")
+        @click.argument("service")
+        @click.pass_obj
+        @cache_result(ttl=30, scope="team")
+        async def status(request, service):
+            return f"{service} is {await lookup(service)}"
+
+    Parameters
+    ----------
+    ttl: float
+        The number of seconds a result is cached.
+
+    scope: str
+        Who shares the cached results: "global", "team", "channel", or "user".
+
+    maxsize: int
+        The maximum number of cached results.
+
+    cache: ResultCache
+        The cache to use; by default each decorated callback has its own.
+        The cache is available as the `cache` attribute of the callback.
+    """
+    if scope not in SCOPE_FIELDS:
+        raise ValueError(f"Unknown cache scope '{scope}'")
+
+    field = SCOPE_FIELDS[scope]
+    cache = cache or ResultCache(ttl=ttl, maxsize=maxsize)
+
+    def decorator(func):
+        @wraps(func)
+        def new_callback(*vargs, **kwargs):
+            ctx = current_click_context()
+            invocation = g_invocation.get(None)
+            if ctx is None or (request := getattr(invocation, "request", None)) is None:
+                return func(*vargs, **kwargs)
+
+            scope_id = request.body.get(field, "") if field else ""
+            key = _cache_key(ctx.command.event_id, scope_id, _path_params(ctx))
+
+            async def run_cached():
+                if key is None:
+                    message = await func(*vargs, **kwargs)
+                else:
+                    message = await cache.get_or_compute(
+                        key, lambda: func(*vargs, **kwargs)
+                    )
+
+                if isinstance(message, (str, dict)):
+                    payload = (
+                        dict(text=message) if isinstance(message, str) else message
+                    )
+                    await request.context["say"](**payload)
+
+            return run_cached()
+
+        new_callback.cache = cache
+        return new_callback
+
+    return decorator
+
+
+def _path_params(ctx) -> List[dict]:
+    """Returns the parameters of each context, from the top-level command."""
+    path_params = list()
+    while ctx is not None:
+        path_params.append(ctx.params)
+        ctx = ctx.parent
+    path_params.reverse()
+    return path_params
+
+
+def _cache_key(
+    event_id: str, scope_id: str, path_params: List[dict]
+) -> Optional[Hashable]:
+    """Returns the cache key, or None when the parameters are not hashable."""
+    try:
+        key = (
+            event_id,
+            scope_id,
+            tuple(tuple(sorted(_freeze(params).items())) for params in path_params),
+        )
+        hash(key)
+    except TypeError:
+        return None
+
+    return key
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return {name: _freeze(item) for name, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
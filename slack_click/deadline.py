@@ -0,0 +1,279 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Awaitable, Callable, Coroutine, Dict, Hashable, Optional
+import asyncio
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = [
+    "Deadline",
+    "DeadlineExceeded",
+    "InflightTasks",
+    "run_with_deadline",
+    "DeferrableSay",
+    "RespondSay",
+    "g_inflight",
+]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+
+class Deadline(object):
+    """
+    The latency limits of a command, declared using the `deadline` parameter
+    of a command or group.  A deadline declared on a group applies to all of
+    the commands below it that do not declare their own.
+
+    Parameters
+    ----------
+    budget: float
+        The number of seconds the command is expected to take.  When the
+        budget runs out the command is either deferred or cancelled, according
+        to `on_budget`.
+
+    timeout: float
+        The number of seconds after which the command is always cancelled.
+
+    on_budget: str
+        "defer": send the User an interim message, and send the rest of the
+        command messages using the request response_url.
+        "cancel": cancel the command.
+
+    supersede: bool
+        When True, a User re-running the command in the same channel cancels
+        the invocation that is still running.
+    """
+
+    __slots__ = ("budget", "timeout", "on_budget", "supersede")
+
+    def __init__(
+        self,
+        budget: Optional[float] = None,
+        timeout: Optional[float] = None,
+        on_budget: str = "defer",
+        supersede: bool = False,
+    ):
+        if on_budget not in ("defer", "cancel"):
+            raise ValueError(f"Unknown on_budget action '{on_budget}'")
+
+        self.budget = budget
+        self.timeout = timeout
+        self.on_budget = on_budget
+        self.supersede = supersede
+
+    def __repr__(self):
+        return (
+            f"Deadline(budget={self.budget}, timeout={self.timeout}, "
+            f"on_budget={self.on_budget!r}, supersede={self.supersede})"
+        )
+
+
+class DeadlineExceeded(Exception):
+    """
+    The command was cancelled; `reason` is "budget" or "timeout" when the
+    Deadline ran out, or "superseded" when the User re-ran the command.
+    """
+
+    def __init__(self, reason: str, seconds: Optional[float] = None):
+        super().__init__(reason, seconds)
+        self.reason = reason
+        self.seconds = seconds
+
+
+class InflightTasks(object):
+    """
+    The running command invocations that can be superseded, keyed by
+    (event_id, user_id, channel_id).  Only used from the asyncio event loop.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Task] = dict()
+        self._superseded = set()
+
+    def replace(self, key: Hashable, task: asyncio.Task):
+        """Register the task, cancelling the task it replaces, if any."""
+        if (prev := self._tasks.get(key)) is not None and not prev.done():
+            self._superseded.add(prev)
+            prev.cancel()
+
+        self._tasks[key] = task
+
+    def discard(self, key: Hashable, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        self._superseded.discard(task)
+
+    def superseded(self, task: asyncio.Task) -> bool:
+        return task in self._superseded
+
+    def __len__(self):
+        return len(self._tasks)
+
+
+async def run_with_deadline(
+    coro: Coroutine,
+    deadline: Deadline,
+    on_defer: Callable[[], Awaitable],
+    inflight: Optional[InflightTasks] = None,
+    key: Hashable = None,
+):
+    """
+    Run the command coroutine as a task, enforcing the deadline.
+
+    Parameters
+    ----------
+    coro:
+        The command coroutine.
+
+    deadline:
+        The limits to enforce.
+
+    on_defer:
+        Called when the budget runs out and the deadline action is "defer".
+
+    inflight:
+        When the deadline supersedes, the registry of running invocations.
+
+    key:
+        The inflight key of this invocation.
+
+    Returns
+    -------
+    The result of the command coroutine.
+
+    Raises
+    ------
+    DeadlineExceeded
+        When the command was cancelled.
+    """
+    loop = asyncio.get_running_loop()
+    task = loop.create_task(coro)
+    start = loop.time()
+
+    if deadline.supersede:
+        inflight.replace(key, task)
+
+    try:
+        budget, timeout = deadline.budget, deadline.timeout
+
+        if budget is not None and (timeout is None or budget < timeout):
+            done, _ = await asyncio.wait({task}, timeout=budget)
+            if not done:
+                if deadline.on_budget == "cancel":
+                    await _cancel(task)
+                    raise DeadlineExceeded("budget", budget)
+                await on_defer()
+
+        if timeout is not None:
+            remaining = max(0.0, timeout - (loop.time() - start))
+            done, _ = await asyncio.wait({task}, timeout=remaining)
+            if not done:
+                await _cancel(task)
+                raise DeadlineExceeded("timeout", timeout)
+
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if inflight is not None and inflight.superseded(task):
+                raise DeadlineExceeded("superseded")
+            raise
+
+    finally:
+        # if this invocation was itself cancelled, the command is as well.
+        if not task.done():
+            task.cancel()
+
+        if deadline.supersede:
+            inflight.discard(key, task)
+
+
+async def _cancel(task: asyncio.Task):
+    # wait for the cancelled command to finish; asyncio.wait does not raise
+    # the command's CancelledError, so a cancellation of the current task is
+    # not suppressed.
+    task.cancel()
+    await asyncio.wait({task})
+    if not task.cancelled():
+        task.exception()
+
+
+class DeferrableSay(object):
+    """
+    The `say` function of a command that has a Deadline.  It sends using the
+    request `say` function until the command is deferred, and then using the
+    request response_url.  It is installed before the command runs, so that a
+    handler that keeps a reference to `say` sends to the right place after
+    the command is deferred.
+    """
+
+    __slots__ = ("say",)
+
+    def __init__(self, say):
+        self.say = say
+
+    def defer(self, respond):
+        """Send the following messages using the request `respond` function."""
+        self.say = RespondSay(respond)
+
+    async def __call__(self, *vargs, **kwargs):
+        return await self.say(*vargs, **kwargs)
+
+
+class RespondSay(object):
+    """
+    A `say` function that sends messages using the request `respond` function;
+    that is, the Slack response_url.  Used when a command is deferred.
+    """
+
+    __slots__ = ("respond",)
+
+    # the message keys supported by the response_url.
+    _KEYS = {
+        "text",
+        "blocks",
+        "attachments",
+        "thread_ts",
+        "unfurl_links",
+        "unfurl_media",
+    }
+
+    def __init__(self, respond):
+        self.respond = respond
+
+    async def __call__(self, text=None, **kwargs):
+        message = dict(text) if isinstance(text, dict) else dict(text=text, **kwargs)
+        message = {
+            key: value
+            for key, value in message.items()
+            if key in self._KEYS and value is not None
+        }
+        return await self.respond(response_type="in_channel", **message)
+
+
+# the running invocations of commands that supersede, used by the slack-click
+# library.
+
+g_inflight = InflightTasks()
@@ -0,0 +1,142 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Dict, Optional, Tuple, Iterable
+
+# -----------------------------------------------------------------------------
+# Public Imports
+# -----------------------------------------------------------------------------
+
+from click import Command, MultiCommand
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["DispatchIndex"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+# marks a prefix that matches more than one command name.
+_AMBIGUOUS = object()
+
+
+class _DispatchNode(object):
+    """The routing table for the sub-commands of one group."""
+
+    __slots__ = ("commands", "aliases", "_prefixes")
+
+    def __init__(self):
+        self.commands: Dict[str, Command] = dict()
+        self.aliases: Dict[str, str] = dict()
+        self._prefixes: Optional[Dict[str, object]] = None
+
+    def add(self, name: str, cmd: Command, aliases: Iterable[str] = ()):
+        self.commands[name] = cmd
+        for alias in aliases:
+            self.aliases[alias] = name
+        self._prefixes = None
+
+    def lookup(self, token: str, prefix_match: bool) -> Optional[str]:
+        if token in self.commands:
+            return token
+
+        if (name := self.aliases.get(token)) is not None:
+            return name
+
+        if not prefix_match:
+            return None
+
+        if self._prefixes is None:
+            self._prefixes = self._build_prefixes()
+
+        name = self._prefixes.get(token)
+        return None if name is _AMBIGUOUS else name
+
+    def _build_prefixes(self) -> Dict[str, object]:
+        prefixes: Dict[str, object] = dict()
+        targets = dict(self.aliases)
+        targets.update((name, name) for name in self.commands)
+
+        for word, name in targets.items():
+            for end in range(1, len(word)):
+                prefix = word[:end]
+                if prefixes.setdefault(prefix, name) != name:
+                    prefixes[prefix] = _AMBIGUOUS
+
+        return prefixes
+
+
+class DispatchIndex(object):
+    """
+    A compiled routing index for a tree of Click groups.  The index holds a
+    routing table for each group, keyed by the group event_id, that matches
+    command aliases and, optionally, any unambiguous prefix of a command name
+    or alias, in addition to the command names.  The index replaces the
+    lookup of each sub-command; Click still makes the context of each group
+    along the command path, since the group callbacks and options use them.
+
+    The index is updated incrementally as commands are added to the groups.
+
+    Parameters
+    ----------
+    prefix_match: bool
+        When True, a token matching the start of exactly one command name or
+        alias resolves to that command.  Off by default, so that a short token
+        does not run a command the User did not name.
+    """
+
+    def __init__(self, prefix_match: bool = False):
+        self.prefix_match = prefix_match
+        self._nodes: Dict[str, _DispatchNode] = dict()
+
+    def build(self, group: MultiCommand):
+        """Add the group, and all the groups below it, to the index."""
+        node = self._nodes[group.event_id] = _DispatchNode()
+
+        for name, cmd in getattr(group, "commands", {}).items():
+            node.add(name, cmd, getattr(cmd, "aliases", ()))
+            if isinstance(cmd, MultiCommand):
+                self.build(cmd)
+
+    def add(self, group: MultiCommand, name: str, cmd: Command):
+        """Add the command to the routing table of the group."""
+        if (node := self._nodes.get(group.event_id)) is None:
+            node = self._nodes[group.event_id] = _DispatchNode()
+
+        node.add(name, cmd, getattr(cmd, "aliases", ()))
+        if isinstance(cmd, MultiCommand):
+            self.build(cmd)
+
+    def resolve(self, group: MultiCommand, token: str) -> Optional[Tuple[str, Command]]:
+        """
+        Returns the (name, command) of the group sub-command matching the
+        token, or None if there is no match.
+        """
+        if (node := self._nodes.get(group.event_id)) is None:
+            return None
+
+        if (name := node.lookup(token, self.prefix_match)) is None:
+            return None
+
+        return name, node.commands[name]
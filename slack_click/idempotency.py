@@ -0,0 +1,211 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Callable
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha256
+import asyncio
+import json
+import time
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = [
+    "IdempotencyStore",
+    "MemoryIdempotencyStore",
+    "SQLiteIdempotencyStore",
+    "idempotency_key",
+]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+
+def idempotency_key(body: dict) -> str:
+    """
+    Returns the key that identifies a Slack command payload: the trigger_id,
+    which is unique to each User invocation, or else a fingerprint of the
+    payload.  A payload re-delivered by Slack has the same key.
+    """
+    if trigger_id := body.get("trigger_id"):
+        return f"trigger:{trigger_id}"
+
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":"), default=str)
+    return f"sha256:{sha256(canonical.encode()).hexdigest()}"
+
+
+class IdempotencyStore(ABC):
+    """
+    The interface of an idempotency store: records the keys of the payloads
+    that have been seen, for `ttl` seconds.  Subclass and implement claim() to
+    use another backend, for example one shared by all of the application
+    hosts.
+
+    Parameters
+    ----------
+    ttl: float
+        The number of seconds a key is remembered.
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self.claimed = 0
+        self.duplicates = 0
+
+    @abstractmethod
+    async def claim(self, key: str) -> bool:
+        """
+        Record the key.
+
+        Returns
+        -------
+        bool
+            True if the key was not already recorded; False if the payload is
+            a duplicate.
+        """
+
+    def stats(self) -> dict:
+        return dict(claimed=self.claimed, duplicates=self.duplicates)
+
+    def _count(self, is_new: bool) -> bool:
+        if is_new:
+            self.claimed += 1
+        else:
+            self.duplicates += 1
+        return is_new
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    """
+    An in-process idempotency store, bounded to `maxsize` keys; the oldest
+    keys are discarded first.
+
+    Parameters
+    ----------
+    ttl: float
+        The number of seconds a key is remembered.
+
+    maxsize: int
+        The maximum number of keys remembered.
+
+    clock: Callable
+        Returns the current time in seconds; time.monotonic by default.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        maxsize: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(ttl)
+        self.maxsize = maxsize
+        self.clock = clock
+        self._expires: "OrderedDict[str, float]" = OrderedDict()
+
+    async def claim(self, key: str) -> bool:
+        now = self.clock()
+
+        # keys are recorded in the order they expire.
+        while self._expires and next(iter(self._expires.values())) <= now:
+            self._expires.popitem(last=False)
+
+        if key in self._expires:
+            return self._count(False)
+
+        self._expires[key] = now + self.ttl
+        if len(self._expires) > self.maxsize:
+            self._expires.popitem(last=False)
+
+        return self._count(True)
+
+    def stats(self) -> dict:
+        return dict(super().stats(), size=len(self._expires))
+
+
+class SQLiteIdempotencyStore(IdempotencyStore):
+    """
+    An idempotency store in a SQLite database file, shared by the processes of
+    a host.  The database calls are made by a thread of the store, so that
+    they do not block the event loop.
+
+    Parameters
+    ----------
+    path: str
+        The database file; created if it does not exist.
+
+    ttl: float
+        The number of seconds a key is remembered.
+
+    prune_every: int
+        The number of claims between deleting the expired keys.
+    """
+
+    def __init__(self, path: str, ttl: float = 300.0, prune_every: int = 1000):
+        super().__init__(ttl)
+        self.path = path
+        self.prune_every = prune_every
+        self._n_claims = 0
+
+        import sqlite3
+
+        # one thread makes all of the calls on the connection.
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="slack-click-idempotency"
+        )
+        self._db = sqlite3.connect(
+            path, timeout=5.0, isolation_level=None, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS slack_click_seen"
+            " (key TEXT PRIMARY KEY, expires REAL NOT NULL)"
+        )
+
+    async def claim(self, key: str) -> bool:
+        self._n_claims += 1
+        prune = self._n_claims % self.prune_every == 0
+        loop = asyncio.get_running_loop()
+        is_new = await loop.run_in_executor(self._executor, self._claim, key, prune)
+        return self._count(is_new)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self._db.close()
+
+    def _claim(self, key: str, prune: bool) -> bool:
+        now = time.time()
+        if prune:
+            self._db.execute("DELETE FROM slack_click_seen WHERE expires <= ?", (now,))
+
+        # a recorded key that has expired is claimed again.
+        cursor = self._db.execute(
+            "INSERT INTO slack_click_seen (key, expires) VALUES (?, ?)"
+            " ON CONFLICT (key) DO UPDATE SET expires = excluded.expires"
+            " WHERE slack_click_seen.expires <= ?",
+            (key, now + self.ttl, now),
+        )
+        return cursor.rowcount == 1
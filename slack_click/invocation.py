@@ -0,0 +1,102 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Optional
+from contextvars import ContextVar
+
+# -----------------------------------------------------------------------------
+# Public Imports
+# -----------------------------------------------------------------------------
+
+import click
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = [
+    "Invocation",
+    "g_invocation",
+    "current_click_context",
+    "set_click_context",
+]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+
+class Invocation(object):
+    """
+    The state of one Slack command invocation, held in the g_invocation
+    contextvar for the duration of SlackClickHelper.main.
+
+    Tasks created while the command runs, for example with asyncio.create_task,
+    copy the contextvars context and so refer to the same Invocation.  When
+    the invocation is done it is closed, so that a task that outlives it does
+    not keep the Click contexts, or the request, alive.
+    """
+
+    __slots__ = ("ctx", "request", "overlay", "profiled")
+
+    def __init__(self, request=None):
+        self.ctx: Optional[click.Context] = None
+        self.request = request
+
+        # the TenantOverlay of the request team, if any; see slack_click.tenants.
+        self.overlay = None
+
+        # True while the invocation, or the event handler or invocation that
+        # runs it, is profiled; a nested invocation is not profiled again.
+        self.profiled = False
+
+    def close(self):
+        self.ctx = None
+        self.request = None
+        self.overlay = None
+        self.profiled = False
+
+
+g_invocation: ContextVar = ContextVar("slack_click_invocation")
+
+
+def current_click_context() -> Optional[click.Context]:
+    """
+    Returns the most recent Click context of the current invocation; that is,
+    the context of the invoked command once parsing is done.  Returns None
+    outside of an invocation.
+    """
+    if (invocation := g_invocation.get(None)) is None:
+        return None
+    return invocation.ctx
+
+
+def set_click_context(ctx: click.Context):
+    """
+    Record the Click context in the current invocation.  When called outside
+    of an invocation, for example by calling make_context directly, an
+    invocation is started in the current contextvars context.
+    """
+    if (invocation := g_invocation.get(None)) is None:
+        invocation = Invocation()
+        g_invocation.set(invocation)
+
+    invocation.ctx = ctx
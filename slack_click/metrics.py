@@ -0,0 +1,275 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Dict, Tuple, Sequence, List, Optional
+from bisect import bisect_left
+from time import perf_counter
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["MetricsRegistry", "Histogram", "InvocationProbe", "g_metrics"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+# latency histogram bucket upper bounds, in seconds.
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# the metric descriptions used in the Prometheus text output.
+_HELP = {
+    "commands_total": "Slash-command invocations by outcome.",
+    "events_total": "Interactive event invocations by outcome.",
+    "parse_seconds": "Time spent parsing the command with Click.",
+    "handler_seconds": "Time spent running the command or event handler.",
+    "say_seconds": "Time spent sending messages with say.",
+    "offload_wait_seconds": "Time an offloaded callback waited for the executor.",
+    "offload_run_seconds": "Time an offloaded callback ran in the executor.",
+    "scheduler_wait_seconds": "Time a request waited for the scheduler, by class.",
+    "scheduler_total": "Requests run or shed by the scheduler, by class.",
+    "transport_seconds": "Time a Slack call took, by Web API method.",
+    "transport_total": "Slack calls by Web API method and outcome.",
+}
+
+# the name of the first label of a metric family, when not "event_id".
+_LABELS = {
+    "scheduler_wait_seconds": "class",
+    "scheduler_total": "class",
+    "transport_seconds": "method",
+    "transport_total": "method",
+}
+
+MetricKey = Tuple[str, str]
+
+
+class Histogram(object):
+    """A fixed-bucket latency histogram."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Returns the list of (le, cumulative count), ending with +Inf."""
+        total = 0
+        result = list()
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((repr(bound), total))
+        result.append(("+Inf", self.count))
+        return result
+
+
+class MetricsRegistry(object):
+    """
+    Collects the per-command metrics, keyed by the command event_id; the
+    scheduler metrics are keyed by the scheduler class name, and the transport
+    metrics by the Web API method, and are labeled "class" and "method"
+    instead.  The registry is only updated from the asyncio event loop, so plain dictionary
+    counters are used and no locking is required.  When the registry is not
+    enabled the library does not collect anything.
+
+    Parameters
+    ----------
+    enabled: bool
+        Whether metrics are collected.
+
+    buckets: Sequence[float]
+        The latency histogram bucket upper bounds, in seconds.
+    """
+
+    def __init__(
+        self, enabled: bool = False, buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.enabled = enabled
+        self.buckets = tuple(sorted(buckets))
+        self.counters: Dict[str, Dict[MetricKey, int]] = dict()
+        self.histograms: Dict[str, Dict[str, Histogram]] = dict()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.counters.clear()
+        self.histograms.clear()
+
+    def count(self, name: str, event_id: str, outcome: str, value: int = 1):
+        family = self.counters.get(name)
+        if family is None:
+            family = self.counters[name] = dict()
+
+        key = (event_id, outcome)
+        family[key] = family.get(key, 0) + value
+
+    def observe(self, name: str, event_id: str, seconds: float):
+        family = self.histograms.get(name)
+        if family is None:
+            family = self.histograms[name] = dict()
+
+        if (hist := family.get(event_id)) is None:
+            hist = family[event_id] = Histogram(self.buckets)
+
+        hist.observe(seconds)
+
+    def start(self, request, event_id: str) -> "InvocationProbe":
+        """Returns a probe used to measure one command invocation."""
+        return InvocationProbe(self, request, event_id)
+
+    # -------------------------------------------------------------------------
+    # Reporting
+    # -------------------------------------------------------------------------
+
+    def snapshot(self) -> dict:
+        """
+        Returns a copy of the collected metrics:
+
+            {"counters": {name: {event_id: {outcome: count}}},
+             "histograms": {name: {event_id: {"count", "sum", "buckets"}}}}
+        """
+        counters = dict()
+        for name, family in self.counters.items():
+            by_event = counters[name] = dict()
+            for (event_id, outcome), value in family.items():
+                by_event.setdefault(event_id, dict())[outcome] = value
+
+        histograms = dict()
+        for name, family in self.histograms.items():
+            histograms[name] = {
+                event_id: dict(
+                    count=hist.count, sum=hist.sum, buckets=dict(hist.cumulative())
+                )
+                for event_id, hist in family.items()
+            }
+
+        return dict(counters=counters, histograms=histograms)
+
+    def render_prometheus(self, prefix: str = "slack_click") -> str:
+        """Returns the metrics in the Prometheus text exposition format."""
+        lines = list()
+
+        for name, family in self.counters.items():
+            metric = f"{prefix}_{name}"
+            key = _LABELS.get(name, "event_id")
+            lines.append(f"# HELP {metric} {_HELP.get(name, name)}")
+            lines.append(f"# TYPE {metric} counter")
+            for (event_id, outcome), value in family.items():
+                labels = f'{key}="{_escape(event_id)}",outcome="{outcome}"'
+                lines.append(f"{metric}{{{labels}}} {value}")
+
+        for name, family in self.histograms.items():
+            metric = f"{prefix}_{name}"
+            key = _LABELS.get(name, "event_id")
+            lines.append(f"# HELP {metric} {_HELP.get(name, name)}")
+            lines.append(f"# TYPE {metric} histogram")
+            for event_id, hist in family.items():
+                label = f'{key}="{_escape(event_id)}"'
+                for le, count in hist.cumulative():
+                    lines.append(f'{metric}_bucket{{{label},le="{le}"}} {count}')
+                lines.append(f"{metric}_sum{{{label}}} {hist.sum}")
+                lines.append(f"{metric}_count{{{label}}} {hist.count}")
+
+        lines.append("")
+        return "\n".join(lines)
+
+
+class InvocationProbe(object):
+    """
+    Measures one command invocation: the parse time, the handler time, the
+    time spent in `say`, and the outcome.  While the probe is active, the
+    request `say` function is wrapped so that each call is timed.
+    """
+
+    __slots__ = ("registry", "request", "event_id", "_start", "_say")
+
+    def __init__(self, registry: MetricsRegistry, request, event_id: str):
+        self.registry = registry
+        self.request = request
+        self.event_id = event_id
+        self._say = request.context.say
+        request.context["say"] = self._timed_say
+        self._start = perf_counter()
+
+    async def _timed_say(self, *vargs, **kwargs):
+        start = perf_counter()
+        try:
+            return await self._say(*vargs, **kwargs)
+        finally:
+            self.registry.observe("say_seconds", self.event_id, perf_counter() - start)
+
+    def parsed(self, event_id: Optional[str]):
+        """Record the parse time; event_id identifies the command that was run."""
+        now = perf_counter()
+        if event_id:
+            self.event_id = event_id
+        self.registry.observe("parse_seconds", self.event_id, now - self._start)
+        self._start = now
+
+    def handled(self):
+        """Record the handler time."""
+        now = perf_counter()
+        self.registry.observe("handler_seconds", self.event_id, now - self._start)
+        self._start = now
+
+    def finish(self, outcome: str, event_id: Optional[str] = None):
+        """Record the invocation outcome, and restore the request `say`."""
+        if event_id:
+            self.event_id = event_id
+        self.registry.count("commands_total", self.event_id, outcome)
+        self.request.context["say"] = self._say
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# the metrics registry used by the slack-click library when one is not provided
+# to the top-level command; disabled until g_metrics.enable() is called.
+
+g_metrics = MetricsRegistry()
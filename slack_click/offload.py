@@ -0,0 +1,279 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import AsyncIterator, Callable, Iterator, Optional, Tuple, Any
+from concurrent.futures import Executor
+from contextvars import copy_context
+from time import time
+import asyncio
+import importlib
+import inspect
+import sys
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = [
+    "OffloadPool",
+    "is_sync_callback",
+    "is_process_offload",
+    "check_process_callback",
+    "call_command_callback",
+    "g_thread_pool",
+    "g_process_pool",
+]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+
+def is_sync_callback(callback: Callable) -> bool:
+    """
+    Returns True if the command callback is a plain (synchronous) function.
+    The Click decorators, such as pass_obj, wrap the callback; the original
+    function is examined.
+    """
+    func = inspect.unwrap(callback)
+    return not (asyncio.iscoroutinefunction(func) or inspect.isasyncgenfunction(func))
+
+
+class OffloadPool(object):
+    """
+    An executor used to run synchronous command callbacks off of the asyncio
+    event loop, with a limit on the number of callbacks running at the same
+    time.
+
+    Parameters
+    ----------
+    kind: str
+        "thread" or "process"; the kind of executor created when one is not
+        provided.
+
+    executor: Executor
+        The executor to use; created on first use when not provided.
+
+    max_workers: int
+        The number of workers of the executor that is created.
+
+    max_concurrency: int
+        The maximum number of callbacks submitted to the executor at the same
+        time; further callbacks wait on the event loop.  Defaults to
+        `max_workers`, when given.
+    """
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        executor: Optional[Executor] = None,
+        max_workers: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown offload pool kind '{kind}'")
+
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency or max_workers
+        self._executor = executor
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._sem_loop = None
+
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "thread":
+                from concurrent.futures import ThreadPoolExecutor
+
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="slack-click"
+                )
+            else:
+                from concurrent.futures import ProcessPoolExecutor
+
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+        return self._executor
+
+    def stats(self) -> dict:
+        return dict(
+            kind=self.kind,
+            active=self.active,
+            waiting=self.waiting,
+            completed=self.completed,
+        )
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    async def run(self, func: Callable, *vargs) -> Tuple[Any, float, float]:
+        """
+        Run func(*vargs) in the executor.  For a thread pool the function runs
+        in a copy of the current contextvars context.
+
+        Returns
+        -------
+        tuple
+            The function result, the number of seconds spent waiting for the
+            executor, and the number of seconds spent running.
+        """
+        loop = asyncio.get_running_loop()
+        submitted = time()
+
+        if self.max_concurrency is not None and self._sem_loop is not loop:
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+            self._sem_loop = loop
+
+        self.waiting += 1
+        try:
+            if self._sem is not None:
+                await self._sem.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        try:
+            if self.kind == "thread":
+                call = (copy_context().run, _timed_call, func) + vargs
+            else:
+                call = (_timed_call, func) + vargs
+
+            started, result, finished = await loop.run_in_executor(self.executor, *call)
+        finally:
+            self.active -= 1
+            self.completed += 1
+            if self._sem is not None:
+                self._sem.release()
+
+        return result, max(0.0, started - submitted), finished - started
+
+    async def iterate(self, iterator: Iterator) -> AsyncIterator:
+        """
+        Iterate a synchronous iterator, for example the generator returned by
+        a command callback, advancing it in the executor.
+        """
+        while True:
+            done, item = (await self.run(_next_item, iterator))[0]
+            if done:
+                return
+            yield item
+
+
+def _next_item(iterator: Iterator):
+    # StopIteration cannot be raised into a Future.
+    try:
+        return False, next(iterator)
+    except StopIteration:
+        return True, None
+
+
+def _timed_call(func: Callable, *vargs):
+    started = time()
+    result = func(*vargs)
+    return started, result, time()
+
+
+def is_process_offload(offload) -> bool:
+    """Returns True if the offload setting runs callbacks in a process pool."""
+    if isinstance(offload, OffloadPool):
+        return offload.kind == "process"
+    return offload == "process"
+
+
+def check_process_callback(event_id: str, callback: Callable):
+    """
+    Check that a command callback can be run in a worker process by
+    call_command_callback.  The worker calls the original function with the
+    command parameters only, and finds it by its module and qualified name;
+    so the function must be defined at the module level, under its own name,
+    and must not be wrapped by a decorator such as click.pass_obj or
+    click.pass_context, whose arguments the worker cannot provide.
+
+    Raises
+    ------
+    ValueError
+        When the callback cannot be run in a worker process.
+    """
+    if callback is None or not is_sync_callback(callback):
+        return
+
+    func = inspect.unwrap(callback)
+    if func is not callback:
+        raise ValueError(
+            f"{event_id}: a callback run in a process is called with the command "
+            f"parameters only; remove pass_obj, pass_context, or any decorator "
+            f"that passes it arguments"
+        )
+
+    qualname = getattr(func, "__qualname__", "")
+    if "<" in qualname or qualname.split(".")[-1] != func.__name__:
+        raise ValueError(
+            f"{event_id}: a callback run in a process must be defined at the "
+            f"module level, not as {qualname}"
+        )
+
+    # the module attribute of that name is bound once the decorators return;
+    # one that is already bound must be this callback, or its command.
+
+    found = sys.modules.get(func.__module__)
+    for name in qualname.split("."):
+        found = getattr(found, name, None)
+
+    if (
+        found is not None
+        and inspect.unwrap(getattr(found, "callback", found)) is not func
+    ):
+        raise ValueError(
+            f"{event_id}: {func.__module__}.{qualname} is bound to another "
+            f"object, so the callback cannot be found in a worker process"
+        )
+
+
+def call_command_callback(module: str, qualname: str, params: dict):
+    """
+    Run a command callback in a worker process.  The command is located by
+    the module and qualified name of the decorated callback, which is the
+    name of the Click command object in that module; the original callback
+    function is called with the command parameters.
+    """
+    obj = importlib.import_module(module)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+
+    callback = getattr(obj, "callback", obj)
+    result = inspect.unwrap(callback)(**params)
+
+    # a generator cannot be returned from the worker process.
+    return list(result) if inspect.isgenerator(result) else result
+
+
+# the default pools used by the offload=True/"thread" and offload="process"
+# command parameters.
+
+g_thread_pool = OffloadPool(kind="thread")
+g_process_pool = OffloadPool(kind="process")
@@ -0,0 +1,249 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from bisect import bisect_left, bisect_right
+import re
+
+# -----------------------------------------------------------------------------
+# Public Imports
+# -----------------------------------------------------------------------------
+
+import click
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from .cache import ResultCache
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["OptionsIndex", "OptionTerms", "MAX_OPTIONS"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+# the maximum number of options in a Slack options-load response.
+MAX_OPTIONS = 100
+
+Option = Tuple[str, str]
+OptionProvider = Callable[[str], Awaitable[Iterable[Union[str, Option]]]]
+
+
+class OptionTerms(object):
+    """
+    The options of one source, sorted by their lower-cased text so that a
+    prefix query is answered by bisection.  The other queries are answered by
+    searching a single newline-joined string of the texts, rather than each
+    text in turn.
+    """
+
+    __slots__ = ("keys", "options", "haystack", "offsets")
+
+    def __init__(self, options: Iterable[Union[str, Option]]):
+        pairs = sorted(
+            (_as_option(option) for option in options), key=lambda o: o[0].lower()
+        )
+        self.options: List[Option] = pairs
+        self.keys: List[str] = [text.lower().replace("\n", " ") for text, _ in pairs]
+        self.haystack = "\n".join(self.keys)
+
+        # the offset in the haystack at which each key starts.
+        self.offsets: List[int] = list()
+        offset = 0
+        for key in self.keys:
+            self.offsets.append(offset)
+            offset += len(key) + 1
+
+    def search(self, query: str, limit: int) -> List[Option]:
+        """
+        Returns up to `limit` options matching the query: those that start
+        with it, then those that contain it, then those that contain its
+        characters in order.
+        """
+        query = query.strip().lower()
+        if not query:
+            return self.options[:limit]
+
+        found = list()
+        seen = set()
+
+        at = bisect_left(self.keys, query)
+        while at < len(self.keys) and self.keys[at].startswith(query):
+            found.append(at)
+            seen.add(at)
+            if len(found) == limit:
+                return [self.options[idx] for idx in found]
+            at += 1
+
+        # the keys containing the query, then the keys containing the query
+        # characters in order.
+
+        fuzzy = "[^\n]*?".join(map(re.escape, query))
+        for pattern in (re.escape(query), fuzzy):
+            for match in re.finditer(pattern, self.haystack):
+                idx = bisect_right(self.offsets, match.start()) - 1
+                if idx not in seen:
+                    found.append(idx)
+                    seen.add(idx)
+                    if len(found) == limit:
+                        return [self.options[idx] for idx in found]
+
+        return [self.options[idx] for idx in found]
+
+    def __len__(self):
+        return len(self.options)
+
+
+class OptionsIndex(object):
+    """
+    The options served for Slack options-load (external select) requests.
+    Each source of options is named, by convention, after the Click tree:
+
+        "<group event_id>"                  the names of the group commands
+        "<command event_id>.<param name>"   the values of a click.Choice
+
+    Dynamic sources are provided by an async function of the query; their
+    results are cached for `ttl` seconds.
+
+    Parameters
+    ----------
+    limit: int
+        The maximum number of options returned.
+    """
+
+    def __init__(self, limit: int = MAX_OPTIONS):
+        self.limit = limit
+        self._terms: Dict[str, OptionTerms] = dict()
+        self._groups = set()  # the sources of the group command names
+        self._providers: Dict[str, Tuple[OptionProvider, ResultCache]] = dict()
+
+    def build(self, group: click.MultiCommand, event_id: str = None):
+        """Index the command names and Choice values of the group tree."""
+        event_id = event_id or group.event_id
+        self._terms[event_id] = OptionTerms(group.commands)
+        self._groups.add(event_id)
+        for name, cmd in group.commands.items():
+            self._index_command(event_id, name, cmd)
+
+    def add_command(self, group: click.MultiCommand, name: str, cmd: click.Command):
+        """Update the index for a command added to the group."""
+        self._terms[group.event_id] = OptionTerms(group.commands)
+        self._groups.add(group.event_id)
+        self._index_command(group.event_id, name, cmd)
+
+    def add(self, source: str, options: Iterable[Union[str, Option]]):
+        """Index a static list of options; each a str or a (text, value)."""
+        self._terms[source] = OptionTerms(options)
+
+    def register(
+        self,
+        source: str,
+        provider: OptionProvider,
+        ttl: float = 60.0,
+        maxsize: int = 1024,
+    ):
+        """
+        Register a dynamic source; provider(query) returns the options, each a
+        str or a (text, value).
+        """
+        self._providers[source] = (provider, ResultCache(ttl=ttl, maxsize=maxsize))
+
+    @property
+    def sources(self) -> List[str]:
+        return sorted(set(self._terms) | set(self._providers))
+
+    async def search(self, source: str, query: str, limit: int = None) -> List[Option]:
+        """Returns the options of the source matching the query."""
+        limit = limit or self.limit
+        if (entry := self._providers.get(source)) is not None:
+            provider, cache = entry
+
+            async def load():
+                return OptionTerms(await provider(query))
+
+            terms = await cache.get_or_compute(query, load)
+            return terms.search(query, limit)
+
+        if (terms := self._terms.get(source)) is not None:
+            return terms.search(query, limit)
+
+        return []
+
+    async def options_load(
+        self, body: dict, is_hidden: Optional[Callable[[str], bool]] = None
+    ) -> dict:
+        """
+        Returns the response to a Slack options-load payload.  The source is
+        the action_id of the select element; or the name of a dialog element.
+
+        `is_hidden` is called with an event_id, and returns True for the
+        commands hidden from the User, such as TenantOverlay.is_hidden: the
+        source of a hidden command has no options, and the names of hidden
+        commands are not options of their group.
+        """
+        source = body.get("action_id") or body.get("name") or ""
+        query = body.get("value") or ""
+
+        if is_hidden is None:
+            options = await self.search(source, query)
+        elif is_hidden(source):
+            options = []
+        elif source in self._groups:
+            found = await self.search(source, query, limit=len(self._terms[source]))
+            options = [
+                option for option in found if not is_hidden(f"{source}.{option[1]}")
+            ][: self.limit]
+        else:
+            options = await self.search(source, query)
+
+        return dict(
+            options=[
+                dict(text=dict(type="plain_text", text=text[:75]), value=value)
+                for text, value in options
+            ]
+        )
+
+    # -------------------------------------------------------------------------
+    #                                 PRIVATE
+    # -------------------------------------------------------------------------
+
+    def _index_command(self, parent_id: str, name: str, cmd: click.Command):
+        event_id = getattr(cmd, "event_id", None) or f"{parent_id}.{name}"
+        for param in cmd.params:
+            if isinstance(param.type, click.Choice):
+                self._terms[f"{event_id}.{param.name}"] = OptionTerms(
+                    param.type.choices
+                )
+
+        if isinstance(cmd, click.MultiCommand):
+            self.build(cmd, event_id)
+
+
+def _as_option(option: Union[str, Option]) -> Option:
+    if isinstance(option, str):
+        return option, option
+    text, value = option
+    return str(text), str(value)
@@ -0,0 +1,404 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Dict, List, Optional, Any
+from collections import deque
+from functools import partial
+import asyncio
+import logging
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from .ratelimit import TokenBucket
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["SlackOutbox", "OutboxSay", "OutboxCancelled"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+_log = logging.getLogger(__name__)
+
+# the message keys that are merged when messages are coalesced; messages with
+# different values for any other key, for example thread_ts, are not merged.
+_MERGED_KEYS = {"text", "attachments", "blocks"}
+
+# Slack message limits.
+MAX_BLOCKS = 50
+MAX_ATTACHMENTS = 100
+
+
+class OutboxCancelled(RuntimeError):
+    """
+    The error of a message future when the channel worker was cancelled, for
+    example at shutdown, before the message was posted.
+    """
+
+
+class _Batch(object):
+    """The messages from one request that are sent as a single post."""
+
+    __slots__ = ("key", "client", "channel", "options", "messages", "future", "created")
+
+    def __init__(self, key, client, channel, options, created):
+        self.key = key
+        self.client = client
+        self.channel = channel
+        self.options = options
+        self.messages: List[dict] = list()
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.created = created
+
+    def accepts(self, message: dict, options: dict) -> bool:
+        if options != self.options:
+            return False
+
+        # a message without blocks may become a section block when merged.
+        n_blocks = sum(len(msg.get("blocks") or ()) or 1 for msg in self.messages)
+        n_atts = sum(len(msg.get("attachments") or ()) for msg in self.messages)
+        return (
+            n_blocks + (len(message.get("blocks") or ()) or 1) <= MAX_BLOCKS
+            and n_atts + len(message.get("attachments") or ()) <= MAX_ATTACHMENTS
+        )
+
+
+class _ChannelQueue(object):
+    """The ordered queue of batches for one channel, and its rate limit."""
+
+    __slots__ = ("batches", "bucket", "worker")
+
+    def __init__(self, bucket: TokenBucket):
+        self.batches = deque()
+        self.bucket = bucket
+        self.worker: Optional[asyncio.Task] = None
+
+
+class SlackOutbox(object):
+    """
+    The SlackOutbox sends the messages for Slack requests.  Messages from the
+    same request that are sent within a short window are coalesced into a
+    single post, combining their text, attachments, and blocks.  The posts for
+    each channel are sent in order, and limited by a per-channel token bucket
+    that also honors the Slack Retry-After header on an HTTP 429 response.
+
+    Parameters
+    ----------
+    client:
+        The Slack Web API client used to post messages.  Any object with an
+        async `chat_postMessage(**kwargs)` method can be used.  When not
+        provided, the client of each request context is used.
+
+    window: float
+        The number of seconds to wait for more messages from the same request
+        before posting.
+
+    rate: float
+        The number of posts per second permitted for each channel.
+
+    burst: int
+        The number of posts permitted in a burst for each channel.
+
+    max_retries: int
+        The number of times a post is retried after a rate-limit response.
+
+    wait: bool
+        When False, the default, the request `say` function returns as soon as
+        the message is queued, with a future of the Slack API response; the
+        consecutive messages of a handler are coalesced.  When True, `say`
+        returns the Slack API response once the message is posted, as the
+        Slack-Bolt `say` does; a handler then waits for each post, so only
+        messages sent at the same time, for example by concurrent tasks, are
+        coalesced.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        window: float = 0.05,
+        rate: float = 1.0,
+        burst: int = 3,
+        max_retries: int = 3,
+        wait: bool = False,
+    ):
+        self.client = client
+        self.wait = wait
+        self.window = window
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+
+        self._channels: Dict[str, _ChannelQueue] = dict()
+        self._open: Dict[Any, _Batch] = dict()
+
+        self.posted = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.failed = 0
+        self.delay_total = 0.0
+        self.delay_max = 0.0
+
+    def bind(self, request) -> "OutboxSay":
+        """Returns a `say` function that sends the messages for the request."""
+        return OutboxSay(self, request)
+
+    def attach(self, request):
+        """Replace the request `say` function with one bound to this outbox."""
+        if not isinstance(request.context.get("say"), OutboxSay):
+            request.context["say"] = self.bind(request)
+
+    async def say(self, request, text=None, **kwargs) -> asyncio.Future:
+        """
+        Queue a message for the request channel, with the same arguments as the
+        Slack-Bolt `say` function.  The message is posted in the background.
+
+        Returns
+        -------
+        asyncio.Future
+            Resolves to the Slack API response of the post that contained the
+            message.
+        """
+        message = dict(text) if isinstance(text, dict) else dict(text=text, **kwargs)
+        message = {key: value for key, value in message.items() if value is not None}
+
+        context = request.context
+        channel = message.pop("channel", None) or context.channel_id
+        client = self.client or context.client
+        options = {
+            key: message.pop(key) for key in list(message) if key not in _MERGED_KEYS
+        }
+
+        loop = asyncio.get_running_loop()
+        key = id(request)
+
+        batch = self._open.get(key)
+        if (
+            batch is None
+            or batch.channel != channel
+            or not batch.accepts(message, options)
+        ):
+            batch = _Batch(key, client, channel, options, loop.time())
+            self._open[key] = batch
+            self._enqueue(batch)
+        else:
+            self.coalesced += 1
+
+        batch.messages.append(message)
+        return batch.future
+
+    def stats(self) -> dict:
+        depth = {
+            channel: len(queue.batches) for channel, queue in self._channels.items()
+        }
+        return dict(
+            queue_depth=sum(depth.values()),
+            channel_depth={channel: n for channel, n in depth.items() if n},
+            posted=self.posted,
+            coalesced=self.coalesced,
+            retries=self.retries,
+            failed=self.failed,
+            delay_avg=(self.delay_total / self.posted) if self.posted else 0.0,
+            delay_max=self.delay_max,
+        )
+
+    async def drain(self):
+        """Wait until all queued messages have been posted."""
+        while workers := [q.worker for q in self._channels.values() if q.worker]:
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    # -------------------------------------------------------------------------
+    #                                 PRIVATE
+    # -------------------------------------------------------------------------
+
+    def _enqueue(self, batch: _Batch):
+        if (queue := self._channels.get(batch.channel)) is None:
+            queue = self._channels[batch.channel] = _ChannelQueue(
+                TokenBucket(rate=self.rate, capacity=self.burst)
+            )
+
+        queue.batches.append(batch)
+        if queue.worker is None:
+            queue.worker = asyncio.get_running_loop().create_task(
+                self._run_channel(queue)
+            )
+            queue.worker.add_done_callback(partial(self._worker_done, queue))
+
+    async def _run_channel(self, queue: _ChannelQueue):
+        # the batch being posted stays at the head of the queue until it is
+        # posted, so that it is failed if the worker is cancelled.
+        loop = asyncio.get_running_loop()
+
+        try:
+            while queue.batches:
+                batch = queue.batches[0]
+
+                # wait for the coalescing window of the batch to close, and then
+                # for the channel rate limit.
+
+                if (wait := batch.created + self.window - loop.time()) > 0:
+                    await asyncio.sleep(wait)
+
+                while (wait := queue.bucket.delay()) > 0:
+                    await asyncio.sleep(wait)
+
+                if self._open.get(batch.key) is batch:
+                    del self._open[batch.key]
+
+                queue.bucket.try_acquire()
+                await self._post(queue, batch)
+                queue.batches.popleft()
+
+                delay = loop.time() - batch.created
+                self.delay_total += delay
+                self.delay_max = max(self.delay_max, delay)
+        finally:
+            queue.worker = None
+            self._abandon(queue)
+
+    def _worker_done(self, queue: _ChannelQueue, worker: asyncio.Task):
+        # a worker cancelled before it started does not run its finally block.
+        if queue.worker is worker:
+            queue.worker = None
+            self._abandon(queue)
+
+    def _abandon(self, queue: _ChannelQueue):
+        # when the worker is cancelled the batches it did not post are failed,
+        # so that a handler awaiting one does not wait forever.
+        pending = list(queue.batches)
+        queue.batches.clear()
+
+        for batch in pending:
+            if self._open.get(batch.key) is batch:
+                del self._open[batch.key]
+            if batch.future.done():
+                continue
+            self.failed += 1
+            batch.future.set_exception(
+                OutboxCancelled(f"outbox post to {batch.channel} cancelled")
+            )
+            batch.future.exception()
+
+    async def _post(self, queue: _ChannelQueue, batch: _Batch):
+        payload = merge_messages(batch.messages)
+        payload.update(batch.options)
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                resp = await batch.client.chat_postMessage(
+                    channel=batch.channel, **payload
+                )
+                self.posted += 1
+                batch.future.set_result(resp)
+                return
+
+            except Exception as exc:
+                if (
+                    retry_after := _retry_after(exc)
+                ) is None or attempt == self.max_retries:
+                    self.failed += 1
+                    _log.error(
+                        "slack-click outbox post to %s failed: %s", batch.channel, exc
+                    )
+                    batch.future.set_exception(exc)
+                    # the caller may not await the future; avoid the asyncio
+                    # "exception was never retrieved" warning.
+                    batch.future.exception()
+                    return
+
+                self.retries += 1
+                queue.bucket.block(retry_after)
+                await asyncio.sleep(retry_after)
+
+
+class OutboxSay(object):
+    """
+    A `say` function bound to a request that sends through a SlackOutbox.
+    Returns the Slack API response of the post; or, when the outbox does not
+    wait, the future of it.
+    """
+
+    __slots__ = ("outbox", "request")
+
+    def __init__(self, outbox: SlackOutbox, request):
+        self.outbox = outbox
+        self.request = request
+
+    async def __call__(self, text=None, **kwargs):
+        future = await self.outbox.say(self.request, text, **kwargs)
+        return await future if self.outbox.wait else future
+
+
+def merge_messages(messages: List[dict]) -> dict:
+    """
+    Merge the messages into a single Slack message.  When none of the messages
+    have blocks, the text is joined by newlines; otherwise the text of each
+    message without blocks becomes a section block, so that it is displayed
+    along with the other blocks.  Attachments are concatenated.
+    """
+    if len(messages) == 1:
+        return dict(messages[0])
+
+    merged = dict()
+    texts = [msg["text"] for msg in messages if msg.get("text")]
+    attachments = [att for msg in messages for att in msg.get("attachments") or ()]
+
+    if any(msg.get("blocks") for msg in messages):
+        blocks = list()
+        for msg in messages:
+            if msg.get("blocks"):
+                blocks.extend(msg["blocks"])
+            elif msg.get("text"):
+                blocks.append(
+                    dict(type="section", text=dict(type="mrkdwn", text=msg["text"]))
+                )
+        merged["blocks"] = blocks
+
+    if texts:
+        merged["text"] = "\n".join(texts)
+
+    if attachments:
+        merged["attachments"] = attachments
+
+    return merged
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    """
+    Returns the Retry-After seconds if the exception is a Slack rate-limit
+    error, as raised by the slack_sdk client, or None.
+    """
+    if (resp := getattr(exc, "response", None)) is None:
+        return None
+
+    if getattr(resp, "status_code", None) != 429:
+        return None
+
+    headers = getattr(resp, "headers", None) or {}
+    value = headers.get("Retry-After") or headers.get("retry-after") or 1
+    try:
+        return float(value[0] if isinstance(value, (list, tuple)) else value)
+    except ValueError:
+        return 1.0
@@ -0,0 +1,133 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import List, Tuple, Hashable, Optional, NamedTuple
+from collections import OrderedDict
+import shlex
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["shell_tokenize", "whitespace_tokenize", "ParseResult", "ParseCache"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+# Slack clients commonly replace the quotes the User typed with the
+# typographic variants; these are mapped back so that quoting works as the User
+# expects.
+
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+
+def whitespace_tokenize(text: str) -> List[str]:
+    """Split the command text on whitespace; the original slack-click behavior."""
+    return text.split()
+
+
+def shell_tokenize(text: str) -> List[str]:
+    """
+    Split the command text into arguments using shell-like quoting rules, so
+    that `add "my thing"` produces ["add", "my thing"].  Backslashes are not
+    treated as escape characters since Slack users do not expect them to be.
+    If the text contains an unbalanced quote, for example the apostrophe in
+    "don't", the text is split on whitespace instead.
+    """
+    text = text.translate(_SMART_QUOTES)
+
+    if '"' not in text and "'" not in text:
+        return text.split()
+
+    lexer = shlex.shlex(text, posix=True)
+    lexer.whitespace_split = True
+    lexer.commenters = ""
+    lexer.escape = ""
+
+    try:
+        return list(lexer)
+    except ValueError:
+        return text.split()
+
+
+class ParseResult(NamedTuple):
+    """The outcome of Click parsing the arguments for one command level."""
+
+    params: dict
+    protected_args: Tuple[str, ...]
+    args: Tuple[str, ...]
+
+
+class ParseCache(object):
+    """
+    A bounded LRU cache that maps a (command event_id, arguments) key to the
+    ParseResult produced by Click.  When a command is invoked with the same
+    arguments again, the Click parser is skipped and the context is populated
+    from the cached result.
+
+    Only successful parses are cached; usage errors and --help/--version are
+    always handled by Click.  Because parameter callbacks are not re-run on a
+    cache hit, use the cache for commands whose parameters are plain values.
+    Commands with click.File parameters are never cached.
+
+    Parameters
+    ----------
+    maxsize: int
+        The maximum number of cached entries.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._cache: "OrderedDict[Hashable, ParseResult]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    def get(self, key: Hashable) -> Optional[ParseResult]:
+        try:
+            result = self._cache[key]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        self._cache.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key: Hashable, result: ParseResult):
+        self._cache[key] = result
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return dict(
+            size=len(self._cache),
+            maxsize=self.maxsize,
+            hits=self.hits,
+            misses=self.misses,
+        )
@@ -0,0 +1,343 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Counter as CounterType, List, Optional, TYPE_CHECKING
+from collections import Counter, deque
+from time import perf_counter, time
+from random import random
+import asyncio
+import io
+import os
+
+# cProfile and pstats are imported when an invocation is profiled.
+
+if TYPE_CHECKING:  # pragma: no cover
+    from cProfile import Profile
+    from pstats import Stats
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["Profiler", "ProfileCapture"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+# only one cProfile profiler can be enabled at a time in a thread.
+g_cprofile_active = False
+
+
+class ProfileCapture(object):
+    """
+    The profile of one invocation.
+
+    Attributes
+    ----------
+    kind: str
+        "cprofile": the invocation was sampled and run under cProfile.  While
+        enabled, cProfile also sees the other tasks the event loop runs.
+
+        "tasks": the stack of the invocation task was sampled, every
+        `interval` seconds, at the points where it was suspended; that is
+        where the invocation was waiting.
+
+    samples: Counter
+        For a "tasks" capture, the number of samples of each stack.
+    """
+
+    __slots__ = (
+        "kind",
+        "event_id",
+        "args",
+        "user_id",
+        "started",
+        "seconds",
+        "profile",
+        "samples",
+    )
+
+    def __init__(
+        self,
+        kind: str,
+        event_id: str,
+        args: str,
+        user_id: str,
+        started: float,
+        seconds: float,
+        profile: Optional["Profile"] = None,
+        samples: Optional[CounterType[str]] = None,
+    ):
+        self.kind = kind
+        self.event_id = event_id
+        self.args = args
+        self.user_id = user_id
+        self.started = started
+        self.seconds = seconds
+        self.profile = profile
+        self.samples = samples
+
+    def pstats(self) -> "Stats":
+        """Returns the cProfile statistics of a "cprofile" capture."""
+        import pstats
+
+        if self.profile is None:
+            raise ValueError(f"A {self.kind!r} capture has no pstats")
+        return pstats.Stats(self.profile)
+
+    def pstats_text(self, sort: str = "cumulative", limit: int = 30) -> str:
+        """Returns the pstats report of a "cprofile" capture."""
+        stream = io.StringIO()
+        stats = self.pstats()
+        stats.stream = stream
+        stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    def collapsed(self) -> str:
+        """
+        Returns the capture as collapsed-stack text, one "frame;frame;... N"
+        line per stack, the input of flame graph tools.  For a "tasks" capture
+        N is the number of samples.  cProfile does not record whole stacks;
+        for a "cprofile" capture each line is a "caller;callee" pair and N is
+        the cumulative time of the callee from that caller, in microseconds.
+        """
+        if self.samples is not None:
+            return "".join(
+                f"{stack} {count}\n" for stack, count in self.samples.most_common()
+            )
+
+        lines = list()
+        for callee, (_, _, _, _, callers) in self.pstats().stats.items():
+            for caller, (_, _, _, cumtime) in callers.items():
+                if micros := int(cumtime * 1e6):
+                    stack = f"{_frame_name(*caller)};{_frame_name(*callee)}"
+                    lines.append(f"{stack} {micros}")
+        return "".join(f"{line}\n" for line in lines)
+
+    def __repr__(self):
+        return (
+            f"ProfileCapture({self.kind!r}, {self.event_id!r},"
+            f" seconds={self.seconds:.3f}, user_id={self.user_id!r})"
+        )
+
+
+def _frame_name(filename: str, lineno: int, func: str) -> str:
+    return f"{func} ({os.path.basename(filename)}:{lineno})"
+
+
+class _TaskSampler(object):
+    """Samples the stack of a task, from the event loop, at an interval."""
+
+    __slots__ = ("task", "interval", "loop", "samples", "handle")
+
+    def __init__(self, task: asyncio.Task, interval: float, delay: float = None):
+        self.task = task
+        self.interval = interval
+        self.loop = asyncio.get_running_loop()
+        self.samples: CounterType[str] = Counter()
+        self.handle = self.loop.call_later(
+            interval if delay is None else delay, self.sample
+        )
+
+    def sample(self):
+        if self.task.done():
+            return
+
+        stack = ";".join(
+            _frame_name(frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name)
+            for frame in _await_chain(self.task.get_coro())
+        )
+        self.samples[stack] += 1
+        self.handle = self.loop.call_later(self.interval, self.sample)
+
+    def stop(self):
+        self.handle.cancel()
+
+
+def _await_chain(coro):
+    """
+    Yields the frames of a suspended coroutine, from the outermost to the
+    point of suspension, by following what each awaits.  Task.get_stack()
+    returns only the outermost frame of a suspended coroutine.
+    """
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            return
+        yield frame
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+
+
+class _Run(object):
+    """The profiling of one invocation in progress."""
+
+    __slots__ = ("start", "profile", "sampler", "timer")
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.profile: Optional["Profile"] = None
+        self.sampler: Optional[_TaskSampler] = None
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class Profiler(object):
+    """
+    An opt-in profiler of the slack-click invocations, used with the
+    `profiler` parameter of the top-level command or group.  An invocation is
+    profiled when it is sampled, or when it runs longer than the threshold;
+    the captures are kept in a ring buffer.  An invocation that is neither
+    costs a call to random(), and a timer when there is a threshold.
+
+    Parameters
+    ----------
+    sample_rate: float
+        The fraction of invocations profiled from the start.
+
+    threshold: float
+        When provided, the invocations that are still running after this
+        number of seconds are profiled from then on, using the task sampler.
+
+    mode: str
+        How sampled invocations are profiled: "cprofile", or "tasks" for the
+        task sampler.
+
+    interval: float
+        The seconds between the samples of the task sampler.
+
+    capacity: int
+        The number of captures kept; the oldest are discarded first.
+
+    Examples
+    --------
+        profiler = Profiler(sample_rate=0.01, threshold=2.0)
+
+        @click.group(cls=AsyncSlackClickGroup, profiler=profiler)
+        ...
+
+        capture = profiler.latest("/clicker.report")
+        print(capture.pstats_text() if capture.kind == "cprofile" else capture.collapsed())
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        threshold: Optional[float] = None,
+        mode: str = "cprofile",
+        interval: float = 0.005,
+        capacity: int = 50,
+    ):
+        if mode not in ("cprofile", "tasks"):
+            raise ValueError(f"Unknown profiler mode '{mode}'")
+
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.mode = mode
+        self.interval = interval
+        self._captures: "deque[ProfileCapture]" = deque(maxlen=capacity)
+
+    def begin(self) -> Optional[_Run]:
+        """
+        Start profiling an invocation, when it is sampled or there is a
+        threshold; called from the task that runs the invocation.
+        """
+        global g_cprofile_active
+
+        if self.sample_rate and random() < self.sample_rate:
+            run = _Run()
+            if self.mode == "tasks":
+                run.sampler = _TaskSampler(asyncio.current_task(), self.interval)
+                return run
+            if not g_cprofile_active:
+                import cProfile
+
+                g_cprofile_active = True
+                run.profile = cProfile.Profile()
+                run.profile.enable()
+                return run
+
+        if self.threshold is None:
+            return None
+
+        run = _Run()
+        run.timer = asyncio.get_running_loop().call_later(
+            self.threshold, self._over_threshold, run, asyncio.current_task()
+        )
+        return run
+
+    def end(self, run: _Run, event_id: str, body: dict):
+        """Finish profiling an invocation; keep the capture, if any."""
+        global g_cprofile_active
+
+        seconds = perf_counter() - run.start
+        kind = "tasks"
+        samples = None
+
+        if run.profile is not None:
+            run.profile.disable()
+            g_cprofile_active = False
+            kind = "cprofile"
+        elif run.sampler is not None:
+            run.sampler.stop()
+            samples = run.sampler.samples
+        else:
+            run.timer.cancel()
+            return
+
+        user = body.get("user_id") or (body.get("user") or {}).get("id")
+        self._captures.append(
+            ProfileCapture(
+                kind,
+                event_id,
+                args=body.get("text", ""),
+                user_id=user,
+                started=time() - seconds,
+                seconds=seconds,
+                profile=run.profile,
+                samples=samples,
+            )
+        )
+
+    def captures(self, event_id: str = None) -> List[ProfileCapture]:
+        """Returns the captures, oldest first; only those of event_id if given."""
+        return [
+            capture
+            for capture in self._captures
+            if event_id is None or capture.event_id == event_id
+        ]
+
+    def latest(self, event_id: str = None) -> Optional[ProfileCapture]:
+        found = self.captures(event_id)
+        return found[-1] if found else None
+
+    def clear(self):
+        self._captures.clear()
+
+    def __len__(self):
+        return len(self._captures)
+
+    # -------------------------------------------------------------------------
+    #                                 PRIVATE
+    # -------------------------------------------------------------------------
+
+    def _over_threshold(self, run: _Run, task: asyncio.Task):
+        if not task.done():
+            run.sampler = _TaskSampler(task, self.interval, delay=0)
@@ -0,0 +1,92 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Callable
+from time import monotonic
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["TokenBucket"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+
+class TokenBucket(object):
+    """
+    A token bucket rate limiter.  Tokens are added at `rate` per second up to
+    `capacity`; each operation takes one token.  The bucket can also be blocked
+    for a period of time, for example when Slack responds with a Retry-After
+    header.
+
+    Parameters
+    ----------
+    rate: float
+        The number of tokens added per second.
+
+    capacity: float
+        The maximum number of tokens; the size of a permitted burst.
+
+    clock: Callable
+        Returns the current time in seconds; time.monotonic by default.
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated", "blocked_until", "clock")
+
+    def __init__(
+        self, rate: float, capacity: float, clock: Callable[[], float] = monotonic
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.updated = clock()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, tokens: float = 1.0) -> float:
+        """Returns the number of seconds until `tokens` are available."""
+        now = self.clock()
+        self._refill(now)
+
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < tokens:
+            wait = max(wait, (tokens - self.tokens) / self.rate)
+
+        return wait
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take the tokens if they are available now; returns True if taken."""
+        if self.delay(tokens) > 0:
+            return False
+
+        self.tokens -= tokens
+        return True
+
+    def block(self, seconds: float):
+        """Do not permit any operation for the next `seconds`."""
+        self.blocked_until = max(self.blocked_until, self.clock() + seconds)
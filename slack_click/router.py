@@ -0,0 +1,157 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Callable, Dict, List, Optional, Tuple, Union, Pattern
+from collections import OrderedDict
+import fnmatch
+import re
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["InteractiveRouter", "DuplicateRouteError", "payload_event_ids"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+Route = Union[str, Pattern]
+
+# marks an event that was looked up and did not match any pattern route.
+_NO_MATCH = object()
+
+
+class DuplicateRouteError(ValueError):
+    """Raised when a handler is registered for a route that already has one."""
+
+
+class InteractiveRouter(object):
+    """
+    Routes the interactive events, such as a button press, to the registered
+    handler.  Routes are either exact event_id strings, found by dictionary
+    lookup, or patterns.  A pattern route is either a compiled regular
+    expression, or a string containing shell-style wildcards ("*", "?", "[").
+    Pattern routes are tried in the order they were registered, and the
+    outcome for each event is remembered so that the patterns are scanned only
+    once per event_id.  The route that matched, rather than the event_id, is
+    used to label the event in metrics, so that a pattern route is counted
+    once however many event_ids it matches.
+
+    Parameters
+    ----------
+    memo_size: int
+        The maximum number of event_id pattern matches to remember.
+    """
+
+    def __init__(self, memo_size: int = 1024):
+        self.memo_size = memo_size
+        self._exact: Dict[str, Callable] = dict()
+        self._patterns: List[Tuple[Pattern, str, Callable]] = list()
+        self._memo: "OrderedDict[str, object]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._exact) + len(self._patterns)
+
+    def add(self, route: Route, handler: Callable):
+        """
+        Register the handler for the route.
+
+        Raises
+        ------
+        DuplicateRouteError
+            When the route already has a handler.
+        """
+        if isinstance(route, str) and not _is_wildcard(route):
+            if route in self._exact:
+                raise DuplicateRouteError(f"Route '{route}' already has a handler")
+            self._exact[route] = handler
+            return
+
+        pattern = (
+            route
+            if not isinstance(route, str)
+            else re.compile(fnmatch.translate(route))
+        )
+
+        if any(pattern.pattern == have.pattern for have, _, _ in self._patterns):
+            raise DuplicateRouteError(
+                f"Route '{pattern.pattern}' already has a handler"
+            )
+
+        label = route if isinstance(route, str) else route.pattern
+        self._patterns.append((pattern, label, handler))
+        self._memo.clear()
+
+    def match(self, event: str) -> Optional[Callable]:
+        """Returns the handler for the event, or None if there is not one."""
+        found = self.route(event)
+        return found[1] if found is not None else None
+
+    def route(self, event: str) -> Optional[Tuple[str, Callable]]:
+        """
+        Returns the (route, handler) for the event, or None if there is not
+        one.  The route is the event_id for an exact route, or the pattern as
+        registered.
+        """
+        if (handler := self._exact.get(event)) is not None:
+            return event, handler
+
+        if not self._patterns:
+            return None
+
+        if (found := self._memo.get(event)) is None:
+            found = next(
+                (
+                    (label, func)
+                    for pattern, label, func in self._patterns
+                    if pattern.fullmatch(event)
+                ),
+                _NO_MATCH,
+            )
+            self._memo[event] = found
+            if len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+
+        return None if found is _NO_MATCH else found
+
+
+def _is_wildcard(route: str) -> bool:
+    return any(char in route for char in "*?[")
+
+
+def payload_event_ids(body: dict) -> List[str]:
+    """
+    Returns the list of event IDs found in an interactive payload body: the
+    action_id of each block_actions action, the view callback_id of a
+    view_submission or view_closed, or the action_id of an options (block
+    suggestion) request.
+    """
+    if actions := body.get("actions"):
+        return [action["action_id"] for action in actions if "action_id" in action]
+
+    if (view := body.get("view")) and body.get("type", "").startswith("view_"):
+        return [view["callback_id"]] if view.get("callback_id") else []
+
+    if action_id := body.get("action_id"):
+        return [action_id]
+
+    return []
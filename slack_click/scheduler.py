@@ -0,0 +1,340 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from contextvars import ContextVar
+from time import perf_counter
+import asyncio
+import heapq
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from .metrics import MetricsRegistry, g_metrics
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = [
+    "Scheduler",
+    "PriorityClass",
+    "SchedulerBusy",
+    "SchedulerSlot",
+    "DEFAULT_CLASSES",
+]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+
+class PriorityClass(object):
+    """
+    A class of requests served by the Scheduler.
+
+    Parameters
+    ----------
+    name: str
+        The class name: "interactive", "help", or "command" are used by the
+        library.
+
+    priority: int
+        Waiting requests of a lower priority value are always run first.
+
+    max_queue: int
+        The maximum number of waiting requests; once reached, new requests of
+        the class are shed.
+    """
+
+    __slots__ = ("name", "priority", "max_queue")
+
+    def __init__(self, name: str, priority: int, max_queue: int = 1000):
+        self.name = name
+        self.priority = priority
+        self.max_queue = max_queue
+
+    def __repr__(self):
+        return (
+            f"PriorityClass({self.name!r}, priority={self.priority},"
+            f" max_queue={self.max_queue})"
+        )
+
+
+# interactive events are answered first, as the User is waiting on them; then
+# --help and --version; then the commands.
+
+DEFAULT_CLASSES = (
+    PriorityClass("interactive", 0, max_queue=1000),
+    PriorityClass("help", 1, max_queue=200),
+    PriorityClass("command", 2, max_queue=500),
+)
+
+# the Slack payload fields that identify the flow of a request, by fair_by.
+_FLOW_FIELDS = {
+    "user": ("team_id", "user_id"),
+    "team": ("team_id",),
+    "channel": ("team_id", "channel_id"),
+}
+
+
+class SchedulerBusy(Exception):
+    """Raised when a request is shed because the queue of its class is full."""
+
+    def __init__(self, kind: str, queued: int):
+        super().__init__(f"The {kind} queue is full ({queued} waiting)")
+        self.kind = kind
+        self.queued = queued
+
+
+class _ClassQueue(object):
+    """
+    The waiting requests of one class, ordered by start-time fair queueing:
+    each flow is given a virtual finish time advanced by 1/weight for each of
+    its requests, so that a flow sending many requests is interleaved with the
+    others rather than served ahead of them.
+    """
+
+    __slots__ = ("klass", "heap", "flows", "vtime", "waiting", "shed", "run", "seq")
+
+    def __init__(self, klass: PriorityClass):
+        self.klass = klass
+        self.heap: List[Tuple[float, int, float, asyncio.Future]] = list()
+        self.flows: Dict[Tuple, float] = dict()
+        self.vtime = 0.0
+        self.waiting = 0
+        self.shed = 0
+        self.run = 0
+        self.seq = 0
+
+    def push(self, flow: Tuple, weight: float, waiter: asyncio.Future):
+        start = max(self.vtime, self.flows.get(flow, 0.0))
+        finish = start + 1.0 / weight
+        self.flows[flow] = finish
+        self.seq += 1
+        heapq.heappush(self.heap, (finish, self.seq, start, waiter))
+        self.waiting += 1
+
+    def pop(self) -> Optional[asyncio.Future]:
+        while self.heap:
+            _, _, start, waiter = heapq.heappop(self.heap)
+            if waiter.done():
+                # the waiter was cancelled, and already uncounted.
+                continue
+
+            self.waiting -= 1
+            self.vtime = start
+            if not self.heap:
+                # a flow that is behind the virtual time is equivalent to a
+                # new flow.
+                self.flows = {
+                    flow: finish
+                    for flow, finish in self.flows.items()
+                    if finish > self.vtime
+                }
+            return waiter
+        return None
+
+
+class Scheduler(object):
+    """
+    An in-process scheduler in front of the slack-click entry points, used
+    with the `scheduler` parameter of the top-level command or group.  At most
+    `concurrency` requests run at a time; the others wait in the queue of
+    their class.  The waiting class of the highest priority is served first,
+    and within a class the flows (the users, by default) are served by
+    weighted fair queueing.  A request that arrives when the queue of its
+    class is full is shed.
+
+    Parameters
+    ----------
+    concurrency: int
+        The maximum number of requests running at a time.
+
+    classes: Sequence[PriorityClass]
+        The request classes; by default DEFAULT_CLASSES.
+
+    fair_by: str
+        The flows that share a class: "user", "team", or "channel".
+
+    weight: Callable
+        Returns the weight of the flow of a request payload, for example by
+        team_id; a flow of weight 2 is served twice as often as a flow of
+        weight 1.  Each flow has weight 1 by default.
+
+    metrics: MetricsRegistry
+        Records the queue wait of each class as `scheduler_wait_seconds`, and
+        the run and shed counts as `scheduler_total`; the library default
+        registry is used when not provided.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 32,
+        classes: Sequence[PriorityClass] = DEFAULT_CLASSES,
+        fair_by: str = "user",
+        weight: Optional[Callable[[dict], float]] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        if fair_by not in _FLOW_FIELDS:
+            raise ValueError(f"Unknown fair_by '{fair_by}'")
+
+        self.concurrency = concurrency
+        self.fair_by = fair_by
+        self.weight = weight
+        self.metrics = metrics
+        self.running = 0
+        self._fields = _FLOW_FIELDS[fair_by]
+        self._queues: Dict[str, _ClassQueue] = {
+            klass.name: _ClassQueue(klass) for klass in classes
+        }
+        self._order = sorted(self._queues.values(), key=lambda q: q.klass.priority)
+
+    async def acquire(self, kind: str, body: dict) -> "SchedulerSlot":
+        """
+        Wait for a slot to run a request of the class `kind`.
+
+        Raises
+        ------
+        SchedulerBusy
+            When the request is shed.
+        """
+        queue = self._queues[kind]
+        metrics = self.metrics or g_metrics
+
+        # run at once when there is a free slot and no request is waiting.
+
+        if self.running < self.concurrency and not any(q.waiting for q in self._order):
+            return self._grant(queue, metrics, 0.0)
+
+        if queue.waiting >= queue.klass.max_queue:
+            queue.shed += 1
+            if metrics.enabled:
+                metrics.count("scheduler_total", kind, "shed")
+            raise SchedulerBusy(kind, queue.waiting)
+
+        flow = tuple(_payload_field(body, field) for field in self._fields)
+        weight = self.weight(body) if self.weight else 1.0
+        waiter = asyncio.get_running_loop().create_future()
+        queue.push(flow, weight, waiter)
+
+        start = perf_counter()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.cancelled():
+                queue.waiting -= 1
+            else:
+                # the slot was granted as the waiter was cancelled.
+                self._release()
+            raise
+
+        return self._grant(queue, metrics, perf_counter() - start, counted=True)
+
+    def holds(self) -> bool:
+        """
+        True when the current invocation already holds a slot of this
+        scheduler; for example, an event handler that runs a command.  The
+        nested request runs in that slot: waiting for another would deadlock
+        once every slot is held by a request waiting on itself.
+        """
+        slot = g_held_slot.get()
+        return slot is not None and slot.scheduler is self
+
+    def stats(self) -> dict:
+        return dict(
+            running=self.running,
+            classes={
+                name: dict(waiting=q.waiting, run=q.run, shed=q.shed)
+                for name, q in self._queues.items()
+            },
+        )
+
+    # -------------------------------------------------------------------------
+    #                                 PRIVATE
+    # -------------------------------------------------------------------------
+
+    def _grant(
+        self,
+        queue: _ClassQueue,
+        metrics: MetricsRegistry,
+        waited: float,
+        counted: bool = False,
+    ) -> "SchedulerSlot":
+        # a waiter is counted as running when it is woken by _release.
+        if not counted:
+            self.running += 1
+
+        queue.run += 1
+        if metrics.enabled:
+            metrics.observe("scheduler_wait_seconds", queue.klass.name, waited)
+            metrics.count("scheduler_total", queue.klass.name, "run")
+
+        return SchedulerSlot(self, waited)
+
+    def _release(self):
+        self.running -= 1
+        while self.running < self.concurrency:
+            waiter = next(
+                (w for q in self._order if q.waiting and (w := q.pop())), None
+            )
+            if waiter is None:
+                return
+            self.running += 1
+            waiter.set_result(None)
+
+
+def _payload_field(body: dict, field: str) -> str:
+    # a slash-command payload has the field, e.g. "user_id"; an interactive
+    # payload has the object, e.g. {"user": {"id": ...}}.
+    if value := body.get(field):
+        return value
+    return (body.get(field[:-3]) or {}).get("id") or ""
+
+
+# the slot held by the current invocation, while it is used as a context
+# manager; see Scheduler.holds().
+g_held_slot: ContextVar = ContextVar("slack_click_scheduler_slot", default=None)
+
+
+class SchedulerSlot(object):
+    """A granted slot; release() must be called when the request is done."""
+
+    __slots__ = ("scheduler", "waited", "_token")
+
+    def __init__(self, scheduler: Scheduler, waited: float):
+        self.scheduler = scheduler
+        self.waited = waited
+        self._token = None
+
+    def release(self):
+        if self.scheduler is not None:
+            self.scheduler._release()
+            self.scheduler = None
+
+    def __enter__(self):
+        self._token = g_held_slot.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        g_held_slot.reset(self._token)
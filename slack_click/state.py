@@ -0,0 +1,398 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Any, Callable, Dict, List, Optional, Union
+from abc import ABC, abstractmethod
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+import binascii
+import hashlib
+import hmac
+import json
+import secrets
+import struct
+import time
+import zlib
+
+# -----------------------------------------------------------------------------
+# Public Imports
+# -----------------------------------------------------------------------------
+
+import click
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = [
+    "StateCodec",
+    "CommandState",
+    "StateStore",
+    "MemoryStateStore",
+    "StateError",
+    "StateTooLarge",
+    "MAX_ACTION_VALUE",
+    "MAX_PRIVATE_METADATA",
+    "DEFAULT_TTL",
+]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+# the Slack limits on the length of a block element action value, and of the
+# private_metadata of a view.
+MAX_ACTION_VALUE = 2000
+MAX_PRIVATE_METADATA = 3000
+
+# the header of an encoded state: the flags byte and the expiry time, in epoch
+# seconds; followed by the truncated HMAC, then the data.
+_HEADER = struct.Struct(">BI")
+_MAC_SIZE = 16
+
+# the number of seconds an encoded state is accepted, by default.
+DEFAULT_TTL = 86400.0
+
+_VERSION = 0x10
+_COMPRESSED = 0x01
+_STORED = 0x02
+
+
+class StateError(ValueError):
+    """Raised when an encoded state is malformed, forged, or has expired."""
+
+
+class StateTooLarge(StateError):
+    """Raised when a state does not fit the size limit, and there is no store."""
+
+
+class StateStore(ABC):
+    """
+    The interface of the store used for the states too large to be carried by
+    a Slack payload.  Subclass and implement put() and get() to use another
+    backend, for example one shared by all of the application hosts.
+
+    Parameters
+    ----------
+    ttl: float
+        The number of seconds a state is kept.  When not provided, the store
+        keeps a state as long as the StateCodec it is given to accepts the
+        encoded key; DEFAULT_TTL if it is used on its own.
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl
+
+    @property
+    def expires_after(self) -> float:
+        """The number of seconds a state is kept."""
+        return DEFAULT_TTL if self.ttl is None else self.ttl
+
+    @abstractmethod
+    async def put(self, key: str, data: bytes):
+        """Store the data for the key, for `ttl` seconds."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Returns the data stored for the key, or None if there is none."""
+
+
+class MemoryStateStore(StateStore):
+    """
+    An in-process state store, bounded to `maxsize` states; the oldest states
+    are discarded first.
+
+    Parameters
+    ----------
+    ttl: float
+        The number of seconds a state is kept; by default the ttl of the
+        StateCodec.
+
+    maxsize: int
+        The maximum number of states kept.
+
+    clock: Callable
+        Returns the current time in seconds; time.monotonic by default.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        maxsize: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(ttl)
+        self.maxsize = maxsize
+        self.clock = clock
+        self._states: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def put(self, key: str, data: bytes):
+        now = self.clock()
+
+        # states are stored in the order they expire.
+        while self._states and next(iter(self._states.values()))[0] <= now:
+            self._states.popitem(last=False)
+
+        self._states[key] = (now + self.expires_after, data)
+        if len(self._states) > self.maxsize:
+            self._states.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if (entry := self._states.get(key)) is None:
+            return None
+        expires, data = entry
+        return data if expires > self.clock() else None
+
+    def __len__(self):
+        return len(self._states)
+
+
+class CommandState(object):
+    """
+    The state of a command invocation, carried by an interactive payload: the
+    command event_id, the parsed parameters of each command on the command
+    path, and any extra values.
+    """
+
+    __slots__ = ("event_id", "path_params", "extra")
+
+    def __init__(
+        self, event_id: str, path_params: List[Dict[str, Any]], extra: dict = None
+    ):
+        self.event_id = event_id
+        self.path_params = path_params
+        self.extra = extra or {}
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        """The parsed parameters of the command."""
+        return self.path_params[-1] if self.path_params else {}
+
+    @classmethod
+    def from_context(cls, ctx: click.Context, **extra) -> "CommandState":
+        chain = list()
+        while ctx is not None:
+            chain.append(ctx)
+            ctx = ctx.parent
+        chain.reverse()
+
+        leaf = chain[-1].command
+        return cls(
+            event_id=getattr(leaf, "event_id", None) or leaf.name,
+            path_params=[dict(each.params) for each in chain],
+            extra=extra,
+        )
+
+    def dump(self) -> dict:
+        state = dict(e=self.event_id, p=self.path_params)
+        if self.extra:
+            state["x"] = self.extra
+        return state
+
+    @classmethod
+    def load(cls, state: dict) -> "CommandState":
+        try:
+            return cls(state["e"], state["p"], state.get("x"))
+        except (KeyError, TypeError):
+            raise StateError("Not a command state")
+
+
+class StateCodec(object):
+    """
+    Encodes a state into a string short enough for the `value` of a block
+    element, or the `private_metadata` of a view, so that an interaction
+    carries its own state and needs no server-side lookup.
+
+    The state is serialized as compact JSON, compressed with deflate when that
+    makes it smaller, signed with a truncated HMAC-SHA256, and encoded as
+    base64url.  A state that is still too large is kept in the `store`, and
+    the string carries the signed key.
+
+    Parameters
+    ----------
+    secret: str or bytes
+        The HMAC key; shared by the application hosts.
+
+    limit: int
+        The maximum length of an encoded state.
+
+    ttl: float
+        The number of seconds an encoded state is accepted.
+
+    store: StateStore
+        The store for the states that do not fit `limit`; when not provided,
+        StateTooLarge is raised for them.  A store without its own ttl is
+        given the codec ttl, so that a stored state lives as long as its key.
+
+    compress_min: int
+        The serialized size, in bytes, from which compression is tried.
+    """
+
+    def __init__(
+        self,
+        secret: Union[str, bytes],
+        limit: int = MAX_ACTION_VALUE,
+        ttl: float = DEFAULT_TTL,
+        store: Optional[StateStore] = None,
+        compress_min: int = 64,
+    ):
+        if not secret:
+            raise ValueError("StateCodec requires a secret")
+
+        self.secret = secret.encode() if isinstance(secret, str) else secret
+        self.limit = limit
+        self.ttl = ttl
+        self.store = store
+        if store is not None and store.ttl is None:
+            store.ttl = ttl
+        self.compress_min = compress_min
+        self.inline = 0
+        self.stored = 0
+
+    def encode(self, state: Any, limit: int = None) -> str:
+        """
+        Returns the encoded state; the state is any JSON serializable value.
+
+        Raises
+        ------
+        StateTooLarge
+            When the encoded state is longer than the limit.
+        """
+        flags, data = self._serialize(state)
+        text = self._seal(flags, data)
+        if len(text) > (limit or self.limit):
+            raise StateTooLarge(
+                f"Encoded state is {len(text)} characters; the limit is"
+                f" {limit or self.limit}"
+            )
+        return text
+
+    def decode(self, text: str) -> Any:
+        """
+        Returns the state of a string returned by encode().
+
+        Raises
+        ------
+        StateError
+            When the string is malformed, its signature does not match, or it
+            has expired; or when it refers to a stored state.
+        """
+        flags, data = self._open(text)
+        if flags & _STORED:
+            raise StateError("The state is stored; use unpack()")
+        return self._deserialize(flags, data)
+
+    async def pack(self, state: Any, limit: int = None) -> str:
+        """
+        Returns the encoded state; when it does not fit the limit, the state
+        is kept in the store and the encoded key is returned.
+        """
+        flags, data = self._serialize(state)
+        text = self._seal(flags, data)
+        if len(text) <= (limit or self.limit):
+            self.inline += 1
+            return text
+
+        if self.store is None:
+            raise StateTooLarge(
+                f"Encoded state is {len(text)} characters; the limit is"
+                f" {limit or self.limit}"
+            )
+
+        key = secrets.token_urlsafe(12)
+        await self.store.put(key, bytes([flags]) + data)
+        self.stored += 1
+        return self._seal(_STORED, key.encode())
+
+    async def unpack(self, text: str) -> Any:
+        """Returns the state of a string returned by pack()."""
+        flags, data = self._open(text)
+        if not flags & _STORED:
+            return self._deserialize(flags, data)
+
+        if self.store is None:
+            raise StateError("The state is stored, and the codec has no store")
+
+        if (stored := await self.store.get(data.decode())) is None:
+            raise StateError("The stored state has expired")
+        return self._deserialize(stored[0], stored[1:])
+
+    def stats(self) -> dict:
+        return dict(inline=self.inline, stored=self.stored)
+
+    # -------------------------------------------------------------------------
+    #                                 PRIVATE
+    # -------------------------------------------------------------------------
+
+    def _serialize(self, state: Any):
+        data = json.dumps(
+            state, separators=(",", ":"), ensure_ascii=False, default=str
+        ).encode()
+        flags = _VERSION
+
+        if len(data) >= self.compress_min:
+            packer = zlib.compressobj(9, zlib.DEFLATED, -15)
+            packed = packer.compress(data) + packer.flush()
+            if len(packed) < len(data):
+                flags, data = flags | _COMPRESSED, packed
+
+        return flags, data
+
+    @staticmethod
+    def _deserialize(flags: int, data: bytes) -> Any:
+        try:
+            if flags & _COMPRESSED:
+                data = zlib.decompress(data, -15)
+            return json.loads(data)
+        except (zlib.error, ValueError):
+            raise StateError("Malformed state")
+
+    def _mac(self, header: bytes, data: bytes) -> bytes:
+        return hmac.new(self.secret, header + data, hashlib.sha256).digest()[:_MAC_SIZE]
+
+    def _seal(self, flags: int, data: bytes) -> str:
+        header = _HEADER.pack(flags | _VERSION, int(time.time() + self.ttl))
+        raw = header + self._mac(header, data) + data
+        return urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+    def _open(self, text: str):
+        try:
+            raw = urlsafe_b64decode(text + "=" * (-len(text) % 4))
+        except (binascii.Error, ValueError):
+            raise StateError("Malformed state")
+
+        if len(raw) < _HEADER.size + _MAC_SIZE:
+            raise StateError("Malformed state")
+
+        header = raw[: _HEADER.size]
+        mac = raw[_HEADER.size : _HEADER.size + _MAC_SIZE]
+        data = raw[_HEADER.size + _MAC_SIZE :]
+
+        if not hmac.compare_digest(mac, self._mac(header, data)):
+            raise StateError("The state signature does not match")
+
+        flags, expires = _HEADER.unpack(header)
+        if flags & 0xF0 != _VERSION:
+            raise StateError("Unknown state version")
+        if expires < time.time():
+            raise StateError("The state has expired")
+
+        return flags, data
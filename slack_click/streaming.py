@@ -0,0 +1,293 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import AsyncIterator, Iterable, List, Optional, Union
+import asyncio
+import inspect
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = [
+    "Stream",
+    "MessagePacker",
+    "stream_output",
+    "is_stream",
+    "pack_text",
+    "MAX_TEXT",
+]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+# the size of each message sent; the Slack limit for the text of a section
+# block, and well below the point where Slack truncates message text.
+MAX_TEXT = 3000
+
+FENCE = "```"
+
+# the characters reserved in each message for re-opening and closing a code
+# fence that spans messages.
+_FENCE_RESERVE = 2 * (len(FENCE) + 1)
+
+
+class Stream(object):
+    """
+    How the output of a command is sent when the command callback is a
+    generator, declared using the `stream` parameter of a command or group.
+
+    Parameters
+    ----------
+    mode: str
+        "post": each message is posted once it is full.
+        "update": a message is posted, then updated with chat.update as the
+        output arrives, at most once per `interval` seconds; once full, a new
+        message is started.
+
+    limit: int
+        The maximum number of characters in each message.
+
+    interval: float
+        The minimum number of seconds between updates of a message.
+
+    code: bool
+        When True, the output is displayed as a code block.
+    """
+
+    __slots__ = ("mode", "limit", "interval", "code")
+
+    def __init__(
+        self,
+        mode: str = "post",
+        limit: int = MAX_TEXT,
+        interval: float = 1.0,
+        code: bool = False,
+    ):
+        if mode not in ("post", "update"):
+            raise ValueError(f"Unknown stream mode '{mode}'")
+
+        self.mode = mode
+        self.limit = limit
+        self.interval = interval
+        self.code = code
+
+
+class MessagePacker(object):
+    """
+    Packs streamed text into messages of at most `limit` characters.  Messages
+    are split on line boundaries; a line longer than a message is split.  A
+    code fence that is open when a message is split is closed at the end of
+    that message and re-opened at the start of the next.
+
+    Parameters
+    ----------
+    limit: int
+        The maximum number of characters in each message.
+
+    code: bool
+        When True, the entire output is a code block.
+    """
+
+    def __init__(self, limit: int = MAX_TEXT, code: bool = False):
+        self.budget = max(1, limit - _FENCE_RESERVE)
+        self._lines: List[str] = list()
+        self._size = 0
+        self._partial = ""
+        self._in_fence = code
+        self._opened_in_fence = code
+
+    def feed(self, text: str) -> List[str]:
+        """Add streamed text; returns the messages that are now full."""
+        text = self._partial + text
+        *lines, self._partial = text.split("\n")
+
+        messages = list()
+        for line in lines:
+            self._add_line(line, messages)
+        return messages
+
+    def flush(self) -> List[str]:
+        """Returns the remaining messages."""
+        messages = list()
+        if self._partial:
+            self._add_line(self._partial, messages)
+            self._partial = ""
+
+        if self._lines:
+            messages.append(self._render())
+            self._lines, self._size = list(), 0
+
+        return messages
+
+    def peek(self) -> str:
+        """Returns the current, incomplete, message; empty if there is none."""
+        lines = self._lines + ([self._partial] if self._partial else [])
+        return self._render(lines) if lines else ""
+
+    # -------------------------------------------------------------------------
+    #                                 PRIVATE
+    # -------------------------------------------------------------------------
+
+    def _add_line(self, line: str, messages: List[str]):
+        while len(line) > self.budget:
+            self._add_line(line[: self.budget], messages)
+            line = line[self.budget :]
+
+        if self._lines and self._size + len(line) + 1 > self.budget:
+            messages.append(self._render())
+            self._lines, self._size = list(), 0
+            self._opened_in_fence = self._in_fence
+
+        self._lines.append(line)
+        self._size += len(line) + 1
+
+        if line.lstrip().startswith(FENCE):
+            self._in_fence = not self._in_fence
+
+    def _render(self, lines: List[str] = None) -> str:
+        text = "\n".join(self._lines if lines is None else lines)
+        if self._opened_in_fence:
+            text = f"{FENCE}\n{text}"
+        if self._in_fence:
+            text = f"{text}\n{FENCE}"
+        return text
+
+
+def pack_text(text: str, limit: int = MAX_TEXT, code: bool = False) -> List[str]:
+    """Returns the text split into messages of at most `limit` characters."""
+    packer = MessagePacker(limit=limit, code=code)
+    return packer.feed(text) + packer.flush()
+
+
+def is_stream(obj) -> bool:
+    """Returns True if a command callback result is streamed output."""
+    return inspect.isasyncgen(obj) or inspect.isgenerator(obj)
+
+
+class _MessageUpdater(object):
+    """Posts a message, then updates it with chat.update at a bounded rate."""
+
+    def __init__(self, client, channel: str, interval: float):
+        self.client = client
+        self.channel = channel
+        self.interval = interval
+        self.ts: Optional[str] = None
+        self.shown = ""
+        self.last = 0.0
+        self.posted = 0
+
+    async def show(self, text: str, final: bool = False):
+        if not text or text == self.shown:
+            if final:
+                self.ts, self.shown = None, ""
+            return
+
+        loop = asyncio.get_running_loop()
+        if (wait := self.last + self.interval - loop.time()) > 0:
+            if not final:
+                return
+            await asyncio.sleep(wait)
+
+        if self.ts is None:
+            resp = await self.client.chat_postMessage(channel=self.channel, text=text)
+            self.ts = resp["ts"]
+            self.posted += 1
+        else:
+            await self.client.chat_update(channel=self.channel, ts=self.ts, text=text)
+
+        self.shown = text
+        self.last = loop.time()
+
+        # the next text starts a new message.
+        if final:
+            self.ts, self.shown = None, ""
+
+
+async def stream_output(
+    chunks: Union[Iterable[str], AsyncIterator[str]],
+    say,
+    stream: Stream,
+    client=None,
+    channel: Optional[str] = None,
+) -> int:
+    """
+    Send the streamed output of a command.
+
+    Parameters
+    ----------
+    chunks:
+        The output; a sync or async iterable of strings.  Each string is one
+        or more lines of text; a string that does not end with a newline is
+        ended with one.
+
+    say:
+        The request `say` function, used in "post" mode.
+
+    stream:
+        How the output is sent.
+
+    client, channel:
+        The Slack Web API client and the channel, used in "update" mode.
+
+    Returns
+    -------
+    int
+        The number of messages sent.
+    """
+    packer = MessagePacker(limit=stream.limit, code=stream.code)
+    updater = (
+        _MessageUpdater(client, channel, stream.interval)
+        if stream.mode == "update"
+        else None
+    )
+    n_posted = 0
+
+    async def send(text: str, final: bool = True):
+        nonlocal n_posted
+        if updater is not None:
+            await updater.show(text, final=final)
+        else:
+            await say(text=text)
+            n_posted += 1
+
+    async for chunk in _aiter(chunks):
+        text = str(chunk)
+        for message in packer.feed(text if text.endswith("\n") else text + "\n"):
+            await send(message)
+
+        if updater is not None:
+            await send(packer.peek(), final=False)
+
+    for message in packer.flush():
+        await send(message)
+
+    return updater.posted if updater is not None else n_posted
+
+
+async def _aiter(chunks):
+    if hasattr(chunks, "__aiter__"):
+        async for chunk in chunks:
+            yield chunk
+    else:
+        for chunk in chunks:
+            yield chunk
@@ -0,0 +1,186 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["BKTree", "edit_distance", "did_you_mean"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+
+def edit_distance(a: str, b: str) -> int:
+    """
+    Returns the optimal string alignment distance between a and b: the
+    Levenshtein distance, where two adjacent letters that are transposed count
+    as one edit ("shwo" is 1 from "show").
+    """
+    return _Pattern(a).distance(b)
+
+
+class _Pattern(object):
+    """
+    A word prepared for computing its edit distance to other words with the
+    bit-parallel algorithm of Myers (1999), as extended by Hyyrö (2003) to
+    count transpositions: each column of the distance matrix is a bit vector,
+    so that each character of the other word costs a few integer operations,
+    not a row of the matrix.
+    """
+
+    __slots__ = ("size", "masks", "high")
+
+    def __init__(self, word: str):
+        self.size = len(word)
+        self.high = 1 << (self.size - 1) if word else 0
+        self.masks: Dict[str, int] = dict()
+        for bit, char in enumerate(word):
+            self.masks[char] = self.masks.get(char, 0) | (1 << bit)
+
+    def distance(self, other: str) -> int:
+        if not self.size:
+            return len(other)
+
+        everything = (1 << self.size) - 1
+        masks, high = self.masks, self.high
+        plus, minus, score = everything, 0, self.size
+        diag, prev_eq = 0, 0
+
+        for char in other:
+            eq = masks.get(char, 0)
+            swap = (((~diag & eq) << 1) & prev_eq) & everything
+            diag = ((((eq & plus) + plus) ^ plus) | eq | minus | swap) & everything
+            h_plus = minus | ~(diag | plus)
+            h_minus = plus & diag
+            if h_plus & high:
+                score += 1
+            elif h_minus & high:
+                score -= 1
+            h_plus = (h_plus << 1) | 1
+            h_minus <<= 1
+            plus = (h_minus | ~(diag | h_plus)) & everything
+            minus = h_plus & diag
+            prev_eq = eq
+
+        return score
+
+
+class _Node(object):
+    __slots__ = ("word", "children")
+
+    def __init__(self, word: str):
+        self.word = word
+        self.children: Dict[int, "_Node"] = dict()
+
+
+class BKTree(object):
+    """
+    A Burkhard-Keller tree of words, for finding the words within an edit
+    distance of a query without comparing the query to every word.  The
+    optimal string alignment distance does not always satisfy the triangle
+    inequality the tree relies on; a word can be missed only when edits
+    overlap, which a misspelled command name rarely has.
+
+    Parameters
+    ----------
+    words:
+        The words to add.
+    """
+
+    def __init__(self, words: Iterable[str] = ()):
+        self.root: Optional[_Node] = None
+        self.size = 0
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str):
+        if self.root is None:
+            self.root = _Node(word)
+            self.size = 1
+            return
+
+        pattern = _Pattern(word)
+        node = self.root
+        while True:
+            if (dist := pattern.distance(node.word)) == 0:
+                return
+            if (child := node.children.get(dist)) is None:
+                node.children[dist] = _Node(word)
+                self.size += 1
+                return
+            node = child
+
+    def search(self, word: str, max_distance: int) -> List[Tuple[int, str]]:
+        """Returns the (distance, word) within max_distance, closest first."""
+        found = list()
+        if self.root is None:
+            return found
+
+        pattern = _Pattern(word)
+        pending = [self.root]
+        while pending:
+            node = pending.pop()
+            dist = pattern.distance(node.word)
+            if dist <= max_distance:
+                found.append((dist, node.word))
+
+            # by the triangle inequality, only these children can match.
+            low, high = dist - max_distance, dist + max_distance
+            pending.extend(
+                child for d, child in node.children.items() if low <= d <= high
+            )
+
+        found.sort()
+        return found
+
+    def closest(self, word: str, max_distance: int = None, n: int = 3) -> List[str]:
+        """
+        Returns up to `n` of the closest words.  The default max_distance
+        scales with the length of the word, so that short words are not
+        matched to unrelated ones.
+        """
+        if max_distance is None:
+            max_distance = max(1, min(3, len(word) // 3))
+
+        found = self.search(word, max_distance)
+        if not found:
+            return []
+
+        # only the words as close as the closest are useful suggestions.
+        best = found[0][0]
+        return [found_word for dist, found_word in found if dist == best][:n]
+
+    def __len__(self):
+        return self.size
+
+
+def did_you_mean(words: List[str]) -> str:
+    """Returns the suggestion text for the words, or an empty string."""
+    if not words:
+        return ""
+    quoted = [f"`{word}`" for word in words]
+    if len(quoted) == 1:
+        return f" Did you mean {quoted[0]}?"
+    return f" Did you mean {', '.join(quoted[:-1])} or {quoted[-1]}?"
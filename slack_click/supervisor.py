@@ -0,0 +1,233 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Coroutine, Callable, Optional, Set, List
+import asyncio
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["TaskSupervisor", "g_supervisor"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+_log = logging.getLogger(__name__)
+
+# when set, the list of tasks spawned by the current invocation; see
+# TaskSupervisor.track()
+_g_tracked_tasks: ContextVar = ContextVar("slack_click_tracked_tasks", default=None)
+
+
+class TaskSupervisor(object):
+    """
+    The TaskSupervisor is used to run the "fire-and-forget" coroutines, such as
+    sending the `--help` or `--version` messages, as asyncio tasks.  The
+    supervisor holds a strong reference to each task until it is done, limits
+    the number of tasks running concurrently, and reports any task failure.
+
+    Parameters
+    ----------
+    max_concurrency: int
+        The maximum number of tasks that are running at the same time.  Tasks
+        spawned beyond this limit wait for a running task to complete.
+
+    max_pending: int
+        The maximum number of tasks waiting for a free slot.  When this limit is
+        reached, spawned coroutines are shed (closed without being run).
+
+    on_error: Callable
+        Called as on_error(exc, task) when a task raises an exception.  By
+        default the exception is logged.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 100,
+        max_pending: int = 1000,
+        on_error: Optional[Callable[[BaseException, asyncio.Task], None]] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.on_error = on_error or self._log_error
+
+        self._tasks: Set[asyncio.Task] = set()
+        self._sem: Optional[asyncio.BoundedSemaphore] = None
+        self._sem_loop = None
+        self._closed = False
+
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.shed = 0
+
+    @property
+    def pending(self) -> int:
+        """The number of tasks waiting for a free slot."""
+        return len(self._tasks) - self.active
+
+    @property
+    def outstanding(self) -> int:
+        """The number of tasks that are not yet done."""
+        return len(self._tasks)
+
+    def stats(self) -> dict:
+        return dict(
+            active=self.active,
+            pending=self.pending,
+            completed=self.completed,
+            failed=self.failed,
+            shed=self.shed,
+        )
+
+    def spawn(self, coro: Coroutine, name: str = None) -> Optional[asyncio.Task]:
+        """
+        Run the coroutine as a supervised task.
+
+        Returns
+        -------
+        asyncio.Task
+            The task running the coroutine, or None if the coroutine was shed
+            because the supervisor is at capacity or shutting down.
+        """
+        if self._closed or len(self._tasks) >= self.max_concurrency + self.max_pending:
+            self.shed += 1
+            _log.warning(
+                "slack-click supervisor shed task %s",
+                name or getattr(coro, "__qualname__", coro),
+            )
+            coro.close()
+            return None
+
+        loop = asyncio.get_running_loop()
+        if self._sem_loop is not loop:
+            self._sem = asyncio.BoundedSemaphore(self.max_concurrency)
+            self._sem_loop = loop
+
+        task = loop.create_task(self._run(coro), name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+
+        if (tracked := _g_tracked_tasks.get()) is not None:
+            tracked.append(task)
+
+        return task
+
+    @contextmanager
+    def track(self):
+        """
+        Context manager that collects the tasks spawned within the block, in
+        the current asyncio context, into the yielded list.  Used so that a
+        command invocation can await the messages that it sent.
+        """
+        tracked: List[asyncio.Task] = list()
+        token = _g_tracked_tasks.set(tracked)
+        try:
+            yield tracked
+        finally:
+            _g_tracked_tasks.reset(token)
+
+    async def join(self, timeout: float = None) -> bool:
+        """
+        Wait for all outstanding tasks, including any spawned while waiting.
+
+        Returns
+        -------
+        bool
+            True if all tasks are done, False if the timeout expired.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+
+        while self._tasks:
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return False
+            await asyncio.wait(set(self._tasks), timeout=remaining)
+
+        return True
+
+    async def shutdown(self, timeout: float = 10.0):
+        """
+        Gracefully drain the supervisor; for use when the process is
+        restarting.  New tasks are shed, outstanding tasks are given `timeout`
+        seconds to complete, and any that remain are cancelled.
+        """
+        self._closed = True
+
+        if await self.join(timeout):
+            return
+
+        remaining = list(self._tasks)
+        for task in remaining:
+            task.cancel()
+
+        await asyncio.gather(*remaining, return_exceptions=True)
+
+    # -------------------------------------------------------------------------
+    #                                 PRIVATE
+    # -------------------------------------------------------------------------
+
+    async def _run(self, coro: Coroutine):
+        started = False
+        try:
+            async with self._sem:
+                started = True
+                self.active += 1
+                try:
+                    return await coro
+                finally:
+                    self.active -= 1
+        finally:
+            if not started:
+                coro.close()
+
+    def _task_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+
+        if task.cancelled():
+            return
+
+        if (exc := task.exception()) is None:
+            self.completed += 1
+            return
+
+        self.failed += 1
+        self.on_error(exc, task)
+
+    @staticmethod
+    def _log_error(exc: BaseException, task: asyncio.Task):
+        _log.error(
+            "slack-click task %s failed",
+            task.get_name(),
+            exc_info=exc,
+        )
+
+
+# the supervisor used by the slack-click library when one is not provided to
+# the top-level command.
+
+g_supervisor = TaskSupervisor()
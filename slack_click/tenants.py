@@ -0,0 +1,198 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Callable, Dict, Iterable, Optional
+from collections import OrderedDict
+import hashlib
+import json
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["TenantOverlay", "TenantOverlays", "overlay_path"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+
+def overlay_path(event_id: str) -> str:
+    """
+    Returns the path of a command below the top-level command, as used by a
+    TenantOverlay: the sub-command names separated by spaces, for example
+    "admin purge"; the top-level command is "".
+    """
+    return " ".join(event_id.split(".")[1:])
+
+
+class TenantOverlay(object):
+    """
+    The changes made to a command tree for one tenant (a Slack team), applied
+    at request time; the tree itself is not changed.
+
+    Parameters
+    ----------
+    hidden: Iterable[str]
+        The paths of the commands, or groups, hidden from the tenant: they are
+        not listed in the help, and are a usage error when invoked.
+
+    default_map: dict
+        The Click default_map used for the tenant, for example
+        {"deploy": {"region": "eu-west-1"}}; see click.Context.
+
+    help: Dict[str, str]
+        The help text of the commands, by path, that replaces their own; the
+        top-level command is "".
+
+    Notes
+    -----
+    Overlays with the same content have the same `key`, and so share the
+    cached help renderings.  An overlay must not be changed once it is used;
+    replace it with TenantOverlays.set() instead.
+    """
+
+    __slots__ = ("hidden", "default_map", "help", "key")
+
+    def __init__(
+        self,
+        hidden: Iterable[str] = (),
+        default_map: Optional[dict] = None,
+        help: Optional[Dict[str, str]] = None,  # noqa
+    ):
+        self.hidden = frozenset(hidden)
+        self.default_map = default_map or None
+        self.help = dict(help or {})
+
+        content = json.dumps(
+            [sorted(self.hidden), self.default_map, self.help],
+            sort_keys=True,
+            default=str,
+        )
+        self.key = hashlib.sha1(content.encode()).hexdigest()[:16]
+
+    def is_hidden(self, event_id: str) -> bool:
+        """True when the command, or a group above it, is hidden."""
+        if not self.hidden:
+            return False
+
+        names = event_id.split(".")[1:]
+        return any(
+            " ".join(names[:depth]) in self.hidden for depth in range(1, len(names) + 1)
+        )
+
+    def help_text(self, event_id: str) -> Optional[str]:
+        """Returns the help text that replaces that of the command, if any."""
+        return self.help.get(overlay_path(event_id)) if self.help else None
+
+    def __repr__(self):
+        return (
+            f"TenantOverlay(hidden={sorted(self.hidden)}, "
+            f"default_map={self.default_map!r}, help={sorted(self.help)})"
+        )
+
+
+class TenantOverlays(object):
+    """
+    The overlays of the tenants served by one command tree, used with the
+    `tenants` parameter of the top-level command or group.  The overlay of a
+    request is found by the team id of its payload; a team without an overlay
+    uses the tree as it is.
+
+    Parameters
+    ----------
+    overlays: Dict[str, TenantOverlay]
+        The overlays by team id.
+
+    loader: Callable
+        Called with the team id of a team that is not in `overlays`; returns
+        its overlay, or None.  The results, including None, are cached.
+
+    maxsize: int
+        The maximum number of loader results cached; the least recently used
+        are discarded first.
+
+    Examples
+    --------
+        tenants = TenantOverlays({
+            "T0001": TenantOverlay(hidden=["admin"]),
+            "T0002": TenantOverlay(default_map={"deploy": {"region": "eu"}}),
+        })
+
+        @click.group(cls=AsyncSlackClickGroup, tenants=tenants)
+        ...
+    """
+
+    def __init__(
+        self,
+        overlays: Optional[Dict[str, TenantOverlay]] = None,
+        loader: Optional[Callable[[str], Optional[TenantOverlay]]] = None,
+        maxsize: int = 1024,
+    ):
+        self.overlays = dict(overlays or {})
+        self.loader = loader
+        self.maxsize = maxsize
+        self._loaded: "OrderedDict[str, Optional[TenantOverlay]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, team_id: str) -> Optional[TenantOverlay]:
+        """Returns the overlay of the team, or None."""
+        if (overlay := self.overlays.get(team_id)) is not None or self.loader is None:
+            return overlay
+
+        try:
+            overlay = self._loaded[team_id]
+            self._loaded.move_to_end(team_id)
+            self.hits += 1
+            return overlay
+        except KeyError:
+            pass
+
+        self.misses += 1
+        overlay = self._loaded[team_id] = self.loader(team_id)
+        if len(self._loaded) > self.maxsize:
+            self._loaded.popitem(last=False)
+        return overlay
+
+    def for_payload(self, body: dict) -> Optional[TenantOverlay]:
+        """Returns the overlay of the team of a Slack payload, or None."""
+        # a slash-command payload has "team_id"; an interactive payload has
+        # the "team" object.
+        team_id = body.get("team_id") or (body.get("team") or {}).get("id")
+        return self.get(team_id) if team_id else None
+
+    def set(self, team_id: str, overlay: Optional[TenantOverlay]):
+        """Set, or with None remove, the overlay of the team."""
+        self._loaded.pop(team_id, None)
+        if overlay is None:
+            self.overlays.pop(team_id, None)
+        else:
+            self.overlays[team_id] = overlay
+
+    def stats(self) -> dict:
+        return dict(
+            overlays=len(self.overlays),
+            loaded=len(self._loaded),
+            hits=self.hits,
+            misses=self.misses,
+            distinct=len({o.key for o in self.overlays.values()}),
+        )
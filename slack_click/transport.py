@@ -0,0 +1,426 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+A shared HTTP transport for the messages slack-click sends: the Web API calls
+made by `say`, and the posts to the request response_url made by `respond`.
+The slack_sdk clients used by Slack-Bolt open a new HTTP session, and so a new
+TLS connection, for each call; the transport keeps a pool of keep-alive
+connections for all of the requests of the process.
+
+aiohttp is imported when the transport opens its session, not when this
+module is imported.
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Any, Optional, Sequence
+from random import random
+from time import perf_counter
+import asyncio
+import logging
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from .metrics import MetricsRegistry, g_metrics
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = [
+    "SlackTransport",
+    "TransportClient",
+    "TransportSay",
+    "TransportRespond",
+    "TransportError",
+]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+SLACK_API_URL = "https://slack.com/api/"
+
+# the request context key set by a worker process, whose say and respond
+# functions are sent back to the ingress process; see slack_click.workers.
+WORKER_CONTEXT_KEY = "slack_click_worker"
+
+_log = logging.getLogger(__name__)
+
+
+class TransportError(Exception):
+    """
+    Raised when a call fails: the HTTP status is not a success, or the Web
+    API response is not "ok".  `status` is the HTTP status, and `data` the
+    response body.
+    """
+
+    def __init__(self, target: str, status: int, data: Any = None):
+        error = data.get("error") if isinstance(data, dict) else data
+        super().__init__(f"{target} failed: HTTP {status}: {error}")
+        self.target = target
+        self.status = status
+        self.data = data
+
+
+class SlackTransport(object):
+    """
+    Sends the Slack Web API calls and response_url posts of slack-click over a
+    shared pool of keep-alive connections, used with the `transport`
+    parameter of the top-level command or group.  Calls that are rate limited,
+    that get a gateway error, or that cannot connect, are retried with
+    exponential backoff and jitter.  A call whose connection fails once the
+    request may have been sent is not retried, so that a message is not
+    posted twice.
+
+    Parameters
+    ----------
+    token: str
+        The token used when the request context has none.
+
+    base_url: str
+        The Web API URL; a local fake server can be used in tests.
+
+    limit: int
+        The maximum number of connections open at a time.
+
+    limit_per_host: int
+        The maximum number of connections open at a time to one host.
+
+    keepalive_timeout: float
+        The number of seconds an idle connection is kept open.
+
+    timeout: float
+        The number of seconds a call may take, including its connection.
+
+    max_retries: int
+        The number of times a call is retried.
+
+    backoff: float
+        The delay before the first retry; doubled for each retry after that,
+        up to `backoff_max`.  A rate-limited call waits for the Retry-After
+        time instead.
+
+    retry_statuses: Sequence[int]
+        The HTTP statuses that are retried.  HTTP 500 and timeouts are not
+        retried by default, as Slack may have processed the call.
+
+    metrics: MetricsRegistry
+        Records the latency of each call as `transport_seconds`, and the
+        outcomes as `transport_total`, by Web API method, or "response_url";
+        the library default registry is used when not provided.
+
+    Examples
+    --------
+        transport = SlackTransport()
+
+        @click.group(cls=AsyncSlackClickGroup, transport=transport)
+        ...
+
+        # when the process stops
+        await transport.close()
+    """
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        base_url: str = SLACK_API_URL,
+        limit: int = 100,
+        limit_per_host: int = 50,
+        keepalive_timeout: float = 30.0,
+        timeout: float = 10.0,
+        max_retries: int = 3,
+        backoff: float = 0.25,
+        backoff_max: float = 5.0,
+        retry_statuses: Sequence[int] = (429, 502, 503, 504),
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.token = token
+        self.base_url = base_url if base_url.endswith("/") else base_url + "/"
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.retry_statuses = frozenset(retry_statuses)
+        self.metrics = metrics
+        self._session = None
+
+        self.calls = 0
+        self.inflight = 0
+        self.inflight_max = 0
+        self.connections = 0
+        self.reused = 0
+        self.queued = 0
+        self.retries = 0
+        self.failed = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def attach(self, request):
+        """
+        Replace the request `say` function, and its `respond` function when
+        the request has a response_url, with functions that use this transport.
+        """
+        context = request.context
+        if context.get(WORKER_CONTEXT_KEY) or isinstance(
+            context.get("say"), TransportSay
+        ):
+            return
+
+        token = context.get("token") or context.get("bot_token") or self.token
+        context["say"] = TransportSay(self, token, context.get("channel_id"))
+
+        if response_url := request.body.get("response_url"):
+            context["respond"] = TransportRespond(self, response_url)
+
+    def client(self, token: Optional[str] = None) -> "TransportClient":
+        """
+        Returns a Web API client for the token, for example to be used as the
+        client of a SlackOutbox.
+        """
+        return TransportClient(self, token or self.token)
+
+    async def api_call(self, method: str, token: Optional[str] = None, **params):
+        """
+        Call a Web API method, with the parameters as the JSON body.
+
+        Returns
+        -------
+        dict
+            The Web API response.
+
+        Raises
+        ------
+        TransportError
+            When the call fails, once it has been retried.
+        """
+        headers = dict(Authorization=f"Bearer {token or self.token}")
+        status, data = await self._send(method, self.base_url + method, headers, params)
+        if status >= 300 or not isinstance(data, dict) or not data.get("ok"):
+            raise TransportError(method, status, data)
+        return data
+
+    async def post_response(self, response_url: str, **message) -> str:
+        """Post the message to a request response_url; returns the response."""
+        status, data = await self._send("response_url", response_url, None, message)
+        if status >= 300:
+            raise TransportError("response_url", status, data)
+        return data
+
+    async def close(self):
+        """Close the connections; the transport opens new ones when used again."""
+        if self._session is not None:
+            session, self._session = self._session, None
+            await session.close()
+
+    def stats(self) -> dict:
+        return dict(
+            calls=self.calls,
+            inflight=self.inflight,
+            inflight_max=self.inflight_max,
+            utilisation=self.inflight / self.limit if self.limit else 0.0,
+            connections=self.connections,
+            reused=self.reused,
+            queued=self.queued,
+            retries=self.retries,
+            failed=self.failed,
+            latency_avg=(self.latency_total / self.calls) if self.calls else 0.0,
+            latency_max=self.latency_max,
+        )
+
+    # -------------------------------------------------------------------------
+    #                                 PRIVATE
+    # -------------------------------------------------------------------------
+
+    def _open(self):
+        import aiohttp
+
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_create_end.append(self._on_create)
+        trace.on_connection_reuseconn.append(self._on_reuse)
+        trace.on_connection_queued_start.append(self._on_queued)
+
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+            ),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            trace_configs=[trace],
+        )
+        return self._session
+
+    async def _on_create(self, *_):
+        self.connections += 1
+
+    async def _on_reuse(self, *_):
+        self.reused += 1
+
+    async def _on_queued(self, *_):
+        self.queued += 1
+
+    async def _send(self, target: str, url: str, headers: Optional[dict], body: dict):
+        import aiohttp
+
+        session = self._session or self._open()
+        metrics = self.metrics or g_metrics
+
+        start = perf_counter()
+        for attempt in range(self.max_retries + 1):
+            retry, data = False, None
+            self.inflight += 1
+            self.inflight_max = max(self.inflight_max, self.inflight)
+
+            try:
+                async with session.post(url, json=body, headers=headers) as resp:
+                    status = resp.status
+                    if status in self.retry_statuses:
+                        retry, delay = True, _retry_after(resp.headers)
+                    elif resp.content_type == "application/json":
+                        data = await resp.json()
+                    else:
+                        data = await resp.text()
+
+            except aiohttp.ClientConnectorError as exc:
+                # the connection was not made, so the request was not sent.
+                status, data, retry, delay = 0, str(exc), True, 0.0
+
+            except aiohttp.ClientConnectionError as exc:
+                # the request may have been sent, for example when the server
+                # disconnects before replying; a post is not idempotent.
+                status, data = 0, str(exc)
+
+            except asyncio.TimeoutError:
+                status, data = 0, "timeout"
+
+            finally:
+                self.inflight -= 1
+
+            if not retry or attempt == self.max_retries:
+                break
+
+            self.retries += 1
+            if metrics.enabled:
+                metrics.count("transport_total", target, "retry")
+
+            await asyncio.sleep(delay or self._backoff(attempt))
+
+        seconds = perf_counter() - start
+        self.calls += 1
+        self.latency_total += seconds
+        self.latency_max = max(self.latency_max, seconds)
+
+        failed = retry or not status
+        if metrics.enabled:
+            metrics.observe("transport_seconds", target, seconds)
+            metrics.count("transport_total", target, "error" if failed else "ok")
+
+        if failed:
+            self.failed += 1
+            _log.error("slack-click transport %s failed: HTTP %s", target, status)
+            raise TransportError(target, status, data)
+
+        return status, data
+
+    def _backoff(self, attempt: int) -> float:
+        return min(self.backoff_max, self.backoff * 2**attempt) * (0.5 + random() / 2)
+
+
+def _retry_after(headers) -> float:
+    """Returns the Retry-After seconds, or 0 to use the backoff delay."""
+    try:
+        return float(headers.get("Retry-After") or 0)
+    except ValueError:
+        return 0.0
+
+
+class TransportClient(object):
+    """
+    A Web API client that calls through a SlackTransport.  Methods are called
+    with api_call(), or as attributes by their Python name; for example
+    `await client.chat_postMessage(channel=..., text=...)`.
+    """
+
+    __slots__ = ("transport", "token")
+
+    def __init__(self, transport: SlackTransport, token: Optional[str]):
+        self.transport = transport
+        self.token = token
+
+    async def api_call(self, method: str, **params) -> dict:
+        return await self.transport.api_call(method, self.token, **params)
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        method = name.replace("_", ".")
+
+        async def call(**params) -> dict:
+            return await self.transport.api_call(method, self.token, **params)
+
+        return call
+
+
+class TransportSay(object):
+    """
+    A `say` function bound to a request that posts to its channel through a
+    SlackTransport.  Returns the chat.postMessage response as a dict.
+    """
+
+    __slots__ = ("transport", "token", "channel")
+
+    def __init__(self, transport: SlackTransport, token: Optional[str], channel: str):
+        self.transport = transport
+        self.token = token
+        self.channel = channel
+
+    async def __call__(self, text=None, **kwargs) -> dict:
+        message = dict(text) if isinstance(text, dict) else dict(text=text, **kwargs)
+        message = {key: value for key, value in message.items() if value is not None}
+        channel = message.pop("channel", None) or self.channel
+        return await self.transport.api_call(
+            "chat.postMessage", self.token, channel=channel, **message
+        )
+
+
+class TransportRespond(object):
+    """
+    A `respond` function bound to a request response_url that posts through a
+    SlackTransport.
+    """
+
+    __slots__ = ("transport", "response_url")
+
+    def __init__(self, transport: SlackTransport, response_url: str):
+        self.transport = transport
+        self.response_url = response_url
+
+    async def __call__(self, text=None, **kwargs) -> str:
+        message = dict(text) if isinstance(text, dict) else dict(text=text, **kwargs)
+        message = {key: value for key, value in message.items() if value is not None}
+        return await self.transport.post_response(self.response_url, **message)
@@ -0,0 +1,526 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Run the commands of a slack-click tree in worker processes, so that a busy bot
+can use more than one CPU core.  The ingress process, the one connected to
+Slack, forwards each payload to a worker; the worker runs the command with its
+own copy of the command tree, and each call the command makes to the request
+`say` or `respond` functions, or to the methods of the request `client`, is sent
+back to, and run by, the ingress.  The workers hold no Slack credentials.
+
+Messages are JSON documents in length-prefixed frames over a Unix socket pair;
+the header and the document are written separately rather than joined, and
+nothing is pickled.
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+from itertools import count
+import asyncio
+import importlib
+import json
+import logging
+import multiprocessing
+import socket
+import struct
+import zlib
+
+if TYPE_CHECKING:  # pragma: no cover
+    from slack_bolt.request.async_request import AsyncBoltRequest as Request
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from .transport import WORKER_CONTEXT_KEY
+
+# -----------------------------------------------------------------------------
+# Exports
+# -----------------------------------------------------------------------------
+
+__all__ = ["WorkerPool", "WorkerCrashed"]
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+_FRAME = struct.Struct(">I")
+
+# the Slack payload fields that requests are routed by, by sticky; None routes
+# the requests round-robin.
+_STICKY_FIELDS = {"team": "team_id", "user": "user_id", "channel": "channel_id"}
+
+# the request context functions a command may call from a worker; the methods
+# of the request client are called as "client.<method>".
+_PROXIED = ("say", "respond")
+_CLIENT_PREFIX = "client."
+
+_log = logging.getLogger("slack_click.workers")
+
+
+class WorkerCrashed(RuntimeError):
+    """Raised for the requests in progress on a worker process that exited."""
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> dict:
+    (size,) = _FRAME.unpack(await reader.readexactly(_FRAME.size))
+    return json.loads(await reader.readexactly(size))
+
+
+def _write_frame(writer: asyncio.StreamWriter, message: dict):
+    data = json.dumps(message, separators=(",", ":"), default=str).encode()
+    writer.write(_FRAME.pack(len(data)))
+    writer.write(data)
+
+
+class _Worker(object):
+    """The ingress side of one worker process."""
+
+    __slots__ = (
+        "index",
+        "process",
+        "reader",
+        "writer",
+        "pending",
+        "handled",
+        "restarts",
+        "task",
+    )
+
+    def __init__(self, index: int):
+        self.index = index
+        self.process = None
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.pending: Dict[int, tuple] = dict()
+        self.handled = 0
+        self.restarts = 0
+        self.task: Optional[asyncio.Task] = None
+
+
+class WorkerPool(object):
+    """
+    A pool of worker processes that run the commands of a slack-click tree.
+
+    Parameters
+    ----------
+    target: str
+        The top-level command or group, as "package.module:attribute"; each
+        worker imports it.  Interactive payloads can only be run by a group;
+        with a command they fail.
+
+    workers: int
+        The number of worker processes.
+
+    sticky: str
+        The payload field the requests are routed by: "user", "channel", or
+        "team"; or None to route the requests round-robin.  The requests of a
+        user (or channel, or team) go to the same worker while it is running,
+        so that per-process state such as the caches and limits of the tree
+        apply to them.  Routing by team puts all of the requests of a
+        workspace on one worker.
+
+    restart_delay: float
+        The number of seconds before a worker that exited is restarted.
+
+    timeout: float
+        The number of seconds a request may run on a worker.  A worker that
+        has not completed a request in time is considered hung: it is killed
+        and restarted, and its requests in progress fail with WorkerCrashed.
+        By default requests are not timed out.
+
+    Examples
+    --------
+        pool = WorkerPool("clicker.commands:cli_click_group", workers=4)
+        await pool.start()
+
+        @app.command(cli_click_group.name)
+        async def on_clicker(request: Request, ack):
+            await ack()
+            await pool.submit(request)
+    """
+
+    def __init__(
+        self,
+        target: str,
+        workers: int = None,
+        sticky: Optional[str] = "user",
+        restart_delay: float = 0.5,
+        timeout: Optional[float] = None,
+    ):
+        if sticky is not None and sticky not in _STICKY_FIELDS:
+            raise ValueError(f"Unknown sticky '{sticky}'")
+
+        self.target = target
+        self.n_workers = workers or multiprocessing.cpu_count()
+        self.sticky = sticky
+        self.restart_delay = restart_delay
+        self.timeout = timeout
+        self._workers = [_Worker(index) for index in range(self.n_workers)]
+        self._ids = count()
+        self._turns = count()
+        self._mp = multiprocessing.get_context("spawn")
+        self._closing = False
+        self._spawned: Optional[asyncio.Event] = None
+
+    async def start(self):
+        """Start the worker processes."""
+        self._spawned = asyncio.Event()
+        for worker in self._workers:
+            await self._spawn(worker)
+
+    async def close(self, timeout: float = 5.0):
+        """Stop the worker processes, once their requests are done."""
+        self._closing = True
+        if self._spawned is not None:
+            # wake the requests waiting for a worker to restart.
+            self._spawned.set()
+
+        for worker in self._workers:
+            if worker.pending:
+                await asyncio.wait(
+                    [future for future, _ in worker.pending.values()],
+                    timeout=timeout,
+                )
+            if worker.writer is not None:
+                worker.writer.close()
+
+        loop = asyncio.get_running_loop()
+        for worker in self._workers:
+            if worker.process is not None:
+                await loop.run_in_executor(None, worker.process.join, timeout)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+            if worker.task is not None:
+                worker.task.cancel()
+
+    def route(self, body: dict) -> int:
+        """Returns the index of the worker for the payload."""
+        if self.sticky is None:
+            return next(self._turns) % self.n_workers
+
+        key = _payload_key(body, _STICKY_FIELDS[self.sticky])
+        return zlib.crc32(key.encode()) % self.n_workers
+
+    async def submit(self, request: "Request"):
+        """
+        Run the request on its worker; returns when the command is done.  When
+        its worker is restarting, the request is run by the next running
+        worker; when none is running, it waits for one to restart.
+
+        Raises
+        ------
+        WorkerCrashed
+            When the worker process exited, or was killed for exceeding the
+            timeout, before the command was done; or when the pool is closed.
+        """
+        worker = await self._available(self.route(request.body))
+        process = worker.process
+
+        req_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        worker.pending[req_id] = (future, request)
+        _write_frame(worker.writer, dict(op="run", id=req_id, body=request.body))
+        await worker.writer.drain()
+
+        if self.timeout is None:
+            return await future
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            pass
+
+        if not future.done():
+            future.set_exception(
+                WorkerCrashed(
+                    f"Worker {worker.index} did not complete request {req_id}"
+                    f" in {self.timeout}s; restarting"
+                )
+            )
+            _log.error(f"Worker {worker.index} is hung; killing it")
+            if worker.process is process:
+                # route the new requests to the other workers until it has
+                # been restarted.
+                _retire(worker)
+            if process.is_alive():
+                process.kill()
+
+        return await future
+
+    def stats(self) -> List[dict]:
+        return [
+            dict(
+                index=worker.index,
+                pid=worker.process.pid if worker.process else None,
+                inflight=len(worker.pending),
+                handled=worker.handled,
+                restarts=worker.restarts,
+            )
+            for worker in self._workers
+        ]
+
+    # -------------------------------------------------------------------------
+    #                                 PRIVATE
+    # -------------------------------------------------------------------------
+
+    async def _available(self, index: int) -> _Worker:
+        """
+        Returns the running worker at the index, or else the next running one;
+        waits for a worker to restart when none is running.
+        """
+        if self._spawned is None:
+            raise RuntimeError("The worker pool is not started")
+
+        while not self._closing:
+            for offset in range(self.n_workers):
+                worker = self._workers[(index + offset) % self.n_workers]
+                if worker.writer is not None:
+                    return worker
+
+            self._spawned.clear()
+            await self._spawned.wait()
+
+        raise WorkerCrashed("The worker pool is closed")
+
+    async def _spawn(self, worker: _Worker):
+        ours, theirs = socket.socketpair()
+        worker.process = self._mp.Process(
+            target=_worker_main,
+            args=(self.target, theirs),
+            name=f"slack-click-worker-{worker.index}",
+            daemon=True,
+        )
+        worker.process.start()
+        theirs.close()
+
+        worker.reader, worker.writer = await asyncio.open_unix_connection(sock=ours)
+        worker.task = asyncio.create_task(self._serve(worker))
+        self._spawned.set()
+
+    async def _serve(self, worker: _Worker):
+        """Handle the messages from the worker, until it exits."""
+        try:
+            while True:
+                message = await _read_frame(worker.reader)
+                if message["op"] == "done":
+                    self._done(worker, message)
+                else:
+                    asyncio.create_task(self._call(worker, message))
+
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+        _retire(worker)
+        for future, _ in worker.pending.values():
+            if not future.done():
+                future.set_exception(WorkerCrashed(f"Worker {worker.index} exited"))
+        worker.pending.clear()
+
+        if self._closing:
+            return
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, worker.process.join, 1.0)
+        _log.error(
+            f"Worker {worker.index} exited with code {worker.process.exitcode};"
+            " restarting"
+        )
+        worker.restarts += 1
+        await asyncio.sleep(self.restart_delay)
+        await self._spawn(worker)
+
+    def _done(self, worker: _Worker, message: dict):
+        if (entry := worker.pending.pop(message["id"], None)) is None:
+            return
+
+        future, _ = entry
+        worker.handled += 1
+        if future.done():
+            return
+        if error := message.get("error"):
+            future.set_exception(RuntimeError(error))
+        else:
+            future.set_result(None)
+
+    async def _call(self, worker: _Worker, message: dict):
+        """
+        Run a say or respond call, or a client method call, made by a command,
+        and return its result.
+        """
+        result, error = None, None
+        try:
+            _, request = worker.pending[message["id"]]
+            func = _resolve(request, message["func"])
+            response = await func(*message["args"], **message["kwargs"])
+            result = getattr(response, "data", None)
+        except Exception as exc:  # noqa
+            error = f"{type(exc).__name__}: {exc}"
+
+        if worker.writer is not None:
+            _write_frame(
+                worker.writer,
+                dict(op="result", call=message["call"], result=result, error=error),
+            )
+
+
+def _retire(worker: _Worker):
+    if worker.writer is not None:
+        worker.writer.close()
+        worker.writer = None
+
+
+def _resolve(request: "Request", name: str):
+    # only the proxied context functions, and the public client methods, may
+    # be called by a worker.
+    if name in _PROXIED:
+        return getattr(request.context, name)
+
+    method = name[len(_CLIENT_PREFIX) :]
+    if not name.startswith(_CLIENT_PREFIX) or method.startswith("_"):
+        raise ValueError(f"Unknown function '{name}'")
+
+    if (client := request.context.client) is None:
+        raise ValueError("The request has no client")
+    return getattr(client, method)
+
+
+def _payload_key(body: dict, field: str) -> str:
+    # a slash-command payload has the field, e.g. "team_id"; an interactive
+    # payload has the object, e.g. {"team": {"id": ...}}.
+    if value := body.get(field):
+        return value
+    return (body.get(field[:-3]) or {}).get("id") or ""
+
+
+# -----------------------------------------------------------------------------
+#                              Worker Process
+# -----------------------------------------------------------------------------
+
+
+def _worker_main(target: str, sock: socket.socket):
+    asyncio.run(_WorkerProcess(target, sock).run())
+
+
+class _WorkerProcess(object):
+    """The worker side: runs the commands sent by the ingress."""
+
+    def __init__(self, target: str, sock: socket.socket):
+        module, _, attr = target.partition(":")
+        self.root = getattr(importlib.import_module(module), attr)
+        self.sock = sock
+        self.calls: Dict[int, asyncio.Future] = dict()
+        self.call_ids = count()
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def run(self):
+        reader, self.writer = await asyncio.open_unix_connection(sock=self.sock)
+        tasks = set()
+        try:
+            while True:
+                message = await _read_frame(reader)
+                if message["op"] == "result":
+                    self._result(message)
+                    continue
+
+                task = asyncio.create_task(self._run(message))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+        except (asyncio.IncompleteReadError, ConnectionError):
+            # the ingress has closed the pool.
+            if tasks:
+                await asyncio.wait(tasks)
+
+    async def _run(self, message: dict):
+        from slack_bolt.request.async_request import AsyncBoltRequest
+
+        req_id = message["id"]
+        request = AsyncBoltRequest(body=message["body"], mode="socket_mode")
+        request.context["logger"] = _log
+        request.context[WORKER_CONTEXT_KEY] = True
+        for func in _PROXIED:
+            request.context[func] = self._proxy(req_id, func)
+        request.context["client"] = _ClientProxy(self, req_id)
+
+        error = None
+        try:
+            if "command" in request.body:
+                await self.root(prog_name=self.root.name, obj=request, join_tasks=True)
+            elif (dispatch_many := getattr(self.root, "dispatch_many", None)) is None:
+                # only a group has interactive event handlers.
+                raise TypeError(f"{self.root.name} cannot handle interactive payloads")
+            else:
+                await dispatch_many(request)
+        except Exception as exc:  # noqa
+            _log.exception(f"Request {req_id} failed")
+            error = f"{type(exc).__name__}: {exc}"
+
+        _write_frame(self.writer, dict(op="done", id=req_id, error=error))
+
+    def _proxy(self, req_id: int, func: str):
+        async def call(*vargs, **kwargs) -> Any:
+            call_id = next(self.call_ids)
+            future = asyncio.get_running_loop().create_future()
+            self.calls[call_id] = future
+            _write_frame(
+                self.writer,
+                dict(
+                    op="call",
+                    id=req_id,
+                    call=call_id,
+                    func=func,
+                    args=vargs,
+                    kwargs=kwargs,
+                ),
+            )
+            await self.writer.drain()
+            return await future
+
+        return call
+
+    def _result(self, message: dict):
+        if (future := self.calls.pop(message["call"], None)) is None:
+            return
+        if error := message.get("error"):
+            future.set_exception(RuntimeError(error))
+        else:
+            future.set_result(message.get("result"))
+
+
+class _ClientProxy(object):
+    """
+    The request `client` of a command run by a worker: each Web API method
+    call is made by the ingress, with its client, and returns the `data` dict
+    of the response.  An error is raised as a RuntimeError with the text of
+    the ingress error.
+    """
+
+    __slots__ = ("_process", "_req_id")
+
+    def __init__(self, process: _WorkerProcess, req_id: int):
+        self._process = process
+        self._req_id = req_id
+
+    def __getattr__(self, method: str):
+        if method.startswith("_"):
+            raise AttributeError(method)
+        return self._process._proxy(self._req_id, _CLIENT_PREFIX + method)
@@ -35,6 +35,14 @@ def precheck(ctx):
     ctx.run("interrogate -c pyproject.toml", pty=True)
 
 
+@task
+def bench(ctx, suite="pipeline", baseline=None, threshold=0.10):
+    cmd = f"python -m benchmarks.bench_{suite}"
+    if baseline:
+        cmd += f" --baseline {baseline} --threshold {threshold}"
+    ctx.run(cmd, pty=True)
+
+
 @task
 def clean(ctx):
     ctx.run("python setup.py clean")
@@ -0,0 +1,140 @@
+#  Copyright 2021 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#  http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Shared fixtures for the slack-click tests.  The tests build fake Slack-Bolt
+requests whose `say` records the messages sent; nothing talks to Slack.
+"""
+
+# -----------------------------------------------------------------------------
+# System Imports
+# -----------------------------------------------------------------------------
+
+import asyncio
+import inspect
+import logging
+from itertools import count
+
+# -----------------------------------------------------------------------------
+# Public Imports
+# -----------------------------------------------------------------------------
+
+import pytest
+from slack_bolt.request.async_request import AsyncBoltRequest as Request
+
+# -----------------------------------------------------------------------------
+# Private Imports
+# -----------------------------------------------------------------------------
+
+from slack_click.metrics import g_metrics
+
+# -----------------------------------------------------------------------------
+#
+#                                 CODE BEGINS
+#
+# -----------------------------------------------------------------------------
+
+_log = logging.getLogger("slack_click.tests")
+_trigger_ids = count()
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    """Run the `async def` tests to completion, each in a new event loop."""
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+
+    argnames = pyfuncitem._fixtureinfo.argnames
+    kwargs = {name: pyfuncitem.funcargs[name] for name in argnames}
+    asyncio.run(pyfuncitem.obj(**kwargs))
+    return True
+
+
+class Say(object):
+    """An async `say` that records the message keyword arguments sent."""
+
+    def __init__(self):
+        self.messages = list()
+
+    async def __call__(self, text=None, **kwargs):
+        if text is not None:
+            kwargs["text"] = text
+        self.messages.append(kwargs)
+        return dict(ok=True)
+
+    @property
+    def texts(self):
+        return [message.get("text") for message in self.messages]
+
+
+def make_request(body: dict, say=None) -> Request:
+    """Returns a Slack-Bolt request for the payload body, as Socket Mode would."""
+    request = Request(body=body, mode="socket_mode")
+    request.context["say"] = say or Say()
+    request.context["logger"] = _log
+    return request
+
+
+@pytest.fixture()
+def command_request():
+    """
+    Returns a function that makes the request for a slash-command:
+    command_request(command, text, **body).
+    """
+
+    def factory(command: str, text: str = "", **body) -> Request:
+        payload = dict(
+            command=command,
+            text=text,
+            user_id="U0001",
+            channel_id="C0001",
+            team_id="T0001",
+            trigger_id=f"trigger.{next(_trigger_ids)}",
+            response_url="https://hooks.slack.invalid/commands/T0001/1/abc",
+        )
+        payload.update(body)
+        return make_request(payload)
+
+    return factory
+
+
+@pytest.fixture()
+def action_request():
+    """
+    Returns a function that makes the request for a block_actions payload
+    pressing the given action_ids: action_request(*action_ids, **body).
+    """
+
+    def factory(*action_ids: str, **body) -> Request:
+        payload = dict(
+            type="block_actions",
+            user=dict(id="U0001"),
+            team=dict(id="T0001"),
+            channel=dict(id="C0001"),
+            actions=[dict(action_id=action_id, value="1") for action_id in action_ids],
+        )
+        payload.update(body)
+        return make_request(payload)
+
+    return factory
+
+
+@pytest.fixture(autouse=True)
+def metrics_disabled():
+    """Each test starts with the library metrics disabled and empty."""
+    g_metrics.disable()
+    g_metrics.reset()
+    yield g_metrics
+    g_metrics.disable()
+    g_metrics.reset()
@@ -0,0 +1,102 @@
+"""Tests for the command admission limits."""
+
+import click
+import pytest
+
+from slack_click.admission import AdmissionController, Limit
+from slack_click.async_click import AsyncSlackClickGroup, click_async
+
+
+def test_burst_defaults():
+    assert Limit("user", rate=10).burst == 10
+    assert Limit("user", rate=0.5, per=60).burst == 1.0
+    assert Limit("user", concurrency=1).burst is None
+
+
+@pytest.mark.parametrize("kwargs", [dict(rate=1, burst=0.5), dict(scope="room")])
+def test_invalid_limits(kwargs):
+    with pytest.raises(ValueError):
+        Limit(**kwargs)
+
+
+def test_slow_rate_admits_one():
+    controller = AdmissionController()
+    limits = [("/c", Limit("user", rate=0.5, per=60))]
+    body = dict(user_id="U1")
+
+    admission, rejection = controller.admit(limits, body, "/c")
+    assert rejection is None
+    admission.release()
+
+    _, rejection = controller.admit(limits, body, "/c")
+    assert rejection.retry_after > 0
+
+
+def test_concurrency_by_scope():
+    controller = AdmissionController()
+    limits = [("/c", Limit("user", concurrency=1))]
+
+    first, _ = controller.admit(limits, dict(user_id="U1"), "/c")
+    _, rejected = controller.admit(limits, dict(user_id="U1"), "/c")
+    other, _ = controller.admit(limits, dict(user_id="U2"), "/c")
+
+    assert rejected.key == ("/c", "user", "U1")
+    assert controller.inflight() == {"/c.user": {"U1": 1, "U2": 1}}
+
+    first.release()
+    other.release()
+    assert controller.stats()["inflight"] == 0
+
+
+def build_tree(controller, ran):
+    @click.group(name="/clicker", cls=AsyncSlackClickGroup, admission=controller)
+    @click.pass_obj
+    @click_async
+    async def root(request):
+        pass
+
+    @root.command("slow", limits=[Limit("user", rate=1, per=60)])
+    @click.pass_obj
+    async def slow(request):
+        ran.append("slow")
+
+    @root.command("sync", limits=[Limit("user", rate=1, per=60)])
+    def sync():
+        ran.append("sync")
+
+    @root.group(
+        "status", limits=[Limit("user", rate=1, per=60)], cls=AsyncSlackClickGroup
+    )
+    def status():
+        ran.append("status")
+
+    @status.command("all")
+    @click.pass_obj
+    async def status_all(request):
+        ran.append("status all")
+
+    return root
+
+
+@pytest.mark.parametrize("text", ["slow", "sync", "status"])
+async def test_rejected_command_not_run(command_request, text):
+    ran = list()
+    root = build_tree(AdmissionController(), ran)
+
+    await root(prog_name="/clicker", obj=command_request("/clicker", text))
+    request = command_request("/clicker", text)
+    await root(prog_name="/clicker", obj=request)
+
+    assert ran == [text]
+    (message,) = request.context["say"].messages
+    assert "is busy right now" in message["text"]
+
+
+async def test_async_group_admitted_once(command_request):
+    ran = list()
+    controller = AdmissionController()
+    root = build_tree(controller, ran)
+
+    await root(prog_name="/clicker", obj=command_request("/clicker", "status all"))
+    assert ran == ["status all"]
+    assert controller.stats()["admitted"] == 1
@@ -0,0 +1,67 @@
+"""Tests for the benchmark harness and the fake command trees it times."""
+
+import json
+
+from benchmarks.fakes import build_deep_tree, build_flat_tree, make_request
+from benchmarks.runner import BenchmarkSuite, cli_main, compare
+
+
+def quick_suite():
+    suite = BenchmarkSuite("test", batches=2, min_batch_time=0.001)
+    calls = dict(sync=0, async_=0)
+
+    @suite.benchmark("op.sync")
+    def op_sync():
+        calls["sync"] += 1
+
+    @suite.benchmark("op.async")
+    async def op_async():
+        calls["async_"] += 1
+
+    return suite, calls
+
+
+def test_suite_runs_and_reports():
+    suite, calls = quick_suite()
+    report = suite.run()
+
+    assert set(report["results"]) == {"op.sync", "op.async"}
+    assert calls["sync"] and calls["async_"]
+    for result in report["results"].values():
+        assert result["median_us"] >= result["min_us"] > 0
+    assert report["meta"]["suite"] == "test"
+
+
+def test_run_filters_by_name():
+    suite, calls = quick_suite()
+    report = suite.run(only=["async"])
+    assert list(report["results"]) == ["op.async"]
+    assert calls["sync"] == 0
+
+
+def test_compare_flags_regressions():
+    current = dict(results={"a": dict(median_us=12.0), "b": dict(median_us=10.5)})
+    baseline = dict(results={"a": dict(median_us=10.0), "b": dict(median_us=10.0)})
+    assert compare(current, baseline, threshold=0.10) == ["a"]
+
+
+def test_cli_main_exit_code(tmp_path, capsys):
+    suite, _calls = quick_suite()
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(
+        json.dumps(dict(results={"op.sync": dict(median_us=1e-6, min_us=1e-6)}))
+    )
+    output = tmp_path / "results.json"
+
+    assert cli_main(suite, ["-k", "sync", "--json", str(output)]) == 0
+    assert "op.sync" in json.loads(output.read_text())["results"]
+
+    assert cli_main(suite, ["-k", "op.sync", "--baseline", str(baseline)]) == 1
+    assert "REGRESSION" in capsys.readouterr().out
+
+
+async def test_fake_trees_run_a_leaf():
+    for tree, text in ((build_flat_tree(3), "cmd2"), (build_deep_tree(), "g0 g0 cmd0")):
+        request = make_request(tree.name, f"{text} --opt0 a")
+        await tree(prog_name=tree.name, obj=request)
+        assert request.context["say"].calls == 1
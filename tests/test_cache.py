@@ -0,0 +1,147 @@
+"""Tests for the command result cache."""
+
+import asyncio
+
+import click
+import pytest
+
+from slack_click.async_click import AsyncSlackClickGroup, click_async
+from slack_click.cache import _MISSING, ResultCache, cache_result
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_and_lru():
+    clock = Clock()
+    cache = ResultCache(ttl=10, maxsize=2, clock=clock)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("a") is _MISSING
+    assert cache.get("c") == 3
+
+    clock.now = 11
+    assert cache.get("c") is _MISSING
+    assert len(cache) == 1  # "c" is discarded when found to be expired
+
+
+async def test_single_flight():
+    cache = ResultCache()
+    release = asyncio.Event()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "value"
+
+    waiters = [
+        asyncio.create_task(cache.get_or_compute("k", compute)) for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*waiters) == ["value"] * 3
+    assert calls == 1
+    assert cache.stats()["coalesced"] == 2
+
+
+async def test_none_not_cached_or_shared():
+    cache = ResultCache()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0)
+
+    await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(2)))
+    await cache.get_or_compute("k", compute)
+
+    assert calls == 3
+    assert len(cache) == 0
+
+
+def build_tree(calls):
+    @click.group(name="/clicker", cls=AsyncSlackClickGroup)
+    @click.option("--env", default="prod")
+    @click.pass_obj
+    @click_async
+    async def root(request, env):
+        pass
+
+    @root.command("status")
+    @click.argument("service")
+    @click.pass_obj
+    @cache_result(ttl=30, scope="team")
+    async def status(request, service):
+        calls.append(service)
+        return f"{service} is up"
+
+    @root.command("chatty")
+    @click.pass_obj
+    @cache_result(ttl=30)
+    async def chatty(request):
+        calls.append("chatty")
+        await request.context["say"]("said it myself")
+
+    return root
+
+
+async def test_cached_message_sent_to_each_user(command_request):
+    calls = list()
+    root = build_tree(calls)
+
+    texts = ["status db", "status db", "--env dev status db", "status web"]
+    says = list()
+    for text in texts:
+        request = command_request("/clicker", text)
+        says.append(request.context["say"])
+        await root(prog_name="/clicker", obj=request)
+
+    assert [say.texts for say in says] == [
+        ["db is up"],
+        ["db is up"],
+        ["db is up"],
+        ["web is up"],
+    ]
+    assert calls == ["db", "db", "web"]
+
+    other_team = command_request("/clicker", "status db", team_id="T0002")
+    await root(prog_name="/clicker", obj=other_team)
+    assert calls[-1] == "db"
+
+
+async def test_callback_replying_with_say_not_cached(command_request):
+    calls = list()
+    root = build_tree(calls)
+
+    for _ in range(2):
+        request = command_request("/clicker", "chatty")
+        await root(prog_name="/clicker", obj=request)
+        assert request.context["say"].texts == ["said it myself"]
+
+    assert calls == ["chatty", "chatty"]
+
+
+async def test_called_outside_invocation():
+    @cache_result()
+    async def lookup(service):
+        return f"{service} is up"
+
+    assert await lookup("db") == "db is up"
+    assert len(lookup.cache) == 0
+
+
+def test_unknown_scope():
+    with pytest.raises(ValueError):
+        cache_result(scope="planet")
@@ -0,0 +1,124 @@
+"""Tests for the command deadlines: deferral, timeouts, and supersede."""
+
+import asyncio
+
+import click
+import pytest
+
+from slack_click.async_click import AsyncSlackClickGroup, click_async
+from slack_click.deadline import (
+    Deadline,
+    DeadlineExceeded,
+    InflightTasks,
+    run_with_deadline,
+)
+
+
+class Respond(object):
+    def __init__(self):
+        self.messages = list()
+
+    async def __call__(self, **kwargs):
+        self.messages.append(kwargs)
+
+
+def build_tree(deadline, release):
+    @click.group(name="/clicker", cls=AsyncSlackClickGroup)
+    @click.pass_obj
+    @click_async
+    async def root(request):
+        pass
+
+    @root.command("report", deadline=deadline)
+    @click.pass_obj
+    async def report(request):
+        say = request.context["say"]
+        await say("started")
+        await release.wait()
+        await say("done")
+
+    return root
+
+
+async def test_deferred_say_taken_early_uses_response_url(command_request):
+    release = asyncio.Event()
+    root = build_tree(Deadline(budget=0.01), release)
+
+    request = command_request("/clicker", "report")
+    respond = request.context["respond"] = Respond()
+    say = request.context["say"]
+
+    task = asyncio.create_task(root(prog_name="/clicker", obj=request))
+    await asyncio.sleep(0.05)
+    release.set()
+    await task
+
+    assert say.texts[0] == "started"
+    assert len(say.messages) == 2  # started, and the interim message
+    assert [msg["text"] for msg in respond.messages] == ["done"]
+    assert respond.messages[0].get("response_type") == "in_channel"
+
+
+async def test_timeout_sends_timeout_message(command_request):
+    root = build_tree(Deadline(timeout=0.01), asyncio.Event())
+
+    request = command_request("/clicker", "report")
+    say = request.context["say"]
+    await root(prog_name="/clicker", obj=request)
+
+    assert say.texts[0] == "started"
+    assert len(say.messages) == 2
+
+
+async def test_budget_cancel():
+    release = asyncio.Event()
+
+    async def on_defer():
+        raise AssertionError("not deferred")
+
+    with pytest.raises(DeadlineExceeded) as excinfo:
+        await run_with_deadline(
+            release.wait(), Deadline(budget=0.01, on_budget="cancel"), on_defer
+        )
+    assert excinfo.value.reason == "budget"
+
+
+async def test_supersede_cancels_previous():
+    inflight = InflightTasks()
+    deadline = Deadline(supersede=True)
+
+    first = asyncio.create_task(
+        run_with_deadline(asyncio.sleep(10), deadline, None, inflight, "key")
+    )
+    await asyncio.sleep(0)
+    second = asyncio.create_task(
+        run_with_deadline(asyncio.sleep(0, "second"), deadline, None, inflight, "key")
+    )
+
+    with pytest.raises(DeadlineExceeded) as excinfo:
+        await first
+    assert excinfo.value.reason == "superseded"
+    assert await second == "second"
+    assert len(inflight) == 0
+
+
+async def test_outer_cancel_not_swallowed():
+    # the command ignores its first cancellation, so that the invocation is
+    # cancelled while waiting for the command to stop.
+    stopping = asyncio.Event()
+
+    async def stubborn():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            stopping.set()
+            await asyncio.sleep(10)
+
+    outer = asyncio.create_task(
+        run_with_deadline(stubborn(), Deadline(timeout=0.01), None)
+    )
+    await stopping.wait()
+    outer.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await outer
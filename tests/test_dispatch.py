@@ -0,0 +1,90 @@
+"""Tests for the compiled routing index; see AsyncSlackClickGroup.compile_dispatch."""
+
+import click
+
+from slack_click.async_click import AsyncSlackClickGroup, click_async
+from slack_click.dispatch import DispatchIndex
+
+
+def build_tree():
+    ran = list()
+
+    @click.group(name="/clicker", cls=AsyncSlackClickGroup)
+    @click.pass_obj
+    @click_async
+    async def root(request):
+        pass
+
+    @root.group("status", cls=AsyncSlackClickGroup, aliases=["st"])
+    @click.pass_obj
+    @click_async
+    async def status(request):
+        pass
+
+    @status.command("service", aliases=["sv"])
+    @click.pass_obj
+    async def service(request):
+        ran.append("status service")
+
+    @root.command("delete")
+    @click.pass_obj
+    async def delete(request):
+        ran.append("delete")
+
+    return root, ran
+
+
+async def test_aliases_resolve(command_request):
+    root, ran = build_tree()
+    root.compile_dispatch()
+
+    await root(prog_name="/clicker", obj=command_request("/clicker", "st sv"))
+    assert ran == ["status service"]
+
+
+async def test_prefix_match_is_opt_in(command_request):
+    root, ran = build_tree()
+    root.compile_dispatch()
+
+    request = command_request("/clicker", "d")
+    await root(prog_name="/clicker", obj=request)
+
+    assert ran == []
+    (message,) = request.context["say"].messages
+    assert "No such command" in message["attachments"][1]["text"]
+
+
+async def test_prefix_match(command_request):
+    root, ran = build_tree()
+    root.compile_dispatch(prefix_match=True)
+
+    await root(prog_name="/clicker", obj=command_request("/clicker", "d"))
+    await root(prog_name="/clicker", obj=command_request("/clicker", "stat serv"))
+    assert ran == ["delete", "status service"]
+
+
+def test_ambiguous_prefix_not_resolved():
+    root, _ran = build_tree()
+
+    @root.command("deploy")
+    def deploy():
+        pass
+
+    index = DispatchIndex(prefix_match=True)
+    index.build(root)
+
+    assert index.resolve(root, "de") is None
+    assert index.resolve(root, "dep")[0] == "deploy"
+
+
+async def test_commands_added_after_compile(command_request):
+    root, ran = build_tree()
+    root.compile_dispatch()
+
+    @root.command("ping", aliases=["p"])
+    @click.pass_obj
+    async def ping(request):
+        ran.append("ping")
+
+    await root(prog_name="/clicker", obj=command_request("/clicker", "p"))
+    assert ran == ["ping"]
@@ -0,0 +1,82 @@
+"""Tests for the cached help renderings; see SlackClickHelper.slack_help_cached."""
+
+import click
+
+from slack_click.async_click import AsyncSlackClickGroup, click_async
+
+
+def build_tree():
+    @click.group(name="/clicker", cls=AsyncSlackClickGroup)
+    @click.pass_obj
+    @click_async
+    async def root(request):
+        await request.context["say"]("root")
+
+    @root.command("hello", help="Say hello.")
+    @click.option("--name", default="world", help="who to greet")
+    @click.pass_obj
+    async def hello(request, name):
+        await request.context["say"](f"hello {name}")
+
+    return root
+
+
+async def test_help_rendered_once(command_request):
+    root = build_tree()
+    hello = root.commands["hello"]
+
+    calls = list()
+    get_help = click.Context.get_help
+
+    def counting_get_help(ctx):
+        calls.append(ctx.command_path)
+        return get_help(ctx)
+
+    click.Context.get_help = counting_get_help
+    try:
+        for _ in range(3):
+            request = command_request("/clicker", "hello --help")
+            await root(prog_name="/clicker", obj=request, join_tasks=True)
+            say = request.context["say"]
+            assert len(say.messages) == 1
+            assert "--name" in say.messages[0]["text"]
+    finally:
+        click.Context.get_help = get_help
+
+    assert calls == ["/clicker hello"]
+    assert ("text", "/clicker hello", None) in hello._help_cache
+
+
+async def test_usage_error_uses_cached_attachment(command_request):
+    root = build_tree()
+    hello = root.commands["hello"]
+
+    request = command_request("/clicker", "hello --bogus")
+    await root(prog_name="/clicker", obj=request)
+
+    (message,) = request.context["say"].messages
+    assert message["attachments"][-1]["pretext"] == "Command help"
+    assert ("attachment", "/clicker hello", None) in hello._help_cache
+
+
+def test_add_command_invalidates_group():
+    root = build_tree()
+    ctx = root.slack_help_warmup(info_name="/clicker")
+    assert "hello" in root.slack_help_cached(ctx, "text", click.Context.get_help)
+
+    @click.command("goodbye", help="Say goodbye.")
+    def goodbye():
+        pass
+
+    root.add_command(goodbye)
+    assert not root._help_cache
+
+    ctx = root.slack_help_warmup(info_name="/clicker")
+    assert "goodbye" in root.slack_help_cached(ctx, "text", click.Context.get_help)
+
+
+def test_warmup_fills_cache():
+    root = build_tree()
+    root.slack_help_warmup(info_name="/clicker")
+    kinds = {kind for kind, _path, _overlay in root._help_cache}
+    assert {"text", "payload", "attachment"} <= kinds
@@ -0,0 +1,88 @@
+"""Tests for discarding re-delivered command payloads."""
+
+import click
+import pytest
+
+from slack_click.async_click import AsyncSlackClickGroup, click_async
+from slack_click.idempotency import (
+    IdempotencyStore,
+    MemoryIdempotencyStore,
+    SQLiteIdempotencyStore,
+    idempotency_key,
+)
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_store_is_abstract():
+    with pytest.raises(TypeError):
+        IdempotencyStore()
+
+    class Incomplete(IdempotencyStore):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_idempotency_key():
+    assert idempotency_key(dict(trigger_id="t1", text="a")) == "trigger:t1"
+    assert idempotency_key(dict(a=1, b=2)) == idempotency_key(dict(b=2, a=1))
+    assert idempotency_key(dict(a=1)) != idempotency_key(dict(a=2))
+
+
+async def test_memory_store_ttl_and_size():
+    clock = Clock()
+    store = MemoryIdempotencyStore(ttl=10, maxsize=2, clock=clock)
+
+    assert await store.claim("a")
+    assert not await store.claim("a")
+
+    clock.now = 11
+    assert await store.claim("a")
+
+    assert await store.claim("b") and await store.claim("c")
+    assert store.stats() == dict(claimed=4, duplicates=1, size=2)
+
+
+async def test_sqlite_store_shared_by_file(tmp_path):
+    path = str(tmp_path / "seen.db")
+    first, second = SQLiteIdempotencyStore(path), SQLiteIdempotencyStore(path)
+    try:
+        assert await first.claim("a")
+        assert not await second.claim("a")
+        assert await second.claim("b")
+    finally:
+        first.close()
+        second.close()
+
+
+async def test_duplicate_command_discarded(command_request):
+    ran = list()
+
+    @click.group(
+        name="/clicker", cls=AsyncSlackClickGroup, idempotency=MemoryIdempotencyStore()
+    )
+    @click.pass_obj
+    @click_async
+    async def root(request):
+        pass
+
+    @root.command("hello")
+    @click.pass_obj
+    async def hello(request):
+        ran.append(request.body["trigger_id"])
+
+    request = command_request("/clicker", "hello")
+    await root(prog_name="/clicker", obj=request)
+    await root(prog_name="/clicker", obj=command_request("/clicker", "hello"))
+    await root(prog_name="/clicker", obj=request)
+
+    assert len(ran) == 2
+    assert ran[0] != ran[1]
@@ -0,0 +1,50 @@
+"""Tests that importing slack-click is free of side effects."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import click
+
+from benchmarks.bench_import import SIDE_EFFECT_CHECK
+from slack_click import async_click
+
+ROOT = Path(__file__).parent.parent
+
+
+def test_import_has_no_side_effects():
+    proc = subprocess.run(
+        [sys.executable, "-c", SIDE_EFFECT_CHECK],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    assert proc.returncode == 0, proc.stderr
+
+
+def test_install_and_uninstall_click_context():
+    installed = async_click.g_click_context_installed
+    try:
+        async_click.install_click_context()
+        assert click.decorators.get_current_context is not (
+            async_click._click_get_current_context
+        )
+        async_click.uninstall_click_context()
+        assert click.decorators.get_current_context is (
+            async_click._click_get_current_context
+        )
+    finally:
+        if installed:
+            async_click.install_click_context()
+
+
+def test_patched_lookup_prefers_click_stack():
+    async_click.install_click_context()
+
+    @click.command()
+    @click.pass_context
+    def cli(ctx):
+        assert click.decorators.get_current_context() is ctx
+        return "ok"
+
+    assert cli.main([], standalone_mode=False) == "ok"
@@ -0,0 +1,83 @@
+"""Tests for the command and event metrics."""
+
+import click
+
+from slack_click.async_click import AsyncSlackClickGroup, click_async
+from slack_click.metrics import MetricsRegistry
+
+
+def build_tree(metrics):
+    @click.group(name="/clicker", cls=AsyncSlackClickGroup, metrics=metrics)
+    @click.pass_obj
+    @click_async
+    async def root(request):
+        pass
+
+    @root.command("hello")
+    @click.pass_obj
+    async def hello(request):
+        await request.context["say"]("hello")
+
+    @root.on("/clicker.pick.*")
+    async def on_pick(request):
+        pass
+
+    return root
+
+
+async def test_command_outcomes(command_request):
+    metrics = MetricsRegistry(enabled=True)
+    root = build_tree(metrics)
+
+    request = command_request("/clicker", "hello")
+    say = request.context["say"]
+    await root(prog_name="/clicker", obj=request)
+    await root(prog_name="/clicker", obj=command_request("/clicker", "hello --bad"))
+
+    snap = metrics.snapshot()
+    assert snap["counters"]["commands_total"]["/clicker.hello"] == dict(
+        ok=1, usage_error=1
+    )
+    for name in ("parse_seconds", "handler_seconds", "say_seconds"):
+        assert snap["histograms"][name]["/clicker.hello"]["count"] >= 1
+
+    # the probe restores the request say when done.
+    assert request.context["say"] is say
+
+
+async def test_events_labeled_by_route(action_request):
+    metrics = MetricsRegistry(enabled=True)
+    root = build_tree(metrics)
+
+    for idx in range(5):
+        event = f"/clicker.pick.{idx}"
+        await root.emit(action_request(event), event)
+
+    events = metrics.snapshot()["counters"]["events_total"]
+    assert events == {"/clicker.pick.*": dict(ok=5)}
+
+
+async def test_disabled_registry_records_nothing(command_request):
+    metrics = MetricsRegistry()
+    root = build_tree(metrics)
+
+    await root(prog_name="/clicker", obj=command_request("/clicker", "hello"))
+    assert metrics.snapshot() == dict(counters={}, histograms={})
+
+
+def test_prometheus_label_names():
+    metrics = MetricsRegistry(enabled=True, buckets=(0.1,))
+    metrics.count("commands_total", "/clicker.hello", "ok")
+    metrics.count("scheduler_total", "interactive", "run")
+    metrics.observe("transport_seconds", "chat.postMessage", 0.05)
+
+    text = metrics.render_prometheus()
+    assert (
+        'slack_click_commands_total{event_id="/clicker.hello",outcome="ok"} 1' in text
+    )
+    assert 'slack_click_scheduler_total{class="interactive",outcome="run"} 1' in text
+    assert (
+        'slack_click_transport_seconds_bucket{method="chat.postMessage",le="0.1"} 1'
+        in text
+    )
+    assert 'event_id="interactive"' not in text
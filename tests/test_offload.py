@@ -0,0 +1,121 @@
+"""Tests for running synchronous command callbacks in an executor."""
+
+import threading
+
+import click
+import pytest
+
+from slack_click.async_click import (
+    AsyncSlackClickCommand,
+    AsyncSlackClickGroup,
+    click_async,
+)
+from slack_click.offload import OffloadPool
+
+process_pool = OffloadPool("process", max_workers=1)
+
+
+@click.command("crunch", cls=AsyncSlackClickCommand, offload=process_pool)
+@click.argument("count", type=int)
+def crunch(count):
+    return f"sum {sum(range(count))}"
+
+
+def build_root(**kwargs):
+    @click.group(name="/clicker", cls=AsyncSlackClickGroup, **kwargs)
+    @click.pass_obj
+    @click_async
+    async def root(request):
+        pass
+
+    return root
+
+
+async def test_thread_offload_has_request(command_request):
+    root = build_root()
+    threads = list()
+
+    @root.command("lookup", offload=True)
+    @click.argument("host")
+    @click.pass_obj
+    def lookup(request, host):
+        threads.append(threading.current_thread())
+        return f"{host} for {request.body['user_id']}"
+
+    request = command_request("/clicker", "lookup example")
+    await root(prog_name="/clicker", obj=request)
+
+    assert request.context["say"].texts == ["example for U0001"]
+    assert threads[0] is not threading.main_thread()
+
+
+async def test_process_offload(command_request):
+    root = build_root()
+    root.add_command(crunch)
+
+    try:
+        request = command_request("/clicker", "crunch 10")
+        await root(prog_name="/clicker", obj=request)
+    finally:
+        process_pool.shutdown()
+
+    assert request.context["say"].texts == ["sum 45"]
+    assert process_pool.completed == 1
+
+
+def test_process_callback_with_pass_obj_rejected():
+    root = build_root()
+
+    with pytest.raises(ValueError, match="command parameters only"):
+
+        @root.command("report", offload="process")
+        @click.pass_obj
+        def report(request):
+            pass
+
+
+def test_process_callback_not_at_module_level_rejected():
+    root = build_root()
+
+    with pytest.raises(ValueError, match="module level"):
+
+        @root.command("report", offload="process")
+        def report():
+            pass
+
+
+def test_process_callback_bound_to_another_name_rejected():
+    with pytest.raises(ValueError, match="bound to another object"):
+        click.command("build_root", cls=AsyncSlackClickCommand, offload="process")(
+            build_root_alias
+        )
+
+
+def build_root_alias():
+    pass
+
+
+build_root_alias.__qualname__ = build_root_alias.__name__ = "build_root"
+
+
+def test_group_process_offload_checks_added_commands():
+    root = build_root(offload="process")
+
+    with pytest.raises(ValueError, match="command parameters only"):
+
+        @root.command("report")
+        @click.pass_obj
+        def report(request):
+            pass
+
+    # an async command is never offloaded, and a command may opt out.
+
+    @root.command("status")
+    @click.pass_obj
+    async def status(request):
+        pass
+
+    @root.command("local", offload=False)
+    @click.pass_obj
+    def local(request):
+        pass
@@ -0,0 +1,112 @@
+"""Tests for the options-load index of the command tree."""
+
+import click
+
+from slack_click.async_click import AsyncSlackClickGroup, click_async
+from slack_click.options import OptionsIndex, OptionTerms
+
+
+def test_search_order():
+    terms = OptionTerms(["deploy", "redeploy", "delete", "dump-logs", "status"])
+
+    assert terms.search("de", 10)[:2] == [("delete", "delete"), ("deploy", "deploy")]
+    assert ("redeploy", "redeploy") in terms.search("deploy", 10)
+    assert terms.search("dlg", 10) == [("dump-logs", "dump-logs")]
+    assert terms.search("", 2) == [("delete", "delete"), ("deploy", "deploy")]
+    assert len(terms.search("e", 3)) == 3
+
+
+def test_text_and_value_pairs():
+    terms = OptionTerms([("Production", "prod"), ("Staging", "stage")])
+    assert terms.search("stag", 10) == [("Staging", "stage")]
+
+
+def build_tree():
+    @click.group(name="/clicker", cls=AsyncSlackClickGroup)
+    @click.pass_obj
+    @click_async
+    async def root(request):
+        pass
+
+    @root.command("deploy")
+    @click.option("--env", type=click.Choice(["prod", "stage", "dev"]))
+    @click.pass_obj
+    async def deploy(request, env):
+        pass
+
+    @root.group("status", cls=AsyncSlackClickGroup)
+    @click.pass_obj
+    @click_async
+    async def status(request):
+        pass
+
+    @status.command("service")
+    @click.pass_obj
+    async def service(request):
+        pass
+
+    return root
+
+
+def options_body(source, value=""):
+    return dict(type="block_suggestion", action_id=source, value=value)
+
+
+def option_values(response):
+    return [option["value"] for option in response["options"]]
+
+
+async def test_options_load_command_names_and_choices(action_request):
+    root = build_tree()
+
+    response = await root.options_load(action_request(**options_body("/clicker")))
+    assert option_values(response) == ["deploy", "status"]
+
+    response = await root.options_load(
+        action_request(**options_body("/clicker.deploy.env", "st"))
+    )
+    assert option_values(response) == ["stage"]
+
+    response = await root.options_load(
+        action_request(**options_body("/clicker.status"))
+    )
+    assert option_values(response) == ["service"]
+
+
+async def test_commands_added_after_compile(action_request):
+    root = build_tree()
+    root.compile_options()
+
+    @root.command("restart")
+    @click.pass_obj
+    async def restart(request):
+        pass
+
+    response = await root.options_load(action_request(**options_body("/clicker", "re")))
+    assert option_values(response) == ["restart"]
+
+
+async def test_provider_results_cached(action_request):
+    root = build_tree()
+    calls = list()
+
+    @root.options_provider("/clicker.tickets", ttl=60)
+    async def tickets(query):
+        calls.append(query)
+        return [(f"Ticket {idx}", f"T-{idx}") for idx in range(20)]
+
+    for _ in range(2):
+        response = await root.options_load(
+            action_request(**options_body("/clicker.tickets", "ticket 1"))
+        )
+
+    assert option_values(response)[:2] == ["T-1", "T-10"]
+    assert calls == ["ticket 1"]
+
+
+async def test_unknown_source_and_limit():
+    index = OptionsIndex(limit=5)
+    index.add("numbers", [str(idx) for idx in range(50)])
+
+    assert len((await index.options_load(options_body("numbers")))["options"]) == 5
+    assert await index.options_load(options_body("nope")) == dict(options=[])
@@ -0,0 +1,126 @@
+"""Tests for the SlackOutbox that coalesces and rate-limits channel posts."""
+
+import asyncio
+
+import click
+import pytest
+
+from slack_click.async_click import AsyncSlackClickGroup, click_async
+from slack_click.outbox import OutboxCancelled, SlackOutbox, merge_messages
+
+
+class FakeClient(object):
+    """A Slack Web API client that records the posts."""
+
+    def __init__(self, fail=()):
+        self.posts = list()
+        self.fail = list(fail)
+
+    async def chat_postMessage(self, **kwargs):
+        if self.fail:
+            raise self.fail.pop(0)
+        self.posts.append(kwargs)
+        return dict(ok=True, ts=f"{len(self.posts)}.0")
+
+
+class RateLimited(Exception):
+    class response(object):
+        status_code = 429
+        headers = {"Retry-After": "0"}
+
+
+async def test_sequential_says_coalesce(command_request):
+    client = FakeClient()
+    outbox = SlackOutbox(client=client, window=0.01)
+
+    @click.group(name="/clicker", cls=AsyncSlackClickGroup, outbox=outbox)
+    @click.pass_obj
+    @click_async
+    async def root(request):
+        say = request.context["say"]
+        await say("one")
+        await say("two")
+        await say(text="three")
+
+    await root(prog_name="/clicker", obj=command_request("/clicker"))
+    await outbox.drain()
+
+    assert client.posts == [dict(channel="C0001", text="one\ntwo\nthree")]
+    assert outbox.stats()["coalesced"] == 2
+
+
+async def test_say_returns_future_of_response(command_request):
+    client = FakeClient()
+    outbox = SlackOutbox(client=client, window=0)
+    say = outbox.bind(command_request("/clicker"))
+
+    future = await say("hi")
+    assert isinstance(future, asyncio.Future)
+    assert (await future)["ts"] == "1.0"
+
+
+async def test_wait_returns_response(command_request):
+    client = FakeClient()
+    outbox = SlackOutbox(client=client, window=0, wait=True)
+    say = outbox.bind(command_request("/clicker"))
+
+    assert (await say("one"))["ok"]
+    assert (await say("two"))["ts"] == "2.0"
+    assert len(client.posts) == 2
+
+
+async def test_different_options_not_merged(command_request):
+    client = FakeClient()
+    outbox = SlackOutbox(client=client, window=0.01)
+    say = outbox.bind(command_request("/clicker"))
+
+    await say("one")
+    await say("two", thread_ts="1.0")
+    await outbox.drain()
+
+    assert [post.get("thread_ts") for post in client.posts] == [None, "1.0"]
+
+
+async def test_rate_limited_post_retried(command_request):
+    client = FakeClient(fail=[RateLimited()])
+    outbox = SlackOutbox(client=client, window=0)
+    say = outbox.bind(command_request("/clicker"))
+
+    response = await (await say("hi"))
+    assert response["ok"]
+    assert outbox.stats()["retries"] == 1
+
+
+@pytest.mark.parametrize("started", [False, True])
+async def test_cancelled_worker_fails_pending_futures(command_request, started):
+    client = FakeClient()
+    outbox = SlackOutbox(client=client, window=60)
+    say = outbox.bind(command_request("/clicker"))
+
+    future = await say("never posted")
+    if started:
+        await asyncio.sleep(0)
+
+    (queue,) = outbox._channels.values()
+    queue.worker.cancel()
+
+    with pytest.raises(OutboxCancelled):
+        await future
+
+    assert outbox.stats()["queue_depth"] == 0
+    assert not outbox._open
+
+    # a later message starts a new worker.
+    outbox.window = 0
+    assert (await (await say("later")))["ok"]
+
+
+def test_merge_messages_with_blocks():
+    block = dict(type="divider")
+    merged = merge_messages(
+        [dict(text="a"), dict(blocks=[block]), dict(attachments=[dict(text="x")])]
+    )
+    assert merged["blocks"][0]["text"]["text"] == "a"
+    assert merged["blocks"][1] is block
+    assert merged["text"] == "a"
+    assert merged["attachments"] == [dict(text="x")]
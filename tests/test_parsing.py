@@ -0,0 +1,90 @@
+"""Tests for the command text tokenizers and the parse cache."""
+
+import click
+import pytest
+
+from slack_click.async_click import AsyncSlackClickGroup, click_async
+from slack_click.parsing import (
+    ParseCache,
+    ParseResult,
+    shell_tokenize,
+    whitespace_tokenize,
+)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("add thing", ["add", "thing"]),
+        ('add "my thing"', ["add", "my thing"]),
+        ("add “my thing”", ["add", "my thing"]),
+        ("say don't", ["say", "don't"]),
+        ("path a\\b", ["path", "a\\b"]),
+        ("", []),
+    ],
+)
+def test_shell_tokenize(text, expected):
+    assert shell_tokenize(text) == expected
+
+
+def test_whitespace_tokenize():
+    assert whitespace_tokenize('add "my thing"') == ["add", '"my', 'thing"']
+
+
+def test_parse_cache_lru():
+    cache = ParseCache(maxsize=2)
+    result = ParseResult(params=dict(), protected_args=(), args=())
+
+    cache.put("a", result)
+    cache.put("b", result)
+    assert cache.get("a") is result
+    cache.put("c", result)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is result
+    assert cache.stats() == dict(size=2, maxsize=2, hits=2, misses=1)
+
+
+def build_tree(parse_cache):
+    seen = list()
+
+    @click.group(name="/clicker", cls=AsyncSlackClickGroup, parse_cache=parse_cache)
+    @click.pass_obj
+    @click_async
+    async def root(request):
+        pass
+
+    @root.command("add")
+    @click.argument("name")
+    @click.option("--count", type=int, default=1)
+    @click.pass_obj
+    async def add(request, name, count):
+        seen.append((name, count))
+
+    return root, seen
+
+
+async def test_parse_cache_hit_gives_same_params(command_request):
+    cache = ParseCache()
+    root, seen = build_tree(cache)
+
+    for _ in range(3):
+        request = command_request("/clicker", 'add "my thing" --count 2')
+        await root(prog_name="/clicker", obj=request)
+
+    assert seen == [("my thing", 2)] * 3
+    assert cache.hits >= 2
+
+
+async def test_usage_error_not_cached(command_request):
+    cache = ParseCache()
+    root, seen = build_tree(cache)
+
+    for _ in range(2):
+        request = command_request("/clicker", "add x --count nope")
+        await root(prog_name="/clicker", obj=request)
+        (message,) = request.context["say"].messages
+        assert "is not a valid integer" in message["attachments"][1]["text"]
+
+    assert not seen
+    assert len(cache) <= 1  # only the root level parsed successfully
@@ -0,0 +1,98 @@
+"""Tests for profiling sampled and slow invocations."""
+
+import asyncio
+
+import click
+import pytest
+
+from slack_click import profiling
+from slack_click.async_click import AsyncSlackClickGroup, click_async
+from slack_click.profiling import Profiler
+
+
+def build_tree(profiler):
+    @click.group(name="/clicker", cls=AsyncSlackClickGroup, profiler=profiler)
+    @click.pass_obj
+    @click_async
+    async def cli(request):
+        pass
+
+    @cli.command("status")
+    @click.pass_obj
+    async def status(request):
+        await request.context["say"]("ok")
+
+    @cli.command("slow")
+    @click.pass_obj
+    async def slow(request):
+        await asyncio.sleep(0.1)
+
+    @cli.command("again")
+    @click.pass_obj
+    async def again(request):
+        await cli(prog_name=cli.name, args=["status"], obj=request)
+
+    @cli.on(status)
+    async def on_status(request):
+        await cli(prog_name=cli.name, args=["status"], obj=request)
+
+    return cli
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        Profiler(mode="perf")
+
+
+async def test_sampled_invocation_captured(command_request):
+    profiler = Profiler(sample_rate=1.0)
+    cli = build_tree(profiler)
+
+    await cli(prog_name=cli.name, obj=command_request("/clicker", "status"))
+
+    (capture,) = profiler.captures()
+    assert capture.kind == "cprofile"
+    assert capture.event_id == "/clicker.status"
+    assert capture.args == "status"
+    assert capture.user_id == "U0001"
+    assert "function calls" in capture.pstats_text()
+    assert not profiling.g_cprofile_active
+
+
+async def test_slow_invocation_sampled(command_request):
+    profiler = Profiler(threshold=0.01, interval=0.005)
+    cli = build_tree(profiler)
+
+    await cli(prog_name=cli.name, obj=command_request("/clicker", "status"))
+    assert len(profiler) == 0
+
+    await cli(prog_name=cli.name, obj=command_request("/clicker", "slow"))
+    capture = profiler.latest("/clicker.slow")
+    assert capture.kind == "tasks"
+    assert capture.samples
+    assert "slow" in capture.collapsed()
+
+
+@pytest.mark.parametrize("mode", ["cprofile", "tasks"])
+async def test_nested_invocation_profiled_once(command_request, mode):
+    profiler = Profiler(sample_rate=1.0, mode=mode)
+    cli = build_tree(profiler)
+
+    await cli(prog_name=cli.name, obj=command_request("/clicker", "again"))
+
+    (capture,) = profiler.captures()
+    assert capture.event_id == "/clicker.again"
+
+
+@pytest.mark.parametrize("mode", ["cprofile", "tasks"])
+async def test_event_handler_profiled_once(action_request, mode):
+    profiler = Profiler(sample_rate=1.0, mode=mode)
+    cli = build_tree(profiler)
+    request = action_request("/clicker.status")
+
+    await cli.dispatch_many(request)
+
+    assert request.context["say"].texts == ["ok"]
+    (capture,) = profiler.captures()
+    assert capture.event_id == "/clicker.status"
+    assert not profiling.g_cprofile_active
@@ -0,0 +1,48 @@
+"""Tests for the replay load generator and the app it replays by default."""
+
+import json
+
+import click
+
+from benchmarks import replay_app
+from benchmarks.replay import cli_main, load_payloads, payload_event_id
+from example.clicker import commands
+
+PAYLOADS = "benchmarks/payloads/clicker.jsonl"
+
+
+def test_replay_app_uses_the_example_commands():
+    assert replay_app.app_roots == [
+        commands.cli_click_group,
+        commands.cli_ping_command,
+    ]
+
+
+def test_payload_event_ids():
+    roots = {cmd.name: cmd for cmd in replay_app.app_roots}
+    event_ids = {payload_event_id(roots, body) for body in load_payloads(PAYLOADS)}
+
+    assert "/click.hello" in event_ids
+    assert "/ping" in event_ids
+    assert "block_actions:/click.hello" in event_ids
+
+
+def test_payload_event_id_stops_at_bad_command():
+    group = click.Group("/g", commands={"a": click.Command("a")})
+    body = dict(command="/g", text="nope")
+    assert payload_event_id({"/g": group}, body) == "/g"
+    assert payload_event_id({}, dict(command="/other")) == "/other"
+
+
+def test_cli_replays_without_errors(tmp_path, capsys):
+    output = tmp_path / "replay.json"
+    rc = cli_main(
+        [PAYLOADS, "--requests", "20", "--concurrency", "4", "--json", str(output)]
+    )
+
+    assert rc == 0
+    results = json.loads(output.read_text())
+    assert results["results"]["requests"] == 20
+    assert results["results"]["errors"] == 0
+    assert results["calls"]
+    assert "req/s" in capsys.readouterr().out
@@ -0,0 +1,108 @@
+"""Tests for the interactive event router."""
+
+import re
+
+import click
+import pytest
+
+from slack_click.async_click import AsyncSlackClickGroup, click_async
+from slack_click.router import DuplicateRouteError, InteractiveRouter, payload_event_ids
+
+
+def handler(name):
+    async def func(request):
+        return name
+
+    return func
+
+
+def test_exact_before_pattern():
+    router = InteractiveRouter()
+    exact, wild = handler("exact"), handler("wild")
+    router.add("/click.pick.*", wild)
+    router.add("/click.pick.one", exact)
+
+    assert router.match("/click.pick.one") is exact
+    assert router.match("/click.pick.two") is wild
+    assert router.match("/click.other") is None
+
+
+def test_patterns_in_registration_order():
+    router = InteractiveRouter()
+    first, second = handler("first"), handler("second")
+    router.add(re.compile(r"btn\.\d+"), first)
+    router.add("btn.*", second)
+
+    assert router.match("btn.1") is first
+    assert router.match("btn.x") is second
+
+
+def test_duplicate_routes_rejected():
+    router = InteractiveRouter()
+    router.add("a", handler("a"))
+    router.add("b.*", handler("b"))
+
+    with pytest.raises(DuplicateRouteError):
+        router.add("a", handler("a"))
+    with pytest.raises(DuplicateRouteError):
+        router.add("b.*", handler("b"))
+
+
+def test_memo_is_bounded_and_cleared_on_add():
+    router = InteractiveRouter(memo_size=2)
+    router.add("x.*", handler("x"))
+
+    for event in ("x.1", "x.2", "y.1"):
+        router.match(event)
+    assert len(router._memo) == 2
+
+    late = handler("late")
+    router.add("y.*", late)
+    assert router.match("y.1") is late
+
+
+def test_payload_event_ids():
+    actions = dict(type="block_actions", actions=[dict(action_id="a"), dict()])
+    view = dict(type="view_submission", view=dict(callback_id="v"))
+    options = dict(type="block_suggestion", action_id="o")
+
+    assert payload_event_ids(actions) == ["a"]
+    assert payload_event_ids(view) == ["v"]
+    assert payload_event_ids(options) == ["o"]
+    assert payload_event_ids(dict()) == []
+
+
+async def test_emit_and_dispatch_many(action_request):
+    @click.group(name="/click", cls=AsyncSlackClickGroup)
+    @click.pass_obj
+    @click_async
+    async def root(request):
+        pass
+
+    seen = list()
+
+    @root.on("/click.pick.*")
+    async def on_pick(request):
+        seen.append("pick")
+
+    @root.on("other")
+    async def on_other(request):
+        seen.append("other")
+
+    await root.emit(action_request("/click.pick.1"), "/click.pick.1")
+    await root.dispatch_many(action_request("/click.pick.2", "other", "nope"))
+
+    assert seen == ["pick", "pick", "other"]
+
+
+def test_route_returns_the_matching_route():
+    router = InteractiveRouter()
+    exact, wild, regex = handler("exact"), handler("wild"), handler("regex")
+    router.add("/click.go", exact)
+    router.add("/click.pick.*", wild)
+    router.add(re.compile(r"btn\.\d+"), regex)
+
+    assert router.route("/click.go") == ("/click.go", exact)
+    assert router.route("/click.pick.7") == ("/click.pick.*", wild)
+    assert router.route("btn.3") == (r"btn\.\d+", regex)
+    assert router.route("nope") is None
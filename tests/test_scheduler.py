@@ -0,0 +1,147 @@
+"""Tests for the priority and fair-queueing request scheduler."""
+
+import asyncio
+
+import click
+import pytest
+
+from slack_click.async_click import AsyncSlackClickGroup, click_async
+from slack_click.scheduler import PriorityClass, Scheduler, SchedulerBusy
+
+
+def body(user="U1"):
+    return dict(team_id="T1", user_id=user, channel_id="C1")
+
+
+async def run_order(scheduler, requests):
+    """Returns the order the (kind, user) requests are granted a slot."""
+    order = list()
+    hold = await scheduler.acquire("command", body("blocker"))
+
+    async def one(kind, user):
+        with await scheduler.acquire(kind, body(user)):
+            order.append((kind, user))
+            await asyncio.sleep(0)
+
+    tasks = list()
+    for kind, user in requests:
+        tasks.append(asyncio.create_task(one(kind, user)))
+        await asyncio.sleep(0)
+
+    hold.release()
+    await asyncio.gather(*tasks)
+    return order
+
+
+async def test_higher_priority_served_first():
+    scheduler = Scheduler(concurrency=1)
+    order = await run_order(
+        scheduler, [("command", "U1"), ("help", "U1"), ("interactive", "U1")]
+    )
+    assert [kind for kind, _ in order] == ["interactive", "help", "command"]
+
+
+async def test_flows_interleaved():
+    scheduler = Scheduler(concurrency=1)
+    order = await run_order(
+        scheduler,
+        [("command", "U1")] * 3 + [("command", "U2")] * 3,
+    )
+    assert [user for _, user in order] == ["U1", "U2", "U1", "U2", "U1", "U2"]
+
+
+async def test_weighted_flows():
+    scheduler = Scheduler(
+        concurrency=1, weight=lambda payload: 2.0 if payload["user_id"] == "U1" else 1
+    )
+    order = await run_order(
+        scheduler,
+        [("command", "U1")] * 4 + [("command", "U2")] * 2,
+    )
+    assert [user for _, user in order[:3]].count("U1") == 2
+
+
+async def test_full_queue_sheds():
+    scheduler = Scheduler(concurrency=1, classes=[PriorityClass("command", 0, 1)])
+    hold = await scheduler.acquire("command", body())
+    waiting = asyncio.create_task(scheduler.acquire("command", body()))
+    await asyncio.sleep(0)
+
+    with pytest.raises(SchedulerBusy):
+        await scheduler.acquire("command", body())
+
+    hold.release()
+    (await waiting).release()
+    stats = scheduler.stats()
+    assert stats["running"] == 0
+    assert stats["classes"]["command"] == dict(waiting=0, run=2, shed=1)
+
+
+async def test_cancelled_waiter_uncounted():
+    scheduler = Scheduler(concurrency=1)
+    hold = await scheduler.acquire("command", body())
+    waiting = asyncio.create_task(scheduler.acquire("command", body()))
+    await asyncio.sleep(0)
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    assert scheduler.stats()["classes"]["command"]["waiting"] == 0
+    hold.release()
+    assert scheduler.running == 0
+
+
+def test_unknown_fair_by():
+    with pytest.raises(ValueError):
+        Scheduler(fair_by="planet")
+
+
+async def test_busy_command_is_answered(command_request):
+    scheduler = Scheduler(concurrency=1, classes=[PriorityClass("command", 0, 0)])
+    ran = list()
+
+    @click.group(name="/clicker", cls=AsyncSlackClickGroup, scheduler=scheduler)
+    @click.pass_obj
+    @click_async
+    async def cli(request):
+        pass
+
+    @cli.command("status")
+    @click.pass_obj
+    async def status(request):
+        ran.append(1)
+
+    hold = await scheduler.acquire("command", body())
+    request = command_request("/clicker", "status")
+    await cli(prog_name=cli.name, obj=request)
+    hold.release()
+
+    assert not ran
+    assert request.context["say"].messages
+
+
+async def test_nested_invocation_reuses_slot(action_request):
+    scheduler = Scheduler(concurrency=1)
+    ran = list()
+
+    @click.group(name="/clicker", cls=AsyncSlackClickGroup, scheduler=scheduler)
+    @click.pass_obj
+    @click_async
+    async def cli(request):
+        pass
+
+    @cli.command("status")
+    @click.pass_obj
+    async def status(request):
+        ran.append(scheduler.running)
+
+    @cli.on(status)
+    async def on_status(request):
+        # the handler holds the only slot; the command runs in it.
+        await cli(prog_name=cli.name, args=["status"], obj=request)
+
+    await asyncio.wait_for(cli.dispatch_many(action_request("/clicker.status")), 5)
+
+    assert ran == [1]
+    assert scheduler.running == 0
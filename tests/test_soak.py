@@ -0,0 +1,14 @@
+"""A short memory soak of the slash-command pipeline; see benchmarks.soak_memory."""
+
+from benchmarks import soak_memory
+
+LIMIT_KIB = 64
+
+
+async def test_soak_memory_bounded():
+    result = await soak_memory.measure(1000, n_warmup=300)
+
+    assert result["background"] > 0
+    assert result["handler_contexts"] == 0
+    assert result["click_contexts"] == 0
+    assert result["growth"] < LIMIT_KIB * 1024, result["top"]
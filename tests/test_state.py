@@ -0,0 +1,175 @@
+"""Tests for the interactive state carried by Slack payloads."""
+
+import click
+import pytest
+
+from slack_click.async_click import AsyncSlackClickGroup, click_async, slack_pack_state
+from slack_click.state import (
+    DEFAULT_TTL,
+    MAX_ACTION_VALUE,
+    MemoryStateStore,
+    StateCodec,
+    StateError,
+    StateStore,
+    StateTooLarge,
+)
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def large_state():
+    # random-looking text, so that compression does not make it fit.
+    return {"rows": [f"{idx * 7919 % 104729:x}-{idx}" for idx in range(800)]}
+
+
+def test_store_is_abstract():
+    with pytest.raises(TypeError):
+        StateStore()
+
+    class Incomplete(StateStore):
+        async def put(self, key, data):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_encode_decode_roundtrip():
+    codec = StateCodec(secret="s3cret")
+    state = {"service": "web", "count": 3, "tags": ["a", "b"]}
+    assert codec.decode(codec.encode(state)) == state
+
+
+def test_compressed_state_is_smaller():
+    codec = StateCodec(secret="s3cret")
+    state = {"text": "abc " * 200}
+    assert len(codec.encode(state)) < len("abc " * 200)
+    assert codec.decode(codec.encode(state)) == state
+
+
+def test_forged_state_rejected():
+    codec = StateCodec(secret="s3cret")
+    text = codec.encode({"admin": False})
+
+    with pytest.raises(StateError):
+        StateCodec(secret="other").decode(text)
+
+    with pytest.raises(StateError):
+        codec.decode(text[:-2] + ("A" if text[-2] != "A" else "B") + text[-1])
+
+    with pytest.raises(StateError):
+        codec.decode("not base64 !")
+
+
+def test_expired_state_rejected():
+    codec = StateCodec(secret="s3cret", ttl=-1)
+    with pytest.raises(StateError):
+        codec.decode(codec.encode(1))
+
+
+def test_requires_secret():
+    with pytest.raises(ValueError):
+        StateCodec(secret="")
+
+
+def test_too_large_without_store():
+    codec = StateCodec(secret="s3cret")
+    with pytest.raises(StateTooLarge):
+        codec.encode(large_state())
+
+
+async def test_pack_falls_back_to_store():
+    store = MemoryStateStore()
+    codec = StateCodec(secret="s3cret", store=store)
+
+    small = await codec.pack({"a": 1})
+    text = await codec.pack(large_state())
+
+    assert len(text) <= MAX_ACTION_VALUE
+    assert len(store) == 1
+    assert await codec.unpack(small) == {"a": 1}
+    assert await codec.unpack(text) == large_state()
+    assert codec.stats() == dict(inline=1, stored=1)
+
+    with pytest.raises(StateError):
+        codec.decode(text)
+
+
+def test_store_ttl_follows_codec():
+    store = MemoryStateStore()
+    assert store.expires_after == DEFAULT_TTL
+
+    StateCodec(secret="s3cret", ttl=600, store=store)
+    assert store.ttl == 600
+
+    store = MemoryStateStore(ttl=60)
+    StateCodec(secret="s3cret", store=store)
+    assert store.ttl == 60
+
+
+async def test_memory_store_expires_and_bounds():
+    clock = Clock()
+    store = MemoryStateStore(ttl=10, maxsize=2, clock=clock)
+
+    await store.put("a", b"1")
+    await store.put("b", b"2")
+    await store.put("c", b"3")
+    assert len(store) == 2
+    assert await store.get("a") is None
+    assert await store.get("c") == b"3"
+
+    clock.now = 11
+    assert await store.get("c") is None
+    await store.put("d", b"4")
+    assert len(store) == 1
+
+
+async def test_expired_stored_state():
+    clock = Clock()
+    codec = StateCodec(secret="s3cret", store=MemoryStateStore(clock=clock))
+    text = await codec.pack(large_state())
+
+    clock.now = DEFAULT_TTL + 1
+    with pytest.raises(StateError):
+        await codec.unpack(text)
+
+
+async def test_command_state_roundtrip(command_request, action_request):
+    values = list()
+
+    @click.group(
+        name="/clicker", cls=AsyncSlackClickGroup, state=StateCodec(secret="s3cret")
+    )
+    @click.pass_obj
+    @click_async
+    async def cli(request):
+        pass
+
+    @cli.command("deploy")
+    @click.argument("service")
+    @click.pass_obj
+    async def deploy(request, service):
+        values.append(await slack_pack_state(step=1))
+
+    @cli.on(deploy)
+    async def on_deploy(request):
+        state = await cli.load_state(request)
+        values.append(state)
+
+    await cli(prog_name=cli.name, obj=command_request("/clicker", "deploy web"))
+    (value,) = values
+
+    request = action_request("/clicker.deploy")
+    request.body["actions"][0]["value"] = value
+    await cli.dispatch_many(request)
+
+    state = values[-1]
+    assert state.event_id == "/clicker.deploy"
+    assert state.params == {"service": "web"}
+    assert state.extra == {"step": 1}
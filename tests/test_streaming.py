@@ -0,0 +1,107 @@
+"""Tests for streaming generator command output."""
+
+import click
+
+from slack_click.async_click import AsyncSlackClickGroup, click_async
+from slack_click.streaming import FENCE, MessagePacker, Stream, pack_text
+
+
+def test_pack_text_within_limit():
+    text = "\n".join(f"line {idx:03d}" for idx in range(100))
+    messages = pack_text(text, limit=100)
+
+    assert all(len(message) <= 100 for message in messages)
+    assert "\n".join(messages) == text
+
+
+def test_long_line_split():
+    messages = pack_text("x" * 250, limit=100)
+    assert "".join(messages) == "x" * 250
+    assert all(len(message) <= 100 for message in messages)
+
+
+def test_fence_closed_and_reopened():
+    text = "\n".join([FENCE] + [f"row {idx}" for idx in range(40)] + [FENCE, "done"])
+    messages = pack_text(text, limit=80)
+
+    assert len(messages) > 1
+    for message in messages:
+        assert message.count(FENCE) % 2 == 0
+    assert messages[1].startswith(FENCE + "\n")
+
+
+def test_code_output_is_fenced():
+    (message,) = pack_text("a\nb", code=True)
+    assert message == f"{FENCE}\na\nb\n{FENCE}"
+
+
+def test_peek_shows_partial_message():
+    packer = MessagePacker(limit=100)
+    assert packer.feed("partial") == []
+    assert packer.peek() == "partial"
+
+
+class FakeClient(object):
+    def __init__(self):
+        self.calls = list()
+
+    async def chat_postMessage(self, **kwargs):
+        self.calls.append(("post", kwargs["text"]))
+        return dict(ok=True, ts="1.0")
+
+    async def chat_update(self, **kwargs):
+        self.calls.append(("update", kwargs["text"]))
+        return dict(ok=True)
+
+
+def build_tree(stream):
+    @click.group(name="/clicker", cls=AsyncSlackClickGroup, stream=stream)
+    @click.pass_obj
+    @click_async
+    async def root(request):
+        pass
+
+    @root.command("logs")
+    @click.argument("count", type=int)
+    async def logs(count):
+        for idx in range(count):
+            yield f"line {idx}"
+
+    @root.command("sync-logs")
+    def sync_logs():
+        yield "one"
+        yield "two"
+
+    return root
+
+
+async def test_streamed_posts(command_request):
+    root = build_tree(Stream(limit=40))
+
+    request = command_request("/clicker", "logs 10")
+    await root(prog_name="/clicker", obj=request)
+
+    texts = request.context["say"].texts
+    assert len(texts) > 1
+    assert "\n".join(texts).splitlines() == [f"line {idx}" for idx in range(10)]
+
+
+async def test_sync_generator_streamed(command_request):
+    root = build_tree(Stream())
+
+    request = command_request("/clicker", "sync-logs")
+    await root(prog_name="/clicker", obj=request)
+    assert request.context["say"].texts == ["one\ntwo"]
+
+
+async def test_update_mode(command_request):
+    root = build_tree(Stream(mode="update", interval=0))
+    client = FakeClient()
+
+    request = command_request("/clicker", "logs 3")
+    request.context["client"] = client
+    await root(prog_name="/clicker", obj=request)
+
+    assert client.calls[0] == ("post", "line 0")
+    assert client.calls[-1] == ("update", "line 0\nline 1\nline 2")
+    assert request.context["say"].messages == []
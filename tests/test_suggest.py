@@ -0,0 +1,83 @@
+"""Tests for the "did you mean" suggestions on usage errors."""
+
+import random
+
+import click
+import pytest
+
+from slack_click.async_click import AsyncSlackClickGroup, click_async
+from slack_click.suggest import BKTree, did_you_mean, edit_distance
+
+
+def osa_distance(a, b):
+    """The optimal string alignment distance, by dynamic programming."""
+    rows = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i in range(len(a) + 1):
+        rows[i][0] = i
+    for j in range(len(b) + 1):
+        rows[0][j] = j
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            rows[i][j] = min(
+                rows[i - 1][j] + 1, rows[i][j - 1] + 1, rows[i - 1][j - 1] + cost
+            )
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                rows[i][j] = min(rows[i][j], rows[i - 2][j - 2] + 1)
+    return rows[-1][-1]
+
+
+@pytest.mark.parametrize(
+    "a, b, expected",
+    [
+        ("status", "status", 0),
+        ("stauts", "status", 1),
+        ("", "abc", 3),
+        ("kitten", "sitting", 3),
+    ],
+)
+def test_edit_distance(a, b, expected):
+    assert edit_distance(a, b) == expected
+
+
+def test_edit_distance_matches_reference():
+    rng = random.Random(7)
+    for _ in range(2000):
+        a = "".join(rng.choice("abc") for _ in range(rng.randint(0, 8)))
+        b = "".join(rng.choice("abc") for _ in range(rng.randint(0, 8)))
+        assert edit_distance(a, b) == osa_distance(a, b), (a, b)
+
+
+def test_closest():
+    tree = BKTree(["status", "start", "stop", "deploy", "delete"])
+
+    assert tree.closest("stauts") == ["status"]
+    assert tree.closest("deplyo") == ["deploy"]
+    assert tree.closest("xyz") == []
+    assert len(tree) == 5
+
+
+def test_did_you_mean():
+    assert did_you_mean([]) == ""
+    assert did_you_mean(["a"]) == " Did you mean `a`?"
+    assert did_you_mean(["a", "b", "c"]) == " Did you mean `a`, `b` or `c`?"
+
+
+async def test_usage_errors_suggest(command_request):
+    @click.group(name="/clicker", cls=AsyncSlackClickGroup)
+    @click.pass_obj
+    @click_async
+    async def root(request):
+        pass
+
+    @root.command("status", aliases=["st"])
+    @click.option("--verbose", is_flag=True)
+    @click.pass_obj
+    async def status(request, verbose):
+        pass
+
+    for text, expected in (("stauts", "`status`"), ("status --verbsoe", "`--verbose`")):
+        request = command_request("/clicker", text)
+        await root(prog_name="/clicker", obj=request)
+        (message,) = request.context["say"].messages
+        assert f"Did you mean {expected}?" in message["attachments"][1]["text"]
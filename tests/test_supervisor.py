@@ -0,0 +1,104 @@
+"""Tests for the TaskSupervisor used for fire-and-forget messages."""
+
+import asyncio
+
+from slack_click.supervisor import TaskSupervisor
+
+
+async def test_spawn_holds_task_until_done():
+    supervisor = TaskSupervisor()
+    done = asyncio.Event()
+
+    async def work():
+        await done.wait()
+
+    task = supervisor.spawn(work(), name="work")
+    assert supervisor.outstanding == 1
+
+    done.set()
+    assert await supervisor.join(timeout=1)
+    assert task.done()
+    assert supervisor.outstanding == 0
+    assert supervisor.completed == 1
+
+
+async def test_max_concurrency_limits_active_tasks():
+    supervisor = TaskSupervisor(max_concurrency=2)
+    release = asyncio.Event()
+    peak = 0
+
+    async def work():
+        nonlocal peak
+        peak = max(peak, supervisor.active)
+        await release.wait()
+
+    for _ in range(5):
+        supervisor.spawn(work())
+
+    await asyncio.sleep(0)
+    assert supervisor.active == 2
+    assert supervisor.pending == 3
+
+    release.set()
+    assert await supervisor.join(timeout=1)
+    assert peak == 2
+    assert supervisor.completed == 5
+
+
+async def test_sheds_beyond_max_pending():
+    supervisor = TaskSupervisor(max_concurrency=1, max_pending=1)
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+
+    coros = [work() for _ in range(3)]
+    tasks = [supervisor.spawn(coro) for coro in coros]
+
+    assert tasks[2] is None
+    assert supervisor.shed == 1
+    assert coros[2].cr_frame is None  # closed, never run
+
+    release.set()
+    await supervisor.join(timeout=1)
+
+
+async def test_failure_reported_to_on_error():
+    errors = list()
+    supervisor = TaskSupervisor(on_error=lambda exc, task: errors.append(exc))
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    supervisor.spawn(fail())
+    await supervisor.join(timeout=1)
+
+    assert supervisor.failed == 1
+    assert isinstance(errors[0], RuntimeError)
+
+
+async def test_shutdown_cancels_stragglers():
+    supervisor = TaskSupervisor()
+
+    async def forever():
+        await asyncio.sleep(3600)
+
+    task = supervisor.spawn(forever())
+    await supervisor.shutdown(timeout=0.01)
+
+    assert task.cancelled()
+    assert supervisor.spawn(forever()) is None
+
+
+async def test_track_collects_spawned_tasks():
+    supervisor = TaskSupervisor()
+
+    async def work():
+        pass
+
+    with supervisor.track() as spawned:
+        supervisor.spawn(work())
+
+    supervisor.spawn(work())
+    assert len(spawned) == 1
+    await supervisor.join(timeout=1)
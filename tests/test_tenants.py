@@ -0,0 +1,156 @@
+"""Tests for the per-tenant overlays of a command tree."""
+
+import click
+
+from slack_click.async_click import AsyncSlackClickGroup, click_async
+from slack_click.tenants import TenantOverlay, TenantOverlays, overlay_path
+
+
+def build_tree(tenants):
+    ran = list()
+
+    @click.group(name="/clicker", cls=AsyncSlackClickGroup, tenants=tenants)
+    @click.pass_obj
+    @click_async
+    async def cli(request):
+        pass
+
+    @cli.command("deploy", help="Deploy a service.")
+    @click.option("--region", default="us-east-1")
+    @click.pass_obj
+    async def deploy(request, region):
+        ran.append(("deploy", region))
+
+    @cli.group("admin")
+    def admin():
+        pass
+
+    @admin.command("purge")
+    @click.pass_obj
+    async def purge(request):
+        ran.append(("purge",))
+
+    @cli.on(purge)
+    async def on_purge(request):
+        ran.append(("on_purge",))
+
+    return cli, ran
+
+
+def test_overlay_path_and_hidden():
+    assert overlay_path("/clicker") == ""
+    assert overlay_path("/clicker.admin.purge") == "admin purge"
+
+    overlay = TenantOverlay(hidden=["admin"])
+    assert overlay.is_hidden("/clicker.admin")
+    assert overlay.is_hidden("/clicker.admin.purge")
+    assert not overlay.is_hidden("/clicker.deploy")
+    assert not overlay.is_hidden("/clicker")
+
+
+def test_same_content_same_key():
+    first = TenantOverlay(hidden=["b", "a"], default_map={"deploy": {"region": "eu"}})
+    second = TenantOverlay(hidden=["a", "b"], default_map={"deploy": {"region": "eu"}})
+    assert first.key == second.key
+    assert first.key != TenantOverlay(hidden=["a"]).key
+
+
+def test_loader_results_cached():
+    loaded = list()
+
+    def loader(team_id):
+        loaded.append(team_id)
+        return TenantOverlay(hidden=["admin"]) if team_id == "T1" else None
+
+    tenants = TenantOverlays(loader=loader, maxsize=2)
+    assert tenants.get("T1").is_hidden("/clicker.admin")
+    assert tenants.get("T1") is tenants.get("T1")
+    assert tenants.get("T2") is None
+    assert tenants.get("T2") is None
+    assert loaded == ["T1", "T2"]
+
+    tenants.get("T3")
+    tenants.get("T1")
+    assert loaded == ["T1", "T2", "T3", "T1"]
+    assert tenants.stats()["loaded"] == 2
+
+
+def test_set_replaces_loaded_overlay():
+    tenants = TenantOverlays(loader=lambda team_id: None)
+    assert tenants.for_payload(dict(team_id="T1")) is None
+
+    overlay = TenantOverlay(hidden=["admin"])
+    tenants.set("T1", overlay)
+    assert tenants.for_payload(dict(team=dict(id="T1"))) is overlay
+
+    tenants.set("T1", None)
+    assert tenants.get("T1") is None
+    assert tenants.for_payload(dict()) is None
+
+
+async def test_hidden_command_refused(command_request):
+    tenants = TenantOverlays({"T1": TenantOverlay(hidden=["admin"])})
+    cli, ran = build_tree(tenants)
+
+    request = command_request("/clicker", "admin purge", team_id="T1")
+    await cli(prog_name=cli.name, obj=request)
+    assert not ran
+    assert request.context["say"].messages
+
+    await cli(prog_name=cli.name, obj=command_request("/clicker", "admin purge"))
+    assert ran == [("purge",)]
+
+
+async def test_hidden_event_refused(action_request):
+    tenants = TenantOverlays({"T1": TenantOverlay(hidden=["admin"])})
+    cli, ran = build_tree(tenants)
+
+    await cli.emit(
+        action_request("/clicker.admin.purge", team=dict(id="T1")),
+        "/clicker.admin.purge",
+    )
+    await cli.emit(action_request("/clicker.admin.purge"), "/clicker.admin.purge")
+    assert ran == [("on_purge",)]
+
+
+async def test_default_map_applied(command_request):
+    tenants = TenantOverlays(
+        {"T2": TenantOverlay(default_map={"deploy": {"region": "eu-west-1"}})}
+    )
+    cli, ran = build_tree(tenants)
+
+    await cli(prog_name=cli.name, obj=command_request("/clicker", "deploy"))
+    request = command_request("/clicker", "deploy", team_id="T2")
+    await cli(prog_name=cli.name, obj=request)
+    request = command_request("/clicker", "deploy --region ap", team_id="T2")
+    await cli(prog_name=cli.name, obj=request)
+
+    assert ran == [
+        ("deploy", "us-east-1"),
+        ("deploy", "eu-west-1"),
+        ("deploy", "ap"),
+    ]
+
+
+async def test_help_per_tenant(command_request):
+    tenants = TenantOverlays(
+        {
+            "T1": TenantOverlay(hidden=["admin"]),
+            "T2": TenantOverlay(help={"deploy": "Deploy to the EU."}),
+        }
+    )
+    cli, _ = build_tree(tenants)
+
+    async def help_text(text, team_id):
+        request = command_request("/clicker", text, team_id=team_id)
+        await cli(prog_name=cli.name, obj=request, join_tasks=True)
+        (message,) = request.context["say"].messages
+        return message["text"]
+
+    assert "admin" in await help_text("--help", "T0001")
+    assert "admin" not in await help_text("--help", "T1")
+    assert "Deploy a service." in await help_text("deploy --help", "T1")
+    assert "Deploy to the EU." in await help_text("deploy --help", "T2")
+
+    # the overlays are cached apart, so the first tenant's help is unchanged.
+    assert "admin" in await help_text("--help", "T0001")
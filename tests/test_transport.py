@@ -0,0 +1,236 @@
+"""Tests for the pooled Slack HTTP transport, against a local server."""
+
+import asyncio
+import socket
+
+import click
+import pytest
+from aiohttp import web
+
+from slack_click.async_click import AsyncSlackClickGroup, click_async
+from slack_click.metrics import MetricsRegistry
+from slack_click.transport import (
+    WORKER_CONTEXT_KEY,
+    SlackTransport,
+    TransportError,
+    TransportRespond,
+    TransportSay,
+)
+
+
+class Server(object):
+    """
+    A local Slack stand-in: each call gets the next scripted (status, body,
+    headers) reply, or else an "ok" response; the requests are recorded.
+    """
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.requests = list()
+        self.url = None
+        self._runner = None
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_post("/{path:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._runner.cleanup()
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests.append(
+            (request.path, request.headers.get("Authorization"), await request.json())
+        )
+        if not self.replies:
+            if request.path.startswith("/response"):
+                return web.Response(text="ok")
+            return web.json_response(dict(ok=True, ts="1.0"))
+
+        status, body, headers = self.replies.pop(0)
+        return web.json_response(body, status=status, headers=headers)
+
+
+def transport_for(server, **options):
+    options.setdefault("backoff", 0.001)
+    return SlackTransport(
+        token="xoxb-default", base_url=server.url + "api", metrics=None, **options
+    )
+
+
+async def test_api_call_reuses_connection():
+    async with Server() as server:
+        transport = transport_for(server)
+        try:
+            client = transport.client("xoxb-team")
+            resp = await client.chat_postMessage(channel="C1", text="hi")
+            await transport.api_call("chat.postMessage", channel="C1", text="again")
+        finally:
+            await transport.close()
+
+    assert resp == dict(ok=True, ts="1.0")
+    assert server.requests == [
+        ("/api/chat.postMessage", "Bearer xoxb-team", dict(channel="C1", text="hi")),
+        (
+            "/api/chat.postMessage",
+            "Bearer xoxb-default",
+            dict(channel="C1", text="again"),
+        ),
+    ]
+    stats = transport.stats()
+    assert stats["calls"] == 2
+    assert stats["connections"] == 1
+    assert stats["reused"] == 1
+    assert stats["inflight"] == 0
+
+
+async def test_rate_limited_call_retried():
+    async with Server((429, dict(ok=False), {"Retry-After": "0"})) as server:
+        transport = transport_for(server)
+        try:
+            resp = await transport.api_call("chat.postMessage", channel="C1")
+        finally:
+            await transport.close()
+
+    assert resp["ok"]
+    assert len(server.requests) == 2
+    assert transport.stats()["retries"] == 1
+
+
+async def test_gateway_errors_exhaust_retries():
+    replies = [(503, dict(ok=False), {})] * 3
+    async with Server(*replies) as server:
+        transport = transport_for(server, max_retries=2)
+        try:
+            with pytest.raises(TransportError) as excinfo:
+                await transport.api_call("chat.postMessage", channel="C1")
+        finally:
+            await transport.close()
+
+    assert excinfo.value.status == 503
+    assert len(server.requests) == 3
+    assert transport.stats()["failed"] == 1
+
+
+async def test_api_error_not_retried():
+    async with Server((200, dict(ok=False, error="channel_not_found"), {})) as server:
+        transport = transport_for(server)
+        try:
+            with pytest.raises(TransportError, match="channel_not_found"):
+                await transport.api_call("chat.postMessage", channel="C1")
+        finally:
+            await transport.close()
+
+    assert len(server.requests) == 1
+
+
+async def test_connect_failure_retried():
+    # a port that nothing listens on.
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+
+    transport = SlackTransport(
+        base_url=f"http://127.0.0.1:{port}/api", max_retries=2, backoff=0.001
+    )
+    try:
+        with pytest.raises(TransportError) as excinfo:
+            await transport.api_call("chat.postMessage", channel="C1")
+    finally:
+        await transport.close()
+
+    assert excinfo.value.status == 0
+    assert transport.stats()["retries"] == 2
+
+
+async def test_lost_connection_not_retried():
+    # the server reads the request, then disconnects without replying; the
+    # post may have been processed, so it is not sent again.
+    received = list()
+
+    async def handle(reader, writer):
+        received.append(await reader.readuntil(b"\r\n\r\n"))
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    transport = SlackTransport(base_url=f"http://127.0.0.1:{port}/api", backoff=0.001)
+    try:
+        with pytest.raises(TransportError):
+            await transport.api_call("chat.postMessage", channel="C1")
+    finally:
+        await transport.close()
+        server.close()
+        await server.wait_closed()
+
+    assert len(received) == 1
+    assert transport.stats()["retries"] == 0
+
+
+async def test_metrics_labeled_by_method():
+    metrics = MetricsRegistry(enabled=True)
+    async with Server() as server:
+        transport = transport_for(server)
+        transport.metrics = metrics
+        try:
+            await transport.api_call("chat.postMessage", channel="C1")
+            await transport.post_response(server.url + "response/1", text="hi")
+        finally:
+            await transport.close()
+
+    counters = metrics.snapshot()["counters"]["transport_total"]
+    assert counters == {"chat.postMessage": dict(ok=1), "response_url": dict(ok=1)}
+    assert 'method="chat.postMessage"' in metrics.render_prometheus()
+
+
+async def test_group_messages_sent_through_transport(command_request):
+    async with Server() as server:
+        transport = transport_for(server)
+
+        @click.group(name="/clicker", cls=AsyncSlackClickGroup, transport=transport)
+        @click.pass_obj
+        @click_async
+        async def cli(request):
+            pass
+
+        @cli.command("hello")
+        @click.pass_obj
+        async def hello(request):
+            await request.context.say("hi")
+            await request.context.respond("done", replace_original=True)
+
+        request = command_request(
+            "/clicker", "hello", response_url=server.url + "response/1"
+        )
+        try:
+            await cli(prog_name=cli.name, obj=request)
+        finally:
+            await transport.close()
+
+    assert isinstance(request.context["say"], TransportSay)
+    assert isinstance(request.context["respond"], TransportRespond)
+    assert server.requests == [
+        (
+            "/api/chat.postMessage",
+            "Bearer xoxb-default",
+            dict(channel="C0001", text="hi"),
+        ),
+        ("/response/1", None, dict(text="done", replace_original=True)),
+    ]
+
+
+def test_attach_skips_worker_requests(command_request):
+    transport = SlackTransport()
+    request = command_request("/clicker")
+    say = request.context["say"]
+    request.context[WORKER_CONTEXT_KEY] = True
+
+    transport.attach(request)
+    assert request.context["say"] is say
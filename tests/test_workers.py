@@ -0,0 +1,148 @@
+"""Tests for running the commands of a tree in worker processes."""
+
+import asyncio
+import os
+import time
+
+import click
+import pytest
+
+from slack_click.async_click import AsyncSlackClickGroup, click_async
+from slack_click.workers import WorkerCrashed, WorkerPool, _resolve
+
+# the tree run by the workers; each worker imports this module.
+
+
+@click.group(name="/work", cls=AsyncSlackClickGroup)
+@click.pass_obj
+@click_async
+async def worker_tree(request):
+    pass
+
+
+@worker_tree.command("hello")
+@click.pass_obj
+async def hello(request):
+    await request.context["say"](f"hello from {os.getpid()}")
+
+
+@worker_tree.command("post")
+@click.pass_obj
+async def post(request):
+    resp = await request.context.client.chat_postMessage(channel="C0001", text="hi")
+    await request.context["say"](f"posted {resp['ts']}")
+
+
+@worker_tree.command("hang")
+def hang():
+    time.sleep(60)
+
+
+@worker_tree.command("crash")
+def crash():
+    os._exit(3)
+
+
+TARGET = f"{__name__}:worker_tree"
+
+
+class Response(object):
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeClient(object):
+    def __init__(self):
+        self.calls = list()
+
+    async def chat_postMessage(self, **kwargs):
+        self.calls.append(kwargs)
+        return Response(dict(ok=True, ts="1.0"))
+
+
+async def run(pool, command_request, text, **body):
+    request = command_request("/work", text, **body)
+    await asyncio.wait_for(pool.submit(request), 30)
+    return request
+
+
+async def started(**options):
+    pool = WorkerPool(TARGET, workers=2, **options)
+    await asyncio.wait_for(pool.start(), 30)
+    return pool
+
+
+def test_route_sticky_and_round_robin():
+    pool = WorkerPool(TARGET, workers=4)
+    body = dict(team_id="T1", user_id="U1")
+    assert pool.sticky == "user"
+    assert len({pool.route(body) for _ in range(5)}) == 1
+    assert pool.route(body) == pool.route(dict(team=dict(id="T2"), user=dict(id="U1")))
+
+    pool = WorkerPool(TARGET, workers=4, sticky=None)
+    assert [pool.route(body) for _ in range(5)] == [0, 1, 2, 3, 0]
+
+    with pytest.raises(ValueError):
+        WorkerPool(TARGET, sticky="planet")
+
+
+async def test_say_and_client_proxied(command_request):
+    pool = await started()
+    try:
+        request = await run(pool, command_request, "hello")
+        (text,) = request.context["say"].texts
+        assert text.startswith("hello from ")
+        assert text != f"hello from {os.getpid()}"
+
+        client = FakeClient()
+        request = command_request("/work", "post")
+        request.context["client"] = client
+        await asyncio.wait_for(pool.submit(request), 30)
+
+        assert client.calls == [dict(channel="C0001", text="hi")]
+        assert request.context["say"].texts == ["posted 1.0"]
+    finally:
+        await pool.close()
+
+
+async def test_crash_reroutes_and_restarts(command_request):
+    pool = await started(restart_delay=0.1)
+    try:
+        request = command_request("/work", "crash")
+        index = pool.route(request.body)
+        with pytest.raises(WorkerCrashed):
+            await asyncio.wait_for(pool.submit(request), 30)
+
+        # submitted while the worker restarts, the request runs on the other.
+        request = await run(pool, command_request, "hello")
+        assert request.context["say"].messages
+
+        for _ in range(300):
+            if pool.stats()[index]["restarts"] and pool._workers[index].writer:
+                break
+            await asyncio.sleep(0.1)
+        assert pool.stats()[index]["restarts"] == 1
+    finally:
+        await pool.close()
+
+
+async def test_hung_worker_killed(command_request):
+    pool = await started(timeout=1.0, restart_delay=0.1)
+    try:
+        with pytest.raises(WorkerCrashed, match="did not complete"):
+            await run(pool, command_request, "hang")
+
+        request = await run(pool, command_request, "hello")
+        assert request.context["say"].messages
+    finally:
+        await pool.close(timeout=1.0)
+
+
+def test_only_public_client_methods_proxied(command_request):
+    request = command_request("/work")
+    request.context["client"] = FakeClient()
+
+    assert _resolve(request, "client.chat_postMessage")
+    for name in ("client._session", "token", "client"):
+        with pytest.raises(ValueError):
+            _resolve(request, name)